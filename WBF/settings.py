@@ -246,6 +246,42 @@ SESSION_ENGINE = os.getenv(
 SESSION_COOKIE_AGE = int(os.getenv("DJANGO_SESSION_COOKIE_AGE", "1209600"))  # 14 jours
 SESSION_SAVE_EVERY_REQUEST = False  # cookie pas regénéré à chaque hit
 
+# ────────────────────────────────
+# CACHE
+# ────────────────────────────────
+# - DJANGO_CACHE_BACKEND=locmem|file|redis|dummy (défaut : locmem en dev, file en prod)
+# - REDIS_URL (ou CACHE_URL) : active automatiquement le backend Redis
+# - DJANGO_CACHE_DIR : dossier du cache fichier
+REDIS_URL = os.getenv("REDIS_URL") or os.getenv("CACHE_URL") or ""
+CACHE_BACKEND = os.getenv("DJANGO_CACHE_BACKEND", "redis" if REDIS_URL else ("locmem" if DEBUG else "file"))
+CACHE_KEY_PREFIX = os.getenv("DJANGO_CACHE_KEY_PREFIX", "wbf")
+# Durée de vie par défaut des fragments (s). Les fragments sont de toute façon
+# invalidés dès que le contenu change (cf. core/cache.py).
+CACHE_FRAGMENT_TIMEOUT = int(os.getenv("DJANGO_CACHE_FRAGMENT_TIMEOUT", "3600"))
+# TTL court des valeurs par utilisateur des context processors (badges, CTA…)
+CONTEXT_CACHE_TIMEOUT = int(os.getenv("DJANGO_CONTEXT_CACHE_TIMEOUT", "30"))
+
+if CACHE_BACKEND == "redis" and REDIS_URL:
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+elif CACHE_BACKEND == "file":
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("DJANGO_CACHE_DIR", str(BASE_DIR / ".cache" / "django")),
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("DJANGO_CACHE_MAX_ENTRIES", "5000"))},
+    }
+elif CACHE_BACKEND == "dummy":
+    _default_cache = {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+else:
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "wbf-default",
+    }
+_default_cache.update({"KEY_PREFIX": CACHE_KEY_PREFIX, "TIMEOUT": CACHE_FRAGMENT_TIMEOUT})
+CACHES = {"default": _default_cache}
+
 
 # ────────────────────────────────
 # SÉCURITÉ (prod)
@@ -396,6 +432,12 @@ if _s.DEBUG:
 
 CONTACT_EMAIL = os.getenv("CONTACT_EMAIL", "bamu.wellbeing_foundation@bamuwellbeing.org")
 
+# File d'envoi (core/mail.py) : worker `python manage.py send_queued_mail --loop`
+EMAIL_OUTBOX_EAGER = env_bool("EMAIL_OUTBOX_EAGER", DEBUG)  # envoi direct après commit (dev)
+EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_RETRY_BASE = int(os.getenv("EMAIL_OUTBOX_RETRY_BASE", "60"))  # s, doublé à chaque échec
+
 # ────────────────────────────────
 # LOGGING (console en prod)
 # ────────────────────────────────
@@ -417,6 +459,20 @@ FLW_SECRET_KEY = os.getenv("FLW_SECRET_KEY", "")
 FLW_WEBHOOK_SECRET = os.getenv("FLW_WEBHOOK_SECRET", "")  # 'verif-hash' header sur webhook
 FLW_SANDBOX = env_bool("FLW_SANDBOX", True)
 
+# ────────────────────────────────
+# NOTIFICATIONS (diffusion)
+# ────────────────────────────────
+# Taille des lots d'INSERT ; diffusion différée via la file FanoutJob (worker send_queued_notifications)
+NOTIFICATIONS_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_BATCH_SIZE", "500"))
+NOTIFICATIONS_ASYNC = env_bool("NOTIFICATIONS_ASYNC", False)
+NOTIFICATIONS_RETRY_BASE = int(os.getenv("NOTIFICATIONS_RETRY_BASE", "60"))  # s, doublé à chaque échec
+
+# ────────────────────────────────
+# DASHBOARD STAFF
+# ────────────────────────────────
+# Durée de vie (s) de l'instantané des KPIs ; au-delà il est recalculé par une seule requête
+STAFF_DASHBOARD_TTL = int(os.getenv("STAFF_DASHBOARD_TTL", "120"))
+
 
 
 # settings.py
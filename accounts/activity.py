@@ -0,0 +1,138 @@
+# accounts/activity.py
+"""
+Fil d'activité des bénévoles (ActivityItem), alimenté à l'écriture.
+
+Chaque déclaration d'heures et chaque document produit une ligne compacte
+(type, date, titre, lieu, projet…) reliée à sa source ; l'historique du
+bénévole n'est plus qu'un SELECT indexé (volunteer, -date, -id) paginé par
+curseur. Les lignes sont (re)générées :
+
+- à chaque save d'HoursEntry / UserDocument, et quand une mission change de
+  titre/lieu/description (cf. core/signals.py) ; la suppression suit la
+  source (CASCADE) ;
+- en masse par `manage.py rebuild_activity` (reprise, ou après un import).
+
+    from accounts import activity
+    activity.sync_hours([entry.pk])
+"""
+import os
+from datetime import datetime, time as dtime
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ActivityItem, HoursEntry, UserDocument, Volunteer
+
+CHUNK = 500
+
+
+def _at_noon(day):
+    # une déclaration d'heures n'a qu'une date : placée à midi (heure locale) dans le fil
+    return timezone.make_aware(datetime.combine(day, dtime(12, 0)), timezone.get_current_timezone())
+
+
+def _cut(value, size):
+    return (value or "")[:size]
+
+
+def _event_projects(event_ids):
+    """{event_id: "Projet A, Projet B"} en une requête."""
+    from core.models import Event
+    out = {}
+    for event_id, title in (Event.projects.through.objects
+                            .filter(event_id__in=event_ids)
+                            .order_by("project__title")
+                            .values_list("event_id", "project__title")):
+        out[event_id] = f"{out[event_id]}, {title}" if event_id in out else title
+    return out
+
+
+def _hours_item(he, projects):
+    m, ev = he.mission, he.event
+    if he.mission_id:
+        kind = ActivityItem.Kind.MISSION
+        title = f"Mission — {m.title}"
+        description = m.description or he.note
+        location = m.location or getattr(m.event if m.event_id else ev, "location", "")
+        project = projects.get(m.event_id or he.event_id, "")
+    elif he.event_id:
+        kind = ActivityItem.Kind.EVENT
+        title = f"Événement — {ev.title}"
+        description = ev.description or he.note
+        location = ev.location
+        project = projects.get(he.event_id, "")
+    else:
+        kind = ActivityItem.Kind.HOURS
+        title, description, location, project = "Heures déclarées", he.note, "", ""
+    return ActivityItem(
+        volunteer_id=he.volunteer_id,
+        kind=kind,
+        title=_cut(title, 200),
+        date=_at_noon(he.date),
+        description=_cut(description, 255),
+        note=he.note,
+        project=_cut(project, 255),
+        location=_cut(location, 255),
+        hours=he.hours,
+        hours_entry_id=he.pk,
+    )
+
+
+def sync_hours(entry_ids):
+    """(Re)génère les lignes des déclarations d'heures données (4 requêtes par lot)."""
+    entry_ids = list(entry_ids)
+    if not entry_ids:
+        return 0
+    entries = list(HoursEntry.objects.filter(pk__in=entry_ids).select_related("mission__event", "event"))
+    projects = _event_projects({e.mission.event_id or e.event_id for e in entries} - {None})
+    with transaction.atomic():
+        ActivityItem.objects.filter(hours_entry_id__in=entry_ids).delete()
+        ActivityItem.objects.bulk_create([_hours_item(he, projects) for he in entries], batch_size=CHUNK)
+    return len(entries)
+
+
+def sync_documents(document_ids):
+    """(Re)génère les lignes des documents donnés (documents d'utilisateurs non bénévoles : ignorés)."""
+    document_ids = list(document_ids)
+    if not document_ids:
+        return 0
+    docs = list(UserDocument.objects.filter(pk__in=document_ids))
+    volunteers = dict(Volunteer.objects.filter(user_id__in={d.user_id for d in docs}).values_list("user_id", "id"))
+    items = [
+        ActivityItem(
+            volunteer_id=volunteers[d.user_id],
+            kind=ActivityItem.Kind.DOCUMENT,
+            title=_cut(d.name or os.path.basename(d.file.name or ""), 200) or "Document",
+            date=d.uploaded_at,
+            status=d.status,
+            document_id=d.pk,
+        )
+        for d in docs if d.user_id in volunteers
+    ]
+    with transaction.atomic():
+        ActivityItem.objects.filter(document_id__in=document_ids).delete()
+        ActivityItem.objects.bulk_create(items, batch_size=CHUNK)
+    return len(items)
+
+
+def _chunks(ids):
+    batch = []
+    for pk in ids:
+        batch.append(pk)
+        if len(batch) >= CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebuild(volunteer_ids=None):
+    """Régénère tout le fil (ou celui des bénévoles donnés). Retourne (heures, documents)."""
+    hours_qs = HoursEntry.objects.order_by("pk")
+    docs_qs = UserDocument.objects.filter(user__volunteer__isnull=False).order_by("pk")
+    if volunteer_ids is not None:
+        hours_qs = hours_qs.filter(volunteer_id__in=volunteer_ids)
+        docs_qs = docs_qs.filter(user__volunteer__in=volunteer_ids)
+    n_hours = sum(sync_hours(batch) for batch in _chunks(hours_qs.values_list("pk", flat=True).iterator()))
+    n_docs = sum(sync_documents(batch) for batch in _chunks(docs_qs.values_list("pk", flat=True).iterator()))
+    return n_hours, n_docs
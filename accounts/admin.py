@@ -42,8 +42,8 @@ class VolunteerSkillAdmin(admin.ModelAdmin):
 
 @admin.register(ActivityItem)
 class ActivityItemAdmin(admin.ModelAdmin):
-    list_display = ("volunteer", "title", "date")
-    list_filter  = ("date",)
+    list_display = ("volunteer", "kind", "title", "date")
+    list_filter  = ("kind", "date")
     search_fields = ("title", "volunteer__user__username")
 
 
@@ -0,0 +1,110 @@
+# accounts/availability.py
+"""
+Masque de disponibilités (28 bits = 7 jours × 4 créneaux) dénormalisé sur
+Volunteer.availability_mask, tenu à jour par signaux à chaque modification
+d'Availability (cf. core/signals.py).
+
+    bit(Availability.Day.MONDAY, "morning")    # 1 << 0
+    filter_available(Volunteer.objects.all(), day=5)           # libres le samedi (SQL : mask & x != 0)
+    staffing_heatmap(heatmap_counts(qs))  # 7×4 compteurs
+"""
+
+from django.db.models import Count, F
+
+from .models import Availability
+
+# Ordre fixe des créneaux dans le masque : ne pas réordonner (valeurs stockées)
+SLOTS = [Availability.Slot.MORNING, Availability.Slot.AFTERNOON, Availability.Slot.EVENING, Availability.Slot.FULLDAY]
+SLOT_INDEX = {slot.value: i for i, slot in enumerate(SLOTS)}
+DAYS = list(Availability.Day)
+BITS = len(DAYS) * len(SLOTS)
+
+
+def bit(day, slot):
+    return 1 << (int(day) * len(SLOTS) + SLOT_INDEX[str(slot)])
+
+
+def day_mask(day):
+    """Tous les créneaux d'un jour."""
+    return ((1 << len(SLOTS)) - 1) << (int(day) * len(SLOTS))
+
+
+def slot_mask(slot):
+    """Un créneau, tous les jours."""
+    i = SLOT_INDEX[str(slot)]
+    return sum(1 << (d * len(SLOTS) + i) for d in range(len(DAYS)))
+
+
+def mask_for(pairs):
+    """Masque d'une liste de (jour, créneau) ; les créneaux inconnus sont ignorés."""
+    mask = 0
+    for day, slot in pairs:
+        if str(slot) in SLOT_INDEX:
+            mask |= bit(day, slot)
+    return mask
+
+
+def pairs_from_mask(mask):
+    """Inverse de mask_for : [(jour, créneau), …] triés par jour puis créneau."""
+    return [(day.value, slot.value)
+            for day in DAYS for slot in SLOTS
+            if mask & bit(day, slot)]
+
+
+def filter_available(qs, day=None, slot=None, field="availability_mask"):
+    """
+    Restreint un QuerySet de Volunteer (ou relation via `field`) en SQL
+    par ET bit à bit : au moins un créneau le jour `day`, au moins un jour au créneau `slot`.
+    """
+    if day not in (None, ""):
+        qs = qs.alias(_avail_day=F(field).bitand(day_mask(day))).exclude(_avail_day=0)
+    if slot not in (None, ""):
+        qs = qs.alias(_avail_slot=F(field).bitand(slot_mask(slot))).exclude(_avail_slot=0)
+    return qs
+
+
+def recompute_masks(volunteer_ids):
+    """Recalcule le masque des bénévoles donnés depuis leurs lignes Availability."""
+    from .models import Volunteer
+    volunteer_ids = set(volunteer_ids)
+    if not volunteer_ids:
+        return
+    masks = dict.fromkeys(volunteer_ids, 0)
+    for vid, day, slot in (Availability.objects
+                           .filter(volunteer_id__in=volunteer_ids)
+                           .values_list("volunteer_id", "day", "slot")):
+        if slot in SLOT_INDEX:
+            masks[vid] |= bit(day, slot)
+    by_mask = {}
+    for vid, mask in masks.items():
+        by_mask.setdefault(mask, []).append(vid)
+    for mask, ids in by_mask.items():  # un UPDATE par valeur distincte
+        Volunteer.objects.filter(id__in=ids).update(availability_mask=mask)
+
+
+def heatmap_counts(volunteers):
+    """[(masque, nombre de bénévoles)] d'un QuerySet de Volunteer, groupé en SQL."""
+    return (volunteers.order_by()
+            .values("availability_mask")
+            .annotate(n=Count("id"))
+            .values_list("availability_mask", "n"))
+
+
+def staffing_heatmap(mask_counts):
+    """
+    Nombre de bénévoles libres par (jour, créneau) à partir de paires
+    (masque, nombre de bénévoles), regroupées côté SQL (cf. heatmap_counts) :
+    [{"day": 0, "label": "Lundi", "slots": [n_matin, n_aprem, n_soir, n_journée]}, …].
+    Le coût dépend du nombre de profils distincts, pas du nombre de bénévoles.
+    """
+    counts = [0] * BITS
+    for mask, n in mask_counts:
+        while mask:
+            low = mask & -mask
+            counts[low.bit_length() - 1] += n
+            mask ^= low
+    width = len(SLOTS)
+    return [
+        {"day": day.value, "label": day.label, "slots": counts[day.value * width:(day.value + 1) * width]}
+        for day in DAYS
+    ]
@@ -419,6 +419,7 @@ class HoursEntryForm(forms.ModelForm):
 from allauth.account.forms import ResetPasswordForm, SignupForm
 from allauth.socialaccount.forms import SignupForm as SocialSignupFormBase
 from legal.models import LegalDocument, LegalAcceptance
+from legal import registry as legal_registry
 
 INPUT_CLS = (
     "w-full rounded-xl border border-slate-300 bg-white/80 px-3 py-2.5 "
@@ -453,16 +454,11 @@ class LegalAcceptanceMixin:
         docs = []
         missing = []
         for key in self.legal_keys:
-            try:
-                document = LegalDocument.objects.get(key=key, locale=self.legal_locale)
-            except LegalDocument.DoesNotExist:
-                missing.append(key)
-                continue
-            version = document.current_version()
+            version = legal_registry.current_version(key, self.legal_locale)
             if not version:
                 missing.append(key)
                 continue
-            docs.append((document, version))
+            docs.append((version.document, version))
 
         if missing:
             raise forms.ValidationError(
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:22
+
+from django.db import migrations, models
+
+# même ordre que accounts.availability.SLOTS
+SLOTS = ["morning", "afternoon", "evening", "fullday"]
+
+
+def backfill_masks(apps, schema_editor):
+    Availability = apps.get_model("accounts", "Availability")
+    Volunteer = apps.get_model("accounts", "Volunteer")
+    masks = {}
+    for vid, day, slot in Availability.objects.values_list("volunteer_id", "day", "slot").iterator():
+        if slot in SLOTS:
+            masks[vid] = masks.get(vid, 0) | (1 << (day * len(SLOTS) + SLOTS.index(slot)))
+    by_mask = {}
+    for vid, mask in masks.items():
+        by_mask.setdefault(mask, []).append(vid)
+    for mask, ids in by_mask.items():
+        Volunteer.objects.filter(id__in=ids).update(availability_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='volunteer',
+            name='availability_mask',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
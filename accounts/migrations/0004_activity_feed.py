@@ -0,0 +1,66 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_volunteer_availability_mask'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='activityitem',
+            options={'ordering': ['-date', '-id']},
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='description',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='document',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='accounts.userdocument'),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='hours',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='hours_entry',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='accounts.hoursentry'),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='kind',
+            field=models.CharField(choices=[('mission', 'Mission'), ('evenement', 'Événement'), ('heures', 'Heures'), ('document', 'Document')], default='heures', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='location',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='project',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='activityitem',
+            name='status',
+            field=models.CharField(blank=True, max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='activityitem',
+            index=models.Index(fields=['volunteer', '-date', '-id'], name='activity_volunteer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='activityitem',
+            index=models.Index(fields=['volunteer', 'kind', '-date', '-id'], name='activity_vol_kind_date_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_activity_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VolunteerStats',
+            fields=[
+                ('volunteer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='accounts.volunteer')),
+                ('hours_total', models.DecimalField(decimal_places=2, default=0, max_digits=9)),
+                ('month', models.DateField(blank=True, null=True)),
+                ('hours_month', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('missions_count', models.PositiveIntegerField(default=0)),
+                ('events_count', models.PositiveIntegerField(default=0)),
+                ('last_activity', models.DateField(blank=True, null=True)),
+                ('invited_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('accepted_count', models.PositiveIntegerField(default=0)),
+                ('declined_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Statistiques bénévole',
+                'verbose_name_plural': 'Statistiques bénévoles',
+            },
+        ),
+    ]
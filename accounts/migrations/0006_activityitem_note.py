@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:42
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_note(apps, schema_editor):
+    ActivityItem = apps.get_model("accounts", "ActivityItem")
+    HoursEntry = apps.get_model("accounts", "HoursEntry")
+    note = HoursEntry.objects.filter(pk=OuterRef("hours_entry_id")).values("note")[:1]
+    ActivityItem.objects.filter(hours_entry__isnull=False).update(note=Subquery(note))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_volunteer_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activityitem',
+            name='note',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(backfill_note, migrations.RunPython.noop),
+    ]
@@ -9,6 +9,7 @@ from django.db.models import Sum, Q, CheckConstraint
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator, MinValueValidator
 from django.core.exceptions import ValidationError
+from core.tracking import TrackedFieldsMixin
 from datetime import timedelta
 from core.models import City
 import random
@@ -28,7 +29,7 @@ def user_document_path(instance, filename):
 ALLOWED_DOC_EXTS = ["pdf", "jpg", "jpeg", "png", "webp"]
 
 # ---------- Document utilisateur ----------
-class UserDocument(models.Model):
+class UserDocument(TrackedFieldsMixin, models.Model):
     STATUS_CHOICES = [
         ("draft", "Brouillon"),
         ("submitted", "Soumis"),
@@ -89,6 +90,8 @@ class Volunteer(models.Model):
 
     status = models.CharField(max_length=20, choices=STATUS, default="approved")  # nouveau
     city = models.ForeignKey(City, null=True, blank=True, on_delete=models.SET_NULL, related_name="volunteers")
+    # Disponibilités dénormalisées : 1 bit par (jour, créneau), cf. accounts/availability.py
+    availability_mask = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -109,10 +112,17 @@ class Volunteer(models.Model):
         return getattr(self.user, "documents", None).all() if hasattr(self.user, "documents") else []
 
     def get_stats(self):
-        hours = self.hours_entries.aggregate(total=Sum("hours"))["total"] or 0
-        missions = self.hours_entries.filter(mission__isnull=False).values("mission").distinct().count()
-        events = self.hours_entries.filter(event__isnull=False).values("event").distinct().count()
-        return {"hours": hours, "missions": missions, "events": events}
+        """Ligne VolunteerStats (une requête ; créée à la volée si absente)."""
+        from .stats import get_stats
+        row = get_stats(self)
+        return {
+            "hours": row.hours_total,
+            "hours_month": row.hours_this_month(),
+            "missions": row.missions_count,
+            "events": row.events_count,
+            "last_activity": row.last_activity,
+            "signups": row.signup_counts(),
+        }
 
     def update_from_application(self, application, *, overwrite: bool = False,
                                 avatar_file=None, commit: bool = True) -> list[str]:
@@ -295,7 +305,7 @@ class EmailChangeRequest(models.Model):
         self.save()
 
 # ---------- Heures + justificatifs ----------
-class HoursEntry(models.Model):
+class HoursEntry(TrackedFieldsMixin, models.Model):
     volunteer = models.ForeignKey("accounts.Volunteer", on_delete=models.CASCADE, related_name="hours_entries")
     # mission obligatoire + PROTECT pour éviter des heures orphelines si on supprime une mission
     mission   = models.ForeignKey("staff.Mission", null=False, blank=False, on_delete=models.PROTECT, related_name="hours_entries")
@@ -375,19 +385,88 @@ class HoursEntryProof(models.Model):
         super().save(*args, **kwargs)
 
 
-# ---------- Activité simple ----------
+# ---------- Fil d'activité (historique bénévole) ----------
 class ActivityItem(models.Model):
+    """
+    Ligne compacte du fil d'activité d'un bénévole, écrite au moment où la
+    source change (heures, documents : cf. accounts/activity.py) pour que
+    l'historique soit une seule requête indexée.
+    """
+    class Kind(models.TextChoices):
+        MISSION = "mission", "Mission"
+        EVENT = "evenement", "Événement"
+        HOURS = "heures", "Heures"
+        DOCUMENT = "document", "Document"
+
     volunteer = models.ForeignKey(Volunteer, on_delete=models.CASCADE, related_name="activities")
+    kind = models.CharField(max_length=16, choices=Kind.choices, default=Kind.HOURS)
     title = models.CharField(max_length=200)
     date = models.DateTimeField(default=timezone.now)
+    description = models.CharField(max_length=255, blank=True)
+    note = models.CharField(max_length=255, blank=True)  # note de la déclaration d'heures (recherche)
+    project = models.CharField(max_length=255, blank=True)
+    location = models.CharField(max_length=255, blank=True)
+    hours = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    status = models.CharField(max_length=20, blank=True)
+
+    # source (une seule renseignée) : la ligne disparaît avec elle
+    hours_entry = models.OneToOneField("accounts.HoursEntry", null=True, blank=True,
+                                       on_delete=models.CASCADE, related_name="activity")
+    document = models.OneToOneField("accounts.UserDocument", null=True, blank=True,
+                                    on_delete=models.CASCADE, related_name="activity")
 
     class Meta:
-        ordering = ["-date"]
+        ordering = ["-date", "-id"]
+        indexes = [
+            models.Index(fields=["volunteer", "-date", "-id"], name="activity_volunteer_date_idx"),
+            models.Index(fields=["volunteer", "kind", "-date", "-id"], name="activity_vol_kind_date_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
 
+# ---------- Statistiques dénormalisées (cf. accounts/stats.py) ----------
+class VolunteerStats(models.Model):
+    """Compteurs d'un bénévole, recalculés à chaque écriture d'heures / d'inscription."""
+    volunteer = models.OneToOneField(Volunteer, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    hours_total = models.DecimalField(max_digits=9, decimal_places=2, default=0)
+    # seau mensuel : heures du mois `month` (1er jour) ; un mois échu vaut 0 pour le mois courant
+    month = models.DateField(null=True, blank=True)
+    hours_month = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    missions_count = models.PositiveIntegerField(default=0)
+    events_count = models.PositiveIntegerField(default=0)
+    last_activity = models.DateField(null=True, blank=True)
+
+    invited_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    accepted_count = models.PositiveIntegerField(default=0)
+    declined_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Statistiques bénévole"
+        verbose_name_plural = "Statistiques bénévoles"
+
+    def __str__(self):
+        return f"Stats {self.volunteer_id}"
+
+    def hours_this_month(self, today=None):
+        today = today or timezone.localdate()
+        return self.hours_month if self.month == today.replace(day=1) else Decimal("0")
+
+    def signup_counts(self):
+        return {
+            "invited": self.invited_count,
+            "pending": self.pending_count,
+            "accepted": self.accepted_count,
+            "declined": self.declined_count,
+            "cancelled": self.cancelled_count,
+        }
+
+
 # ---------- Disponibilités & Compétences ----------
 class Availability(models.Model):
     class Day(models.IntegerChoices):
@@ -0,0 +1,85 @@
+# accounts/stats.py
+"""
+Statistiques par bénévole (VolunteerStats) : une ligne lue par le dashboard,
+le profil et la fiche staff au lieu de 3–4 agrégations à chaque affichage.
+
+La ligne est recalculée depuis HoursEntry / MissionSignup (deux requêtes
+groupées) après chaque écriture (cf. core/signals.py), ou en masse par
+`manage.py rebuild_volunteer_stats`.
+
+    from accounts import stats
+    stats.refresh([volunteer.id])
+    stats.get_stats(volunteer).hours_total
+"""
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import HoursEntry, Volunteer, VolunteerStats
+
+CHUNK = 500
+FIELDS = [
+    "hours_total", "month", "hours_month", "missions_count", "events_count", "last_activity",
+    "invited_count", "pending_count", "accepted_count", "declined_count", "cancelled_count",
+]
+
+
+def compute(volunteer_ids):
+    """{volunteer_id: VolunteerStats non enregistré} depuis les tables sources."""
+    from staff.models import MissionSignup
+
+    month = timezone.localdate().replace(day=1)
+    rows = {vid: VolunteerStats(volunteer_id=vid, month=month) for vid in volunteer_ids}
+
+    for r in (HoursEntry.objects.filter(volunteer_id__in=volunteer_ids)
+              .values("volunteer_id")
+              .annotate(
+                  total=Sum("hours"),
+                  month_total=Sum("hours", filter=Q(date__gte=month)),
+                  missions=Count("mission", distinct=True),
+                  events=Count("event", distinct=True),
+                  last=Max("date"),
+              ).order_by()):
+        row = rows[r["volunteer_id"]]
+        row.hours_total = r["total"] or 0
+        row.hours_month = r["month_total"] or 0
+        row.missions_count = r["missions"]
+        row.events_count = r["events"]
+        row.last_activity = r["last"]
+
+    for vid, status, n in (MissionSignup.objects.filter(volunteer_id__in=volunteer_ids)
+                           .values("volunteer_id", "status").annotate(n=Count("id"))
+                           .values_list("volunteer_id", "status", "n").order_by()):
+        if hasattr(rows[vid], f"{status}_count"):
+            setattr(rows[vid], f"{status}_count", n)
+    return rows
+
+
+def refresh(volunteer_ids):
+    """Recalcule et enregistre (upsert) les lignes des bénévoles donnés."""
+    ids = list(Volunteer.objects.filter(id__in=set(volunteer_ids)).values_list("id", flat=True))
+    if not ids:
+        return []
+    rows = list(compute(ids).values())
+    with transaction.atomic():
+        VolunteerStats.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=["volunteer"], update_fields=[*FIELDS, "updated_at"],
+        )
+    return rows
+
+
+def get_stats(volunteer):
+    """Ligne du bénévole (une requête), calculée à la volée si elle n'existe pas encore."""
+    try:
+        return VolunteerStats.objects.get(volunteer_id=volunteer.pk)
+    except VolunteerStats.DoesNotExist:
+        rows = refresh([volunteer.pk])
+        return rows[0] if rows else VolunteerStats(volunteer_id=volunteer.pk)
+
+
+def rebuild():
+    """Recalcule toutes les lignes, par lots. Retourne le nombre de bénévoles traités."""
+    ids = list(Volunteer.objects.order_by("pk").values_list("pk", flat=True))
+    for i in range(0, len(ids), CHUNK):
+        refresh(ids[i:i + CHUNK])
+    return len(ids)
@@ -8,7 +8,8 @@ from pathlib import Path
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Sum, Q
+from django.db.models import Sum, Q, Count, Exists, OuterRef
+from django.db.models.functions import Coalesce, TruncDate
 from django.forms import ModelForm, DateInput
 from django.http import FileResponse, Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render, resolve_url
@@ -20,6 +21,10 @@ from django.db import IntegrityError
 from django.core.paginator import Paginator
 from core.models import Event
 from staff.models import Mission, MissionSignup  # <-- IMPORTANT
+from staff.services import signup_count_annotations
+from staff.matching import recommend, recommendation_scope
+from core.pagination import paginate_keyset
+from core import cache as content_cache
 from .forms import VolunteerForm, AvailabilityAddForm, VolunteerSkillAddForm, HoursEntryForm
 from django.core.exceptions import ValidationError
 from core.utils import redirect_back 
@@ -42,6 +47,7 @@ from .models import (
     HoursEntry,
     HoursEntryProof,
     Availability, VolunteerSkill,
+    ActivityItem,
 )
 from django.utils.http import url_has_allowed_host_and_scheme
 
@@ -57,6 +63,10 @@ ALLOWED_MIMES = {"application/pdf"}
 PROOFS_MAX_SIZE = 5 * 1024 * 1024
 PROOFS_ALLOWED_MIMES = {"application/pdf", "image/jpeg", "image/png", "image/webp"}
 
+# Recommandations de missions (page Missions)
+RECO_DISPLAY = 3
+RECO_CACHE_TIMEOUT = 6 * 3600  # borne aussi la dérive de « à venir » d'un jour à l'autre
+
 
 
 
@@ -72,15 +82,14 @@ def dashboard(request):
 
     today = timezone.localdate()
     start_30 = today - timedelta(days=29)
-    start_month = today.replace(day=1)
 
     # ======= Missions à venir ou en cours =======
     signups = (
         MissionSignup.objects
         .filter(volunteer=volunteer, status=MissionSignup.Status.ACCEPTED)
         .select_related("mission")
-        .filter(Q(mission__end_date__gte=today) | Q(mission__start_date__gte=today))
-        .order_by("mission__start_date", "mission__end_date")[:5]
+        .filter(Q(mission__effective_date__gte=today) | Q(mission__end_date__date__gte=today))
+        .order_by("mission__effective_date", "mission__start_date", "mission__end_date")[:5]
     )
 
     def _state_for(m):
@@ -132,22 +141,20 @@ def dashboard(request):
         "obj": d,
     } for d in documents_qs]
 
-    # ======= Heures cumulées =======
-    total_hours = volunteer.hours_entries.aggregate(total=Sum("hours"))["total"] or Decimal("0")
-    month_hours = volunteer.hours_entries.filter(date__gte=start_month).aggregate(total=Sum("hours"))["total"] or Decimal("0")
-
-    # ======= KPI =======
-    missions_count = volunteer.hours_entries.filter(mission__isnull=False).values("mission").distinct().count()
+    # ======= Heures cumulées + KPI (ligne VolunteerStats, cf. accounts/stats.py) =======
+    vstats = volunteer.get_stats()
+    total_hours = vstats["hours"]
+    month_hours = vstats["hours_month"]
+    missions_count = vstats["missions"]
     events_total = Event.objects.count()
     events_next = Event.objects.filter(date__gte=today).count()
 
     # ======= Tâches =======
     tasks = _build_volunteer_tasks(volunteer, today)
 
-    # ======= Sparkline 30 jours =======
-    raw = (volunteer.hours_entries.filter(date__range=[start_30, today])
-           .values("date").order_by("date").annotate(total=Sum("hours")))
-    hours_by_date = {row["date"]: float(row["total"] or 0) for row in raw}
+    # ======= Sparkline 30 jours (agrégats journaliers, cf. core/rollups.py) =======
+    raw = volunteer.daily_hours.filter(date__range=[start_30, today]).values("date", "hours")
+    hours_by_date = {row["date"]: float(row["hours"] or 0) for row in raw}
     max_val = max([0.0] + list(hours_by_date.values()))
     hours_series = []
     for i in range(30):
@@ -177,41 +184,69 @@ def dashboard(request):
 
 
 # ========= Helpers — tasks for dashboard =========
+def _volunteer_task_counts(volunteer, today):
+    """
+    (invitations, demandes en attente, missions passées sans heures) : une requête
+    groupée par statut + une anti-jointure sur HoursEntry, mises en cache par
+    bénévole (invalidées à chaque écriture de MissionSignup / HoursEntry, cf. core/signals.py).
+    """
+    def _build():
+        by_status = dict(
+            MissionSignup.objects
+            .filter(volunteer=volunteer, status__in=[MissionSignup.Status.INVITED, MissionSignup.Status.PENDING])
+            .values("status").annotate(n=Count("id")).values_list("status", "n")
+            .order_by()
+        )
+        # Fin retenue : end_date, sinon start_date (jour local)
+        need_hours = (
+            MissionSignup.objects
+            .filter(volunteer=volunteer, status=MissionSignup.Status.ACCEPTED)
+            .alias(mission_end=TruncDate(Coalesce("mission__end_date", "mission__start_date")))
+            .filter(mission_end__lt=today)
+            .filter(~Exists(HoursEntry.objects.filter(volunteer_id=OuterRef("volunteer_id"),
+                                                      mission_id=OuterRef("mission_id"))))
+            .count()
+        )
+        return (by_status.get(MissionSignup.Status.INVITED, 0),
+                by_status.get(MissionSignup.Status.PENDING, 0),
+                need_hours)
+
+    return content_cache.cached(
+        f"dashboard:tasks:{volunteer.id}:{today.isoformat()}",
+        [content_cache.volunteer_scope(volunteer.id)],
+        _build,
+    )
+
+
 def _build_volunteer_tasks(volunteer, today):
     from django.shortcuts import resolve_url as _resolve
     tasks = []  # ← corrige la récursion
 
+    inv_count, pending_count, need_hours = _volunteer_task_counts(volunteer, today)
+
     # Invitations à traiter
-    try:
-        inv_count = MissionSignup.objects.filter(volunteer=volunteer, status=MissionSignup.Status.INVITED).count()
-        if inv_count:
-            tasks.append({
-                "key": "invitations",
-                "title": "Répondre aux invitations",
-                "desc": "Vous avez des invitations à confirmer ou refuser.",
-                "count": inv_count,
-                "url": _resolve("benevoles:missions_browse") + "#invitations",
-                "variant": "warning",
-                "action": "Voir",
-            })
-    except Exception:
-        pass
+    if inv_count:
+        tasks.append({
+            "key": "invitations",
+            "title": "Répondre aux invitations",
+            "desc": "Vous avez des invitations à confirmer ou refuser.",
+            "count": inv_count,
+            "url": _resolve("benevoles:missions_browse") + "#invitations",
+            "variant": "warning",
+            "action": "Voir",
+        })
 
     # Demandes en attente
-    try:
-        pending_count = MissionSignup.objects.filter(volunteer=volunteer, status=MissionSignup.Status.PENDING).count()
-        if pending_count:
-            tasks.append({
-                "key": "applications",
-                "title": "Suivre mes demandes",
-                "desc": "Des demandes de mission sont en cours de validation.",
-                "count": pending_count,
-                "url": _resolve("benevoles:missions_browse") + "#applications",
-                "variant": "info",
-                "action": "Ouvrir",
-            })
-    except Exception:
-        pass
+    if pending_count:
+        tasks.append({
+            "key": "applications",
+            "title": "Suivre mes demandes",
+            "desc": "Des demandes de mission sont en cours de validation.",
+            "count": pending_count,
+            "url": _resolve("benevoles:missions_browse") + "#applications",
+            "variant": "info",
+            "action": "Ouvrir",
+        })
 
     # Profil incomplet
     try:
@@ -234,33 +269,16 @@ def _build_volunteer_tasks(volunteer, today):
         pass
 
     # Heures manquantes sur missions passées
-    try:
-        need_hours = 0
-        qs = MissionSignup.objects.select_related("mission").filter(
-            volunteer=volunteer, status=MissionSignup.Status.ACCEPTED
-        )
-        for s in qs:
-            m = s.mission
-            sd, ed = getattr(m, "start_date", None), getattr(m, "end_date", None)
-            if hasattr(sd, "date"): sd = sd.date()
-            if hasattr(ed, "date"): ed = ed.date()
-            # Fin retenue (fallback : start)
-            end_date = ed or sd
-            if end_date and end_date < today:
-                if not HoursEntry.objects.filter(volunteer=volunteer, mission=m).exists():
-                    need_hours += 1
-        if need_hours:
-            tasks.append({
-                "key": "hours",
-                "title": "Déclarer mes heures",
-                "desc": "Des missions passées sans déclaration d'heures.",
-                "count": need_hours,
-                "url": _resolve("benevoles:hours_entry_create"),
-                "variant": "primary",
-                "action": "Déclarer",
-            })
-    except Exception:
-        pass
+    if need_hours:
+        tasks.append({
+            "key": "hours",
+            "title": "Déclarer mes heures",
+            "desc": "Des missions passées sans déclaration d'heures.",
+            "count": need_hours,
+            "url": _resolve("benevoles:hours_entry_create"),
+            "variant": "primary",
+            "action": "Déclarer",
+        })
 
     return tasks
 
@@ -323,20 +341,12 @@ def missions_browse(request):
         MissionSignup.objects
         .filter(volunteer=volunteer, status=MissionSignup.Status.INVITED)
         .select_related("mission", "mission__event")
-        .order_by("mission__event__date", "mission__start_date", "id")
+        .order_by("mission__effective_date", "mission__start_date", "id")
     )
     if date_start:
-        invitations_qs = invitations_qs.filter(
-            Q(mission__event__date__gte=date_start)
-            | Q(mission__start_date__date__gte=date_start)
-            | Q(mission__start_date__gte=date_start)
-        )
+        invitations_qs = invitations_qs.filter(mission__effective_date__gte=date_start)
     if date_end:
-        invitations_qs = invitations_qs.filter(
-            Q(mission__event__date__lte=date_end)
-            | Q(mission__start_date__date__lte=date_end)
-            | Q(mission__start_date__lte=date_end)
-        )
+        invitations_qs = invitations_qs.filter(mission__effective_date__lte=date_end)
 
     invitations = []
     for s in invitations_qs:
@@ -365,20 +375,12 @@ def missions_browse(request):
         MissionSignup.objects
         .filter(volunteer=volunteer, status=MissionSignup.Status.PENDING)
         .select_related("mission", "mission__event")
-        .order_by("mission__event__date", "mission__start_date", "id")
+        .order_by("mission__effective_date", "mission__start_date", "id")
     )
     if date_start:
-        applications_qs = applications_qs.filter(
-            Q(mission__event__date__gte=date_start)
-            | Q(mission__start_date__date__gte=date_start)
-            | Q(mission__start_date__gte=date_start)
-        )
+        applications_qs = applications_qs.filter(mission__effective_date__gte=date_start)
     if date_end:
-        applications_qs = applications_qs.filter(
-            Q(mission__event__date__lte=date_end)
-            | Q(mission__start_date__date__lte=date_end)
-            | Q(mission__start_date__lte=date_end)
-        )
+        applications_qs = applications_qs.filter(mission__effective_date__lte=date_end)
  
     applications = []
     for s in applications_qs:
@@ -420,32 +422,21 @@ def missions_browse(request):
     base_qs = Mission.objects.filter(status="published").select_related("event")
 
     # Si un intervalle est fourni -> filtre sur cet intervalle; sinon -> futur uniquement
+    # (effective_date : index (status, effective_date), pas de jointure Event)
     if date_start or date_end:
         avail_qs = base_qs
         if date_start:
-            avail_qs = avail_qs.filter(
-                Q(event__date__gte=date_start)
-                | Q(start_date__date__gte=date_start)
-                | Q(start_date__gte=date_start)
-            )
+            avail_qs = avail_qs.filter(effective_date__gte=date_start)
         if date_end:
-            avail_qs = avail_qs.filter(
-                Q(event__date__lte=date_end)
-                | Q(start_date__date__lte=date_end)
-                | Q(start_date__lte=date_end)
-            )
+            avail_qs = avail_qs.filter(effective_date__lte=date_end)
     else:
-        avail_qs = base_qs.filter(
-            Q(event__date__gte=today)
-            | Q(start_date__date__gte=today)
-            | Q(start_date__gte=today)
-        )
+        avail_qs = base_qs.filter(effective_date__gte=today)
 
     # Exclure les missions où le bénévole a déjà une inscription active
     avail_qs = (
         avail_qs
         .exclude(signups__volunteer=volunteer, signups__status__in=statuses_block)
-        .order_by("event__date", "start_date", "id")
+        .order_by("effective_date", "start_date", "id")
     )
 
     if q:
@@ -453,30 +444,64 @@ def missions_browse(request):
             Q(title__icontains=q) | Q(description__icontains=q) | Q(location__icontains=q) | Q(event__title__icontains=q)
         )
 
+    # places prises (acceptés) calculées en SQL, pour la page seulement
+    accepted_count = signup_count_annotations(MissionSignup.Status.ACCEPTED)
+    avail_qs = avail_qs.annotate(**accepted_count)
+
     paginator = Paginator(avail_qs, 9)
     page_obj = paginator.get_page(request.GET.get("page"))
 
-    available = []
-    for m in page_obj.object_list:
+    def _mission_row(m):
         ev = m.event
         raw_date = getattr(ev, "date", None) or getattr(m, "start_date", None)
         d = _date_only(raw_date)
         location = (getattr(ev, "location", "") or m.location or "")
-        available.append({
+        return {
             "mission_id": m.id,
             "title": m.title,
             "event": getattr(ev, "title", ""),
             "date": d,
             "location": location,
             "capacity": m.capacity,
+            "accepted": m.accepted_count,
+            "spots_left": max(m.capacity - m.accepted_count, 0) if m.capacity else None,
             "is_past": _is_past(d),
-        })
+        }
+
+    available = [_mission_row(m) for m in page_obj.object_list]
+
+    # -------------------- 4) RECOMMANDÉES POUR VOUS --------------------
+    # Classement (staff/matching.py) mis en cache par bénévole : recalculé seulement quand
+    # le catalogue ou son profil change ; ici une seule requête, quelle que soit la taille du catalogue.
+    upcoming_qs = (
+        base_qs
+        .filter(effective_date__gte=today)
+        .filter(~Exists(MissionSignup.objects.filter(
+            mission_id=OuterRef("pk"), volunteer=volunteer, status__in=statuses_block,
+        )))
+    )
+    ranked = content_cache.cached(
+        f"missions:reco:{volunteer.id}",
+        ["missions", "events", recommendation_scope(volunteer.id)],
+        lambda: recommend(volunteer, upcoming_qs),
+        timeout=RECO_CACHE_TIMEOUT,
+    )
+    scores = dict(ranked)
+    recommended = []
+    if scores:
+        # re-filtré à l'affichage : une inscription faite entre-temps retire la mission
+        picked = upcoming_qs.filter(id__in=list(scores)).annotate(**accepted_count)
+        recommended = sorted(
+            ({**_mission_row(m), "score": scores[m.id]} for m in picked),
+            key=lambda r: (-r["score"], r["mission_id"]),
+        )[:RECO_DISPLAY]
 
     return render(request, "accounts/missions_browse.html", {
         "q": q,
         "invitations": invitations,     # 1) Staff -> bénévole répond
         "applications": applications,   # 2) Bénévole -> en attente staff
         "available": available,         # 3) Catalogue
+        "recommended": recommended,     # 4) Classement personnalisé
         "page_obj": page_obj,
         "start": date_start,
         "end": date_end,
@@ -714,123 +739,52 @@ def historique_benevole(request):
         messages.info(request, "Vous n’êtes pas encore bénévole.")
         return redirect_back(request)
 
-    # ---- Filtres GET
+    # ---- Filtres GET (appliqués en SQL sur le fil d'activité, cf. accounts/activity.py)
     q = (request.GET.get("q") or "").strip()
     type_filter = (request.GET.get("type") or "").strip()
     periode = (request.GET.get("periode") or "").strip()
 
-    since = None
+    qs = volunteer.activities.all()
+    if type_filter in ActivityItem.Kind.values:
+        qs = qs.filter(kind=type_filter)
     if periode.isdigit():
-        since = timezone.now() - timedelta(days=int(periode))
-
-    # ---- Normalisation datetime "aware"
-    def ensure_dt(value):
-        if isinstance(value, datetime):
-            return timezone.localtime(value) if timezone.is_aware(value) else timezone.make_aware(value, timezone.get_current_timezone())
-        if isinstance(value, ddate):
-            dt = datetime.combine(value, dtime(12, 0))
-            return timezone.make_aware(dt, timezone.get_current_timezone())
-        return timezone.now()
-
-    items = []
-
-    # ---- Heures & activités (missions / événements)
-    he_q = (volunteer.hours_entries
-            .select_related("mission", "event")
-            .prefetch_related("proofs"))  # <-- important si tu as hours.proofs
-
-    if since:
-        he_q = he_q.filter(date__gte=since)
-
-    if q:
-        he_q = he_q.filter(
-            Q(note__icontains=q) |
-            Q(mission__title__icontains=q) |
-            Q(event__title__icontains=q) |
-            Q(mission__project__title__icontains=q) |
-            Q(event__project__title__icontains=q)
-        )
-
-    # Construction des items (missions / events / heures simples)
-    for he in he_q.order_by("-date", "-id"):
-        if getattr(he, "mission_id", None):
-            it_type = "mission"
-            title = f"Mission — {he.mission.title}"
-            descr = getattr(he.mission, "description", "") or (he.note or "")
-            lieu = getattr(he.mission, "location", "") or ""
-            projet = getattr(getattr(he.mission, "project", None), "title", "") or ""
-        elif getattr(he, "event_id", None):
-            it_type = "evenement"
-            title = f"Événement — {he.event.title}"
-            descr = getattr(he.event, "description", "") or (he.note or "")
-            lieu = getattr(he.event, "location", "") or ""
-            projet = getattr(getattr(he.event, "project", None), "title", "") or ""
-        else:
-            it_type = "heures"
-            title = "Heures déclarées"
-            descr, lieu, projet = he.note or "", "", ""
-
-        if not type_filter or type_filter == it_type:
-            # Preparer les URLs de justificatifs (si relation "proofs" existe)
-            proof_urls = []
-            if hasattr(he, "proofs"):
-                for p in he.proofs.all():
-                    url = getattr(getattr(p, "file", None), "url", "")
-                    if url:
-                        proof_urls.append(url)
-
-            items.append({
-                "type": it_type,
-                "date": ensure_dt(he.date),
-                "title": title,
-                "description": descr,
-                "projet": projet,
-                "heures": f"{(he.hours or 0):g}h" if isinstance(he.hours, (int, float, Decimal)) else he.hours,
-                "lieu": lieu,
-                "status": getattr(he, "status", ""),
-                "fichier_url": "",          # pour compat desc
-                "proof_urls": proof_urls,   # <-- ajouté
-            })
-
-    # ---- Documents de l’utilisateur
-    docs_q = user.documents.all()  # via related_name="documents" sur UserDocument.user
-    if since:
-        if hasattr(UserDocument, "uploaded_at"):
-            docs_q = docs_q.filter(uploaded_at__gte=since)
-        else:
-            docs_q = docs_q.filter(created_at__gte=since)
+        qs = qs.filter(date__gte=timezone.now() - timedelta(days=int(periode)))
     if q:
-        docs_q = docs_q.filter(Q(name__icontains=q))
-
-    for d in docs_q.order_by("-uploaded_at" if hasattr(UserDocument, "uploaded_at") else "-created_at"):
-        if not type_filter or type_filter == "document":
-            items.append({
-                "type": "document",
-                "date": ensure_dt(getattr(d, "uploaded_at", None) or getattr(d, "created_at", None)),
-                "title": d.name or os.path.basename(getattr(d.file, "name", "")),
-                "description": "",
-                "projet": "",
-                "heures": "",
-                "lieu": "",
-                "status": getattr(d, "status", ""),
-                "fichier_url": getattr(getattr(d, "file", None), "url", ""),
-                "proof_urls": [],  # pas de proofs pour les documents
-            })
-
-    # ---- Tri et stats
-    items.sort(key=lambda x: x["date"], reverse=True)
-
-    total_heures = he_q.aggregate(total=Sum("hours"))["total"] or Decimal("0")
+        qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q) | Q(note__icontains=q) | Q(project__icontains=q))
+
+    # ---- Stats (une agrégation conditionnelle)
+    totals = qs.aggregate(
+        total=Count("id"),
+        missions=Count("id", filter=Q(kind=ActivityItem.Kind.MISSION)),
+        evenements=Count("id", filter=Q(kind=ActivityItem.Kind.EVENT)),
+        heures=Sum("hours"),
+    )
     stats = {
-        "missions": sum(1 for it in items if it["type"] == "mission"),
-        "evenements": sum(1 for it in items if it["type"] == "evenement"),
-        "heures": f"{total_heures:g}h",
+        "missions": totals["missions"],
+        "evenements": totals["evenements"],
+        "heures": f"{(totals['heures'] or Decimal('0')):g}h",
     }
-    total_count = len(items)
 
-    # ---- Pagination
-    paginator = Paginator(items, 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    # ---- Page (curseur sur l'index volunteer, -date, -id)
+    page_obj = paginate_keyset(
+        request,
+        qs.select_related("document").prefetch_related("hours_entry__proofs"),
+        ["-date", "-id"],
+        per_page=20,
+    )
+    page_obj.object_list = [{
+        "type": a.kind,
+        "date": timezone.localtime(a.date),
+        "title": a.title,
+        "description": a.description,
+        "projet": a.project,
+        "heures": f"{a.hours:g}h" if a.hours is not None else "",
+        "lieu": a.location,
+        "status": a.status,
+        "fichier_url": a.document.file.url if a.document_id and a.document.file else "",
+        "proof_urls": [p.file.url for p in a.hours_entry.proofs.all() if p.file] if a.hours_entry_id else [],
+    } for a in page_obj.object_list]
+    total_count = totals["total"]
 
     return render(request, "accounts/historique.html", {
         "page_obj": page_obj,
@@ -857,12 +811,9 @@ def profile_benevole(request):
         messages.info(request, "Vous n’êtes pas encore bénévole.")
         return redirect_back(request)
 
-    # Heures & stats
+    # Heures & stats (ligne VolunteerStats)
     hours_qs = HoursEntry.objects.filter(volunteer=volunteer).select_related("mission", "event")
-    total_hours = hours_qs.aggregate(total=Sum("hours"))["total"] or Decimal("0")
-    missions_count = hours_qs.exclude(mission__isnull=True).values_list("mission", flat=True).distinct().count()
-    events_count = hours_qs.exclude(event__isnull=True).values_list("event", flat=True).distinct().count()
-    stats = {"hours": total_hours, "missions": missions_count, "events": events_count}
+    stats = volunteer.get_stats()
 
     # Données de profil
     availability = list(Availability.objects.filter(volunteer=volunteer).order_by("day", "slot"))
@@ -893,8 +844,8 @@ def profile_benevole(request):
         MissionSignup.objects
         .filter(volunteer=volunteer, status=MissionSignup.Status.ACCEPTED)
         .select_related("mission")
-        .filter(Q(mission__end_date__gte=today) | Q(mission__start_date__gte=today))
-        .order_by("mission__start_date", "mission__end_date")[:5]
+        .filter(Q(mission__effective_date__gte=today) | Q(mission__end_date__date__gte=today))
+        .order_by("mission__effective_date", "mission__start_date", "mission__end_date")[:5]
     )
 
     def _state_for(m):
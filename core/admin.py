@@ -1,8 +1,9 @@
+from django.utils import timezone
 from django.contrib import admin
 from .models import (
     TeamMember, Partenaire, Project, Event,
     Testimonial, News, Donation,
-    ContactMessage, City
+    ContactMessage, City, OutboundEmail
 )
 from staff.models import VolunteerApplication
 
@@ -75,3 +76,19 @@ class EducationStoryAdmin(admin.ModelAdmin):
     list_filter = ("is_published", "city")
     search_fields = ("title", "beneficiary_name")
     inlines = [EducationStoryImageInline]
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "attempts", "next_attempt_at", "created_at", "sent_at")
+    list_filter = ("status", "sensitive")
+    search_fields = ("subject", "to")
+    readonly_fields = ("attempts", "last_error", "created_at", "sent_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Remettre en file d'envoi")
+    def requeue(self, request, queryset):
+        n = queryset.exclude(status=OutboundEmail.Status.SENT).update(
+            status=OutboundEmail.Status.QUEUED, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f"{n} email(s) remis en file.")
@@ -0,0 +1,146 @@
+# core/cache.py
+"""
+Petite API de cache partagée, invalidée par les modèles.
+
+Chaque « espace » de contenu (projects, events, news…) possède un tampon de
+version stocké dans le cache. Un fragment est clé par les versions de ses
+dépendances : il suffit d'incrémenter une version (post_save / post_delete,
+cf. core/signals.py) pour que tous les fragments qui en dépendent soient
+ignorés au prochain accès, sans avoir à les énumérer.
+
+    from core.cache import cached
+    projects = cached("home:projects", ["projects"], lambda: list(Project.objects.all()[:6]))
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+VERSION_PREFIX = "ver:"
+FRAGMENT_PREFIX = "frag:"
+
+_MISSING = object()
+
+
+def _version_key(name: str) -> str:
+    return f"{VERSION_PREFIX}{name}"
+
+
+def _fresh_version() -> int:
+    # Basé sur l'horloge : si le tampon a été évincé du cache, on ne retombe
+    # jamais sur une ancienne version (et donc sur d'anciens fragments).
+    return int(time.time() * 1000)
+
+
+def get_versions(*names) -> dict:
+    """Retourne {nom: version}, en initialisant les versions absentes."""
+    keys = {_version_key(n): n for n in names}
+    found = cache.get_many(list(keys))
+    out = {}
+    for key, name in keys.items():
+        version = found.get(key)
+        if version is None:
+            version = _fresh_version()
+            # add() : si un autre process vient de l'initialiser, on relit la sienne
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        out[name] = version
+    return out
+
+
+def get_version(name: str) -> int:
+    return get_versions(name)[name]
+
+
+def bump(*names) -> None:
+    """Invalide tous les fragments dépendant de ces espaces de contenu."""
+    for name in names:
+        key = _version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), timeout=None)
+
+
+def make_key(name: str, *parts) -> str:
+    """Clé courte et sûre (memcached/redis) pour des paramètres arbitraires (ex: ?q=)."""
+    if not parts:
+        return name
+    raw = "|".join(str(p) for p in parts)
+    return f"{name}:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+
+
+def cached(key: str, deps, builder, timeout=None):
+    """
+    Retourne la valeur du fragment `key`, reconstruite via `builder()` si l'une
+    des versions de `deps` a changé depuis la dernière mise en cache.
+    `builder` doit retourner une valeur picklable (listes, dicts, instances…).
+    """
+    versions = get_versions(*deps)
+    stamp = ".".join(str(versions[d]) for d in deps)
+    full_key = f"{FRAGMENT_PREFIX}{key}:{stamp}"
+
+    value = cache.get(full_key, _MISSING)
+    if value is _MISSING:
+        value = builder()
+        if timeout is None:
+            timeout = getattr(settings, "CACHE_FRAGMENT_TIMEOUT", 3600)
+        cache.set(full_key, value, timeout)
+    return value
+
+
+# ────────────────────────────────
+# Context processors : valeurs paresseuses, mémoïsées par requête
+# ────────────────────────────────
+def user_scope(user_id) -> str:
+    """Espace de version propre à un utilisateur (bump → ses valeurs en cache expirent)."""
+    return f"user:{user_id}"
+
+
+def bump_user(*user_ids) -> None:
+    bump(*(user_scope(uid) for uid in user_ids if uid))
+
+
+def volunteer_scope(volunteer_id) -> str:
+    """Espace de version des valeurs calculées pour un bénévole (tâches du dashboard…)."""
+    return f"volunteer:{volunteer_id}"
+
+
+def bump_volunteer(*volunteer_ids) -> None:
+    bump(*(volunteer_scope(vid) for vid in volunteer_ids if vid))
+
+
+def lazy_context(request, name, builder, *, per_user=False, deps=(), timeout=None):
+    """
+    Retourne un objet paresseux : `builder()` n'est exécuté que si un template
+    lit réellement la valeur, et une seule fois par requête (plusieurs
+    render_to_string dans une même vue partagent le résultat).
+
+    - per_user=True : pour un utilisateur connecté, la valeur est aussi gardée
+      dans le cache partagé (TTL court, CONTEXT_CACHE_TIMEOUT) et invalidée par
+      bump_user(user_id).
+    - deps : espaces de version supplémentaires (ex: "news").
+    """
+    def _resolve():
+        memo = request.__dict__.setdefault("_context_memo", {})
+        if name in memo:
+            return memo[name]
+
+        user = getattr(request, "user", None)
+        if per_user and user is not None and user.is_authenticated:
+            value = cached(
+                f"ctx:{name}:{user.pk}",
+                [user_scope(user.pk), *deps],
+                builder,
+                timeout or getattr(settings, "CONTEXT_CACHE_TIMEOUT", 30),
+            )
+        elif deps:
+            value = cached(f"ctx:{name}", list(deps), builder, timeout)
+        else:
+            value = builder()
+        memo[name] = value
+        return value
+
+    return SimpleLazyObject(_resolve)
@@ -2,16 +2,21 @@
 from django.urls import reverse
 from staff.models import VolunteerApplication, ApplicationStatus
 from core.models import News
+from core.cache import lazy_context
+
 
 def volunteer_cta(request):
+    # Paresseux + mis en cache par utilisateur (invalidé quand sa candidature/son profil change)
+    return {"volunteer_cta": lazy_context(request, "volunteer_cta", lambda: _volunteer_cta(request), per_user=True)}
+
+
+def _volunteer_cta(request):
     if not request.user.is_authenticated:
         return {
-            "volunteer_cta": {
-                "label": "Devenir bénévole",
-                "href": reverse("account_signup"),
-                "variant": "primary",
-                "badge": None,
-            }
+            "label": "Devenir bénévole",
+            "href": reverse("account_signup"),
+            "variant": "primary",
+            "badge": None,
         }
 
     user = request.user
@@ -20,26 +25,24 @@ def volunteer_cta(request):
         v = user.volunteer
         if hasattr(v, "status"):
             if v.status == "approved":
-                return {"volunteer_cta": {"label": "Espace bénévole", "href": reverse("benevoles:dashboard"), "variant": "muted", "badge": None}}
+                return {"label": "Espace bénévole", "href": reverse("benevoles:dashboard"), "variant": "muted", "badge": None}
         else:
-            return {"volunteer_cta": {"label": "Espace bénévole", "href": reverse("benevoles:dashboard"), "variant": "muted", "badge": None}}
+            return {"label": "Espace bénévole", "href": reverse("benevoles:dashboard"), "variant": "muted", "badge": None}
     except Exception:
         pass
 
     last_app = VolunteerApplication.objects.filter(user=user).order_by("-submitted_at").first()
     if last_app and last_app.status in [ApplicationStatus.PENDING, ApplicationStatus.NEEDS_CHANGES]:
         return {
-            "volunteer_cta": {
-                "label": "Compléter ma candidature" if last_app.status == ApplicationStatus.NEEDS_CHANGES else "Voir ma candidature",
-                "href": reverse("benevoles:application_detail", kwargs={"pk": last_app.pk}),
-                "variant": "primary",
-                "badge": "À corriger" if last_app.status == ApplicationStatus.NEEDS_CHANGES else "En attente",
-            }
+            "label": "Compléter ma candidature" if last_app.status == ApplicationStatus.NEEDS_CHANGES else "Voir ma candidature",
+            "href": reverse("benevoles:application_detail", kwargs={"pk": last_app.pk}),
+            "variant": "primary",
+            "badge": "À corriger" if last_app.status == ApplicationStatus.NEEDS_CHANGES else "En attente",
         }
     if last_app and last_app.status == ApplicationStatus.APPROVED:
-        return {"volunteer_cta": {"label": "Espace bénévole", "href": reverse("benevoles:dashboard"), "variant": "muted", "badge": None}}
+        return {"label": "Espace bénévole", "href": reverse("benevoles:dashboard"), "variant": "muted", "badge": None}
 
-    return {"volunteer_cta": {"label": "Devenir bénévole", "href": reverse("staff:application_start"), "variant": "primary", "badge": None}}
+    return {"label": "Devenir bénévole", "href": reverse("staff:application_start"), "variant": "primary", "badge": None}
 
 
 from django.conf import settings
@@ -57,11 +60,13 @@ def latest_news(request):
     Kept lightweight (max 6 items) and used by the public base template
     to render the small carousel of actualités.
     """
-    try:
-        items = list(News.objects.all()[:6])
-    except Exception:
-        items = []
-    return {"latest_news": items}
+    def _items():
+        try:
+            return list(News.objects.all()[:6])
+        except Exception:
+            return []
+    # Partagé entre tous les visiteurs, invalidé à chaque modification d'actualité
+    return {"latest_news": lazy_context(request, "latest_news", _items, deps=("news",))}
 
 
 def staff_counters(request):
@@ -70,14 +75,18 @@ def staff_counters(request):
     Currently exposes pending volunteer applications count.
     Only computed for authenticated staff users.
     """
-    try:
-        user = getattr(request, "user", None)
-        if not (user and user.is_authenticated and user.is_staff):
-            return {}
-        pending_apps = VolunteerApplication.objects.filter(status=ApplicationStatus.PENDING).count()
-        return {"staff_pending_applications": pending_apps}
-    except Exception:
-        return {}
+    user = getattr(request, "user", None)
+    if not (user and user.is_authenticated and user.is_staff):
+        # hors staff : rien à calculer, et surtout rien à écrire sous la clé partagée
+        return {"staff_pending_applications": None}
+
+    def _pending():
+        try:
+            return VolunteerApplication.objects.filter(status=ApplicationStatus.PENDING).count()
+        except Exception:
+            return None
+    # Compteur global : invalidé à chaque changement de candidature (cf. core/signals.py et staff/admin.py)
+    return {"staff_pending_applications": lazy_context(request, "staff_pending_applications", _pending, deps=("applications",))}
 
 from urllib.parse import urlsplit, urlunsplit
 
@@ -0,0 +1,165 @@
+# core/mail.py
+"""
+Boîte d'envoi durable (OutboundEmail).
+
+    from core.mail import enqueue_mail
+    enqueue_mail(subject, body_txt, from_email, [to], html_message=body_html)
+
+Les vues n'attendent plus le SMTP : la ligne est enregistrée dans la même
+transaction que l'action métier, puis `manage.py send_queued_mail` la distribue
+(lots, connexion SMTP réutilisée, relances avec backoff exponentiel, abandon
+après `max_attempts`). Avec EMAIL_OUTBOX_EAGER=1 (défaut en dev), l'envoi est
+tenté juste après le commit, dans le process web.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Bail d'une ligne en cours d'envoi : passé ce délai (worker tué), elle est reprise
+SENDING_LEASE = timedelta(minutes=10)
+
+
+def enqueue_mail(subject, message, from_email, recipient_list, html_message=None,
+                 reply_to=None, sensitive=False, max_attempts=None):
+    """Même signature que send_mail ; retourne l'OutboundEmail créé (ou None sans destinataire)."""
+    to = [addr for addr in (recipient_list or []) if addr]
+    if not to:
+        return None
+    email = OutboundEmail.objects.create(
+        subject=(subject or "")[:255],
+        body_text=message or "",
+        body_html=html_message or "",
+        from_email=from_email or getattr(settings, "DEFAULT_FROM_EMAIL", "") or "",
+        to=to,
+        reply_to=list(reply_to or []),
+        sensitive=sensitive,
+        max_attempts=max_attempts or getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5),
+    )
+    if getattr(settings, "EMAIL_OUTBOX_EAGER", False):
+        transaction.on_commit(lambda: _send_now(email.pk))
+    return email
+
+
+def _send_now(pk):
+    # réservation conditionnelle : un worker qui l'aurait déjà prise garde la main
+    claimed = OutboundEmail.objects.filter(pk=pk, status=OutboundEmail.Status.QUEUED).update(
+        status=OutboundEmail.Status.SENDING, next_attempt_at=timezone.now() + SENDING_LEASE,
+    )
+    if claimed:
+        deliver([pk])
+
+
+def _backoff(attempts):
+    base = getattr(settings, "EMAIL_OUTBOX_RETRY_BASE", 60)
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), 6 * 3600))
+
+
+def claim_batch(size):
+    """Réserve jusqu'à `size` emails dus (statut -> sending) et retourne leurs ids."""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = (OutboundEmail.objects
+              .filter(status__in=[OutboundEmail.Status.QUEUED, OutboundEmail.Status.SENDING],
+                      next_attempt_at__lte=now)
+              .order_by("next_attempt_at", "id"))
+        if db_connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        ids = list(qs.values_list("pk", flat=True)[:size])
+        if ids:
+            OutboundEmail.objects.filter(pk__in=ids).update(
+                status=OutboundEmail.Status.SENDING, next_attempt_at=now + SENDING_LEASE,
+            )
+    return ids
+
+
+def _wipe_if_sensitive(email, fields):
+    if email.sensitive:
+        email.body_text = ""
+        email.body_html = ""
+        fields += ["body_text", "body_html"]
+
+
+def _open(connection):
+    # Connexion ouverte explicitement : le backend SMTP ne la referme alors pas après chaque message
+    try:
+        connection.open()
+    except Exception:
+        pass  # l'erreur remontera à l'envoi et sera comptée comme une tentative
+
+
+def deliver(ids, connection=None):
+    """Envoie les emails `ids` sur une seule connexion SMTP. Retourne (envoyés, échecs)."""
+    own_connection = connection is None
+    if own_connection:
+        connection = get_connection()
+    sent = failed = 0
+    _open(connection)
+    try:
+        for email in OutboundEmail.objects.filter(pk__in=ids).order_by("id"):
+            if email.status in (OutboundEmail.Status.SENT, OutboundEmail.Status.DEAD):
+                continue
+            msg = EmailMultiAlternatives(
+                subject=email.subject, body=email.body_text, from_email=email.from_email or None,
+                to=email.to, reply_to=email.reply_to or None, connection=connection,
+            )
+            if email.body_html:
+                msg.attach_alternative(email.body_html, "text/html")
+            email.attempts += 1
+            try:
+                msg.send()
+            except Exception as exc:
+                failed += 1
+                email.last_error = f"{type(exc).__name__}: {exc}"[:2000]
+                fields = ["attempts", "last_error", "status", "next_attempt_at"]
+                if email.attempts >= email.max_attempts:
+                    email.status = OutboundEmail.Status.DEAD
+                    _wipe_if_sensitive(email, fields)
+                    logger.error("Email #%s abandonné après %s tentatives: %s", email.pk, email.attempts, email.last_error)
+                else:
+                    email.status = OutboundEmail.Status.QUEUED
+                    email.next_attempt_at = timezone.now() + _backoff(email.attempts)
+                email.save(update_fields=fields)
+                # connexion probablement cassée : on repart sur une connexion neuve
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                _open(connection)
+                continue
+            sent += 1
+            email.status = OutboundEmail.Status.SENT
+            email.sent_at = timezone.now()
+            email.last_error = ""
+            fields = ["attempts", "status", "sent_at", "last_error"]
+            _wipe_if_sensitive(email, fields)
+            email.save(update_fields=fields)
+    finally:
+        if own_connection:
+            try:
+                connection.close()
+            except Exception:
+                pass
+    return sent, failed
+
+
+def drain(batch_size=None, connection=None, max_batches=None):
+    """Vide la file par lots (même connexion SMTP). Retourne (envoyés, échecs)."""
+    batch_size = batch_size or getattr(settings, "EMAIL_OUTBOX_BATCH_SIZE", 50)
+    total_sent = total_failed = batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = claim_batch(batch_size)
+        if not ids:
+            break
+        sent, failed = deliver(ids, connection=connection)
+        total_sent += sent
+        total_failed += failed
+        batches += 1
+    return total_sent, total_failed
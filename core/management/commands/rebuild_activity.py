@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from accounts import activity
+
+
+class Command(BaseCommand):
+    help = "Régénère le fil d'activité des bénévoles (ActivityItem) depuis les heures déclarées et les documents."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--volunteer", type=int, action="append", dest="volunteers",
+                            help="Seulement ce bénévole (id, répétable)")
+
+    def handle(self, *args, **options):
+        n_hours, n_docs = activity.rebuild(options["volunteers"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fil d'activité régénéré : {n_hours} déclaration(s) d'heures, {n_docs} document(s)."
+        ))
@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstruit les agrégats journaliers (heures, inscriptions, paiements) : reprise complète ou sur une période."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Date de début (AAAA-MM-JJ), incluse")
+        parser.add_argument("--until", help="Date de fin (AAAA-MM-JJ), incluse")
+        parser.add_argument("--days", type=int, help="Seulement les N derniers jours (ex: 2 pour un cron nocturne)")
+
+    def handle(self, *args, **options):
+        start = end = None
+        if options["days"]:
+            start = timezone.localdate() - timedelta(days=options["days"] - 1)
+        if options["since"]:
+            start = parse_date(options["since"])
+            if start is None:
+                raise CommandError("--since invalide (format AAAA-MM-JJ)")
+        if options["until"]:
+            end = parse_date(options["until"])
+            if end is None:
+                raise CommandError("--until invalide (format AAAA-MM-JJ)")
+
+        counts = rollups.rebuild(start=start, end=end)
+        self.stdout.write(self.style.SUCCESS(
+            f"Agrégats reconstruits : {counts['hours']} jour(s) d'heures, "
+            f"{counts['signups']} ligne(s) d'inscriptions, {counts['payments']} ligne(s) de paiements."
+        ))
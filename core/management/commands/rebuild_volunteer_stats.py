@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from accounts import stats
+
+
+class Command(BaseCommand):
+    help = "Recalcule les statistiques par bénévole (VolunteerStats) depuis les heures et inscriptions."
+
+    def handle(self, *args, **options):
+        n = stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Statistiques recalculées pour {n} bénévole(s)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.models import SiteStats
+
+
+class Command(BaseCommand):
+    help = "Recompte les totaux de SiteStats et corrige la dérive des compteurs incrémentaux (à planifier, ex: chaque nuit)."
+
+    def handle(self, *args, **options):
+        drift = SiteStats.reconcile()
+        if not drift:
+            self.stdout.write(self.style.SUCCESS("SiteStats à jour, aucune dérive."))
+            return
+        for field, (before, after) in sorted(drift.items()):
+            self.stdout.write(f"{field}: {before} → {after}")
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} compteur(s) corrigé(s)."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core.mail import drain
+
+
+class Command(BaseCommand):
+    help = "Envoie les emails en file d'attente (OutboundEmail) par lots, sur une connexion SMTP réutilisée."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Emails par lot (défaut: EMAIL_OUTBOX_BATCH_SIZE)")
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu (worker)")
+        parser.add_argument("--sleep", type=float, default=5.0, help="Pause entre deux passes à vide en mode --loop (s)")
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = drain(batch_size=options["batch_size"], connection=connection)
+                if sent or failed:
+                    self.stdout.write(self.style.SUCCESS(f"{sent} email(s) envoyé(s), {failed} échec(s)."))
+                if not options["loop"]:
+                    break
+                if not (sent or failed):
+                    # file vide : on libère la connexion SMTP (rouverte au prochain envoi)
+                    connection.close()
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    HoursEntry = apps.get_model("accounts", "HoursEntry")
+    MissionSignup = apps.get_model("staff", "MissionSignup")
+    Payment = apps.get_model("payments", "Payment")
+    DailyHours = apps.get_model("core", "DailyHours")
+    DailyVolunteerHours = apps.get_model("core", "DailyVolunteerHours")
+    DailySignups = apps.get_model("core", "DailySignups")
+    DailyPayments = apps.get_model("core", "DailyPayments")
+
+    per_volunteer = list(HoursEntry.objects.order_by().values("date", "volunteer_id")
+                         .annotate(hours=Sum("hours"), entries=Count("id")))
+    DailyVolunteerHours.objects.bulk_create([DailyVolunteerHours(**r) for r in per_volunteer], batch_size=1000)
+    DailyHours.objects.bulk_create([
+        DailyHours(**r) for r in HoursEntry.objects.order_by().values("date").annotate(hours=Sum("hours"), entries=Count("id"))
+    ], batch_size=1000)
+    DailySignups.objects.bulk_create([
+        DailySignups(date=r["day"], status=r["status"], count=r["n"])
+        for r in MissionSignup.objects.order_by().annotate(day=TruncDate("created_at"))
+                 .values("day", "status").annotate(n=Count("id"))
+    ], batch_size=1000)
+    DailyPayments.objects.bulk_create([
+        DailyPayments(date=r["day"], currency=r["currency"], status=r["status"], count=r["n"], amount=r["total"] or 0)
+        for r in Payment.objects.order_by().annotate(day=TruncDate("created_at"))
+                 .values("day", "currency", "status").annotate(n=Count("id"), total=Sum("amount"))
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_initial'),
+        ('core', '0003_outbound_email'),
+        ('payments', '0001_initial'),
+        ('staff', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('entries', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Heures par jour',
+                'verbose_name_plural': 'Heures par jour',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyPayments',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('currency', models.CharField(max_length=8)),
+                ('status', models.CharField(max_length=16)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('amount', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Paiements par jour',
+                'verbose_name_plural': 'Paiements par jour',
+                'ordering': ['-date', 'currency', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'currency', 'status'), name='uniq_daily_payments_bucket')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailySignups',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Inscriptions par jour',
+                'verbose_name_plural': 'Inscriptions par jour',
+                'ordering': ['-date', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'status'), name='uniq_daily_signups_date_status')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyVolunteerHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('volunteer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_hours', to='accounts.volunteer')),
+            ],
+            options={
+                'verbose_name': 'Heures par jour et bénévole',
+                'verbose_name_plural': 'Heures par jour et bénévole',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date'], name='core_dailyv_date_d32ead_idx')],
+                'constraints': [models.UniqueConstraint(fields=('volunteer', 'date'), name='uniq_daily_hours_volunteer_date')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -11,6 +11,7 @@ from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
 from django.utils import timezone
+from core.tracking import TrackedFieldsMixin
 import secrets
 
 
@@ -237,7 +238,7 @@ class Partenaire(models.Model):
 # =======================
 # Projets / Evénements (public)
 # =======================
-class Project(models.Model):
+class Project(TrackedFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=220, unique=True, blank=True)
     description = models.TextField()
@@ -262,7 +263,7 @@ class Project(models.Model):
             return reverse("core:project_detail", kwargs={"slug": self.slug})
 
 
-class Event(models.Model):
+class Event(TrackedFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=220, unique=True, blank=True)
     date = models.DateField()
@@ -393,6 +394,46 @@ class City(models.Model):
     def __str__(self):
         return f"{self.name}" + (f" · {self.province}" if self.province else "")
 
+class OutboundEmail(models.Model):
+    """
+    File d'attente durable des emails sortants (cf. core/mail.py).
+    Les vues ne font qu'enregistrer une ligne ; `manage.py send_queued_mail`
+    envoie par lots sur une connexion SMTP unique, avec relances espacées.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "queued", "En attente"
+        SENDING = "sending", "En cours d'envoi"
+        SENT = "sent", "Envoyé"
+        DEAD = "dead", "Abandonné"
+
+    subject = models.CharField(max_length=255)
+    body_text = models.TextField(blank=True)
+    body_html = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    to = models.JSONField(default=list)
+    reply_to = models.JSONField(default=list, blank=True)
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # contenu sensible (ex: clés d'autorisation) : effacé dès l'envoi ou l'abandon
+    sensitive = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+        verbose_name = "Email sortant"
+        verbose_name_plural = "Emails sortants"
+
+    def __str__(self):
+        return f"{self.subject} → {', '.join(self.to)} [{self.get_status_display()}]"
+
+
 class SiteStats(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     total_users = models.PositiveIntegerField(default=0)
@@ -410,6 +451,129 @@ class SiteStats(models.Model):
         obj, _ = cls.objects.get_or_create(pk=1)
         return obj
 
+    @staticmethod
+    def _sources():
+        """champ -> queryset compté (imports locaux : évite les imports circulaires)."""
+        from django.contrib.auth import get_user_model
+        from accounts.models import Volunteer, HoursEntry
+        from staff.models import Mission, MissionSignup
+        return {
+            "total_users": get_user_model().objects.all(),
+            "total_volunteers": Volunteer.objects.all(),
+            "total_staff": TeamMember.objects.all(),
+            "total_missions": Mission.objects.all(),
+            "total_signups": MissionSignup.objects.all(),
+            "total_hours_entries": HoursEntry.objects.all(),
+        }
+
+    @classmethod
+    def apply_delta(cls, **deltas):
+        """
+        Incrémente/décrémente les compteurs de façon atomique (UPDATE … SET x = x + n),
+        ex: SiteStats.apply_delta(total_signups=+50). Jamais en dessous de 0.
+        """
+        from django.db.models import F, Value
+        from django.db.models.functions import Greatest
+        updates = {}
+        for field, delta in deltas.items():
+            if not delta:
+                continue
+            expr = F(field) + delta
+            updates[field] = expr if delta > 0 else Greatest(expr, Value(0))
+        if not updates:
+            return
+        updated = cls.objects.filter(pk=1).update(updated_at=timezone.now(), **updates)
+        if not updated:
+            # Première utilisation : on part d'un comptage complet (inclut déjà le delta)
+            cls.reconcile()
+
+    @classmethod
+    def reconcile(cls):
+        """Recompte tout et corrige la dérive. Retourne {champ: (avant, après)} des écarts."""
+        stats = cls.get()
+        drift = {}
+        for field, qs in cls._sources().items():
+            real = qs.count()
+            before = getattr(stats, field)
+            if before != real:
+                drift[field] = (before, real)
+                setattr(stats, field, real)
+        stats.save()
+        return drift
+
+
+# ────────────────────────────────
+# Agrégats journaliers (cf. core/rollups.py) : maintenus par signaux,
+# reconstruits par `manage.py rebuild_rollups`
+# ────────────────────────────────
+class DailyHours(models.Model):
+    date = models.DateField(unique=True)
+    hours = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name = "Heures par jour"
+        verbose_name_plural = "Heures par jour"
+
+    def __str__(self):
+        return f"{self.date} : {self.hours} h"
+
+
+class DailyVolunteerHours(models.Model):
+    date = models.DateField()
+    volunteer = models.ForeignKey("accounts.Volunteer", on_delete=models.CASCADE, related_name="daily_hours")
+    hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["volunteer", "date"], name="uniq_daily_hours_volunteer_date"),
+        ]
+        indexes = [models.Index(fields=["date"])]
+        verbose_name = "Heures par jour et bénévole"
+        verbose_name_plural = "Heures par jour et bénévole"
+
+    def __str__(self):
+        return f"{self.date} · {self.volunteer_id} : {self.hours} h"
+
+
+class DailySignups(models.Model):
+    date = models.DateField()
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["-date", "status"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "status"], name="uniq_daily_signups_date_status"),
+        ]
+        verbose_name = "Inscriptions par jour"
+        verbose_name_plural = "Inscriptions par jour"
+
+    def __str__(self):
+        return f"{self.date} · {self.status} : {self.count}"
+
+
+class DailyPayments(models.Model):
+    date = models.DateField()
+    currency = models.CharField(max_length=8)
+    status = models.CharField(max_length=16)
+    count = models.PositiveIntegerField(default=0)
+    amount = models.BigIntegerField(default=0)  # unité minimale de la devise, comme Payment.amount
+
+    class Meta:
+        ordering = ["-date", "currency", "status"]
+        constraints = [
+            models.UniqueConstraint(fields=["date", "currency", "status"], name="uniq_daily_payments_bucket"),
+        ]
+        verbose_name = "Paiements par jour"
+        verbose_name_plural = "Paiements par jour"
+
+    def __str__(self):
+        return f"{self.date} · {self.currency} {self.status} : {self.count}"
+
 # core/models.py
 from django.db import models
 from core.models import City  # si tu as déjà City; sinon adapte l'import
@@ -0,0 +1,231 @@
+# core/pagination.py
+"""
+Pagination par curseur (keyset) pour les grosses tables.
+
+Au lieu de `OFFSET n` + `COUNT(*)`, la page suivante est définie par la
+position du dernier élément affiché sur les colonnes de tri :
+
+    WHERE (date, id) < (:date, :id) ORDER BY date DESC, id DESC LIMIT 21
+
+Le coût ne dépend donc plus du numéro de page. Les curseurs sont opaques
+(base64) et passent dans `?cursor=`.
+
+    from core.pagination import paginate_keyset
+    page_obj = paginate_keyset(request, HoursEntry.objects.all(), ["-date", "-id"], per_page=20)
+
+Les colonnes de tri doivent être non nulles ; `id` est ajouté en dernier
+critère s'il manque (tri total). Le total est optionnel : `count="approx"`
+(estimation Postgres `reltuples` sur table non filtrée, sinon comptage plafonné)
+ou `count="exact"`.
+
+Côté template : `{% include "partials/keyset_pagination.html" %}`
+(tag `{% cursor_url %}` dans core/templatetags/pagination_tags.py).
+"""
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+CURSOR_PARAM = "cursor"
+COUNT_CAP = 1000
+
+NEXT, PREVIOUS = "n", "p"
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder tronque les datetimes à la milliseconde : le curseur doit rester exact
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, direction=NEXT):
+    raw = json.dumps([direction, list(values)], cls=_CursorEncoder, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(direction, valeurs) ou None si le curseur est absent/invalide (-> première page)."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+        return None
+    return direction, values
+
+
+def coerce_position(model, names, values):
+    """
+    Valeurs d'un curseur converties par le `to_python()` des champs de tri, ou
+    None si elles sont invalides (curseur modifié à la main -> première page).
+    """
+    out = []
+    try:
+        for name, value in zip(names, values):
+            value = _field(model, name).to_python(value)
+            if isinstance(value, datetime.datetime) and settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            out.append(value)
+    except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+        return None
+    if any(v is None for v in out):
+        return None  # colonnes de tri non nulles
+    return out
+
+
+def _field(model, name):
+    parts = name.split("__")
+    for part in parts[:-1]:
+        model = model._meta.get_field(part).related_model
+    field = model._meta.get_field("id" if parts[-1] == "pk" else parts[-1])
+    return field.target_field if field.is_relation else field
+
+
+def approximate_count(queryset, cap=COUNT_CAP):
+    """
+    (total, exact?) sans parcourir toute la table :
+    - Postgres, QuerySet non filtré : estimation du planificateur (pg_class.reltuples) ;
+    - sinon : COUNT plafonné à `cap` (« 1000+ »).
+    """
+    db = queryset.db
+    if connections[db].vendor == "postgresql" and not queryset.query.where:
+        with connections[db].cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= cap:
+            return int(row[0]), False
+    n = queryset.order_by()[: cap + 1].count()
+    return (cap, False) if n > cap else (n, True)
+
+
+def _value(obj, name):
+    if isinstance(obj, dict):
+        return obj[name]
+    for part in name.split("__"):
+        obj = getattr(obj, part)
+    return obj
+
+
+class KeysetPage:
+    """Compatible avec l'usage courant de `page_obj` (object_list, has_next, paginator…)."""
+
+    def __init__(self, object_list, *, has_next, has_previous, next_cursor="", previous_cursor="", paginator=None):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.paginator = paginator
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page, ordering=None, count=None, count_cap=COUNT_CAP):
+        ordering = list(ordering or queryset.query.order_by or ["-id"])
+        if not any(f.lstrip("-") in ("id", "pk") for f in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        self.ordering = [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+        self.queryset = queryset.order_by(*ordering)
+        self.per_page = per_page
+        self.count_mode = count  # None | "approx" | "exact"
+        self.count_cap = count_cap
+
+    @cached_property
+    def _count(self):
+        if self.count_mode == "exact":
+            return self.queryset.count(), True
+        if self.count_mode == "approx":
+            return approximate_count(self.queryset, self.count_cap)
+        return None, False
+
+    @property
+    def count(self):
+        return self._count[0]
+
+    @property
+    def count_is_exact(self):
+        return self._count[1]
+
+    def _seek(self, values, backwards):
+        # (a, b, id) > (x, y, z) développé en OR de AND : portable (pas de comparaison de tuples SQL)
+        cond = Q()
+        for i, (name, desc) in enumerate(self.ordering):
+            op = "lt" if desc != backwards else "gt"
+            term = Q(**{f"{name}__{op}": values[i]})
+            for prev_name, _ in self.ordering[:i]:
+                term &= Q(**{prev_name: values[self._index(prev_name)]})
+            cond |= term
+        return cond
+
+    def _index(self, name):
+        return next(i for i, (n, _) in enumerate(self.ordering) if n == name)
+
+    def _position(self, obj):
+        return [_value(obj, name) for name, _ in self.ordering]
+
+    def page(self, cursor=None):
+        position = decode_cursor(cursor)
+        if position and len(position[1]) == len(self.ordering):
+            values = coerce_position(self.queryset.model, [name for name, _ in self.ordering], position[1])
+            position = (position[0], values) if values is not None else None
+        else:
+            position = None
+        qs = self.queryset
+        backwards = bool(position) and position[0] == PREVIOUS
+        if position:
+            qs = qs.filter(self._seek(position[1], backwards))
+        if backwards:
+            qs = qs.reverse()
+
+        rows = list(qs[: self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, more
+        else:
+            has_next, has_previous = more, position is not None
+
+        return KeysetPage(
+            rows,
+            has_next=has_next and bool(rows),
+            has_previous=has_previous,
+            next_cursor=encode_cursor(self._position(rows[-1]), NEXT) if has_next and rows else "",
+            previous_cursor=encode_cursor(self._position(rows[0]), PREVIOUS) if has_previous and rows else "",
+            paginator=self,
+        )
+
+
+def paginate_keyset(request, queryset, ordering=None, per_page=20, count=None):
+    paginator = KeysetPaginator(queryset, per_page, ordering=ordering, count=count)
+    return paginator.page(request.GET.get(CURSOR_PARAM))
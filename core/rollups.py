@@ -0,0 +1,158 @@
+# core/rollups.py
+"""
+Agrégats journaliers matérialisés (heures, inscriptions, paiements).
+
+Les dashboards lisent ces petites tables au lieu de regrouper HoursEntry /
+MissionSignup / Payment à chaque affichage. Chaque jour est recalculé en
+entier (idempotent, écrit par upsert) :
+
+- à chaque save/delete, pour le(s) jour(s) touché(s) (cf. core/signals.py) ;
+- en masse par `manage.py rebuild_rollups` (reprise, ou après un import).
+
+    from core import rollups
+    rollups.refresh_hours({date(2025, 3, 1)})
+    rollups.rebuild(start=date(2025, 1, 1))
+"""
+from datetime import datetime, time as dtime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyHours, DailyVolunteerHours, DailySignups, DailyPayments
+
+
+def local_date(dt):
+    """Jour (fuseau du site) d'un datetime, comme TruncDate côté SQL."""
+    return timezone.localdate(dt) if timezone.is_aware(dt) else dt.date()
+
+
+def _midnight(day):
+    """Minuit local du jour `day` (datetime aware si USE_TZ)."""
+    dt = datetime.combine(day, dtime.min)
+    return timezone.make_aware(dt) if settings.USE_TZ else dt
+
+
+def _created_in(start, end, days):
+    """
+    Filtre sur created_at par bornes [minuit local, minuit local du lendemain) :
+    pas de fonction appliquée à la colonne, l'index sur created_at sert.
+    """
+    if days is not None:
+        q = Q(pk__in=[])
+        for d in days:
+            q |= Q(created_at__gte=_midnight(d), created_at__lt=_midnight(d + timedelta(days=1)))
+        return q
+    q = Q()
+    if start:
+        q &= Q(created_at__gte=_midnight(start))
+    if end:
+        q &= Q(created_at__lt=_midnight(end + timedelta(days=1)))
+    return q
+
+
+def _range(qs, field, start, end):
+    if start:
+        qs = qs.filter(**{f"{field}__gte": start})
+    if end:
+        qs = qs.filter(**{f"{field}__lte": end})
+    return qs
+
+
+def _days(qs, start, end, days):
+    return qs.filter(date__in=days) if days is not None else _range(qs, "date", start, end)
+
+
+def _replace(model, scope, objs, unique_fields, update_fields):
+    """
+    Remplace les lignes de `scope` par `objs` sans DELETE + INSERT : upsert sur
+    la contrainte unique (deux recalculs concurrents du même jour ne se
+    heurtent pas), puis suppression des seaux retombés à zéro.
+    """
+    attnames = [model._meta.get_field(f).attname for f in unique_fields]
+    keep = {tuple(getattr(o, a) for a in attnames) for o in objs}
+    with transaction.atomic():
+        model.objects.bulk_create(objs, batch_size=1000, update_conflicts=True,
+                                  unique_fields=unique_fields, update_fields=update_fields)
+        stale = [pk for pk, *key in scope.values_list("pk", *attnames) if tuple(key) not in keep]
+        if stale:
+            model.objects.filter(pk__in=stale).delete()
+
+
+def rebuild_hours(start=None, end=None, days=None):
+    from accounts.models import HoursEntry
+    src = _days(HoursEntry.objects.order_by(), start, end, days)
+    per_volunteer = list(src.values("date", "volunteer_id").annotate(hours=Sum("hours"), entries=Count("id")))
+
+    totals = {}
+    for row in per_volunteer:
+        t = totals.setdefault(row["date"], {"hours": 0, "entries": 0})
+        t["hours"] += row["hours"] or 0
+        t["entries"] += row["entries"]
+
+    with transaction.atomic():
+        _replace(DailyVolunteerHours, _days(DailyVolunteerHours.objects, start, end, days),
+                 [DailyVolunteerHours(**row) for row in per_volunteer],
+                 ["volunteer", "date"], ["hours", "entries"])
+        _replace(DailyHours, _days(DailyHours.objects, start, end, days),
+                 [DailyHours(date=d, **t) for d, t in totals.items()],
+                 ["date"], ["hours", "entries"])
+    return len(totals)
+
+
+def rebuild_signups(start=None, end=None, days=None):
+    from staff.models import MissionSignup
+    rows = (MissionSignup.objects.order_by()
+            .filter(_created_in(start, end, days))
+            .annotate(day=TruncDate("created_at"))
+            .values("day", "status").annotate(n=Count("id")))
+    _replace(DailySignups, _days(DailySignups.objects, start, end, days),
+             [DailySignups(date=r["day"], status=r["status"], count=r["n"]) for r in rows],
+             ["date", "status"], ["count"])
+    return len(rows)
+
+
+def rebuild_payments(start=None, end=None, days=None):
+    try:
+        from payments.models import Payment
+    except Exception:
+        return 0
+    rows = (Payment.objects.order_by()
+            .filter(_created_in(start, end, days))
+            .annotate(day=TruncDate("created_at"))
+            .values("day", "currency", "status").annotate(n=Count("id"), total=Sum("amount")))
+    _replace(DailyPayments, _days(DailyPayments.objects, start, end, days), [
+        DailyPayments(date=r["day"], currency=r["currency"], status=r["status"], count=r["n"], amount=r["total"] or 0)
+        for r in rows
+    ], ["date", "currency", "status"], ["count", "amount"])
+    return len(rows)
+
+
+def rebuild(start=None, end=None):
+    """Reconstruit tous les agrégats sur [start, end] (bornes incluses, None = tout)."""
+    return {
+        "hours": rebuild_hours(start, end),
+        "signups": rebuild_signups(start, end),
+        "payments": rebuild_payments(start, end),
+    }
+
+
+# Recalcul des jours touchés (appelés après commit par core/signals.py)
+def refresh_hours(days):
+    days = {d for d in days if d}
+    if days:
+        rebuild_hours(days=days)
+
+
+def refresh_signups(days):
+    days = {d for d in days if d}
+    if days:
+        rebuild_signups(days=days)
+
+
+def refresh_payments(days):
+    days = {d for d in days if d}
+    if days:
+        rebuild_payments(days=days)
@@ -1,11 +1,23 @@
-from django.db.models.signals import post_save, post_delete
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
 from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from core import cache as content_cache, rollups
 from core.models import SiteStats
-from accounts.models import Volunteer
-from staff.models import Mission, MissionSignup
+from core.models import Project, Event, News, Partenaire, Testimonial
+from core.tracking import track_fields
+from accounts import activity, stats as volunteer_stats
+from accounts.availability import recompute_masks
+from accounts.models import Availability, UserDocument, Volunteer, VolunteerSkill
+from staff.matching import recommendation_scope
+from staff.models import Mission, MissionSignup, VolunteerApplication
 from core.models import TeamMember  # ton modèle staff est ici
 
 # Optionnel: heures si présentes
@@ -15,32 +27,326 @@ try:
 except Exception:
     HAS_HOURS = False
 
-def _recount(stats: SiteStats):
-    U = get_user_model()
-    stats.total_users = U.objects.count()
-    stats.total_volunteers = Volunteer.objects.count()
-    stats.total_staff = TeamMember.objects.count()
-    stats.total_missions = Mission.objects.count()
-    stats.total_signups = MissionSignup.objects.count()
-    if HAS_HOURS:
-        stats.total_hours_entries = HoursEntry.objects.count()
-    stats.save()
+try:
+    from payments.models import Payment
+    HAS_PAYMENTS = True
+except Exception:
+    HAS_PAYMENTS = False
+
+
+# ────────────────────────────────
+# Suspension des signaux (opérations en masse)
+# ────────────────────────────────
+_state = threading.local()
+
+
+@contextmanager
+def suspend_signals():
+    """
+    Coupe le travail des receivers (compteurs, notifications…) dans le thread
+    courant. L'appelant fait alors le travail une fois pour tout le lot, ex:
+
+        with transaction.atomic(), suspend_signals():
+            MissionSignup.objects.bulk_create(rows)
+            SiteStats.apply_delta(total_signups=len(rows))
+    """
+    depth = getattr(_state, "depth", 0)
+    _state.depth = depth + 1
+    try:
+        yield
+    finally:
+        _state.depth = depth
+
+
+def signals_suspended() -> bool:
+    return getattr(_state, "depth", 0) > 0
+
+
+# ────────────────────────────────
+# SiteStats : deltas atomiques à la création / suppression uniquement
+# (la dérive éventuelle est corrigée par `manage.py reconcile_site_stats`)
+# ────────────────────────────────
+STATS_FIELDS = {
+    get_user_model(): "total_users",
+    Volunteer: "total_volunteers",
+    TeamMember: "total_staff",
+    Mission: "total_missions",
+    MissionSignup: "total_signups",
+}
+if HAS_HOURS:
+    STATS_FIELDS[HoursEntry] = "total_hours_entries"
+
+
+def _on_stats_save(sender, created, raw=False, **kwargs):
+    if not created or raw or signals_suspended():
+        return
+    SiteStats.apply_delta(**{STATS_FIELDS[sender]: 1})
+
+
+def _on_stats_delete(sender, **kwargs):
+    if signals_suspended():
+        return
+    SiteStats.apply_delta(**{STATS_FIELDS[sender]: -1})
+
+
+for _model in STATS_FIELDS:
+    post_save.connect(_on_stats_save, sender=_model, dispatch_uid=f"site_stats_save_{_model.__name__}")
+    post_delete.connect(_on_stats_delete, sender=_model, dispatch_uid=f"site_stats_delete_{_model.__name__}")
+
+
+# ────────────────────────────────
+# Cache des pages publiques : tampons de version (cf. core/cache.py)
+# ────────────────────────────────
+CONTENT_VERSIONS = {
+    Project: "projects",
+    Event: "events",
+    News: "news",
+    Partenaire: "partners",
+    TeamMember: "team",
+    Testimonial: "testimonials",
+    Mission: "missions",
+}
+
+
+def _bump_content_version(sender, **kwargs):
+    name = CONTENT_VERSIONS.get(sender)
+    if name:
+        content_cache.bump(name)
+
+
+for _model in CONTENT_VERSIONS:
+    post_save.connect(_bump_content_version, sender=_model, dispatch_uid=f"content_version_save_{_model.__name__}")
+    post_delete.connect(_bump_content_version, sender=_model, dispatch_uid=f"content_version_delete_{_model.__name__}")
+
+
+@receiver(m2m_changed, sender=Project.partners.through)
+def _on_project_partners_change(sender, **kwargs):
+    content_cache.bump("projects", "partners")
+
+
+@receiver(m2m_changed, sender=Event.projects.through)
+def _on_event_projects_change(sender, **kwargs):
+    content_cache.bump("events", "projects")
+
+
+# ────────────────────────────────
+# Context processors : invalidation des valeurs en cache par utilisateur
+# ────────────────────────────────
+@receiver(post_save, sender=VolunteerApplication)
+@receiver(post_delete, sender=VolunteerApplication)
+def _on_application_change(sender, instance, **kwargs):
+    content_cache.bump("applications")
+    content_cache.bump_user(instance.user_id)
+
 
 @receiver(post_save, sender=Volunteer)
 @receiver(post_delete, sender=Volunteer)
-@receiver(post_save, sender=TeamMember)
-@receiver(post_delete, sender=TeamMember)
-@receiver(post_save, sender=Mission)
-@receiver(post_delete, sender=Mission)
+def _on_user_context_change(sender, instance, **kwargs):
+    content_cache.bump_user(instance.user_id)
+
+
+# ────────────────────────────────
+# Agrégats journaliers (cf. core/rollups.py) : recalcul des jours touchés après commit
+# (les opérations en masse sous suspend_signals() appellent rollups elles-mêmes)
+# ────────────────────────────────
+def _touched_days(instance, field, to_day=lambda v: v):
+    # jour actuel + jour d'origine (si le champ a été modifié depuis le chargement)
+    values = {getattr(instance, field, None), instance.tracked_initial(field)}
+    return {to_day(v) for v in values if v}
+
+
+def _rollup_receiver(field, refresh, to_day=lambda v: v):
+    def _receiver(sender, instance, raw=False, **kwargs):
+        if raw or signals_suspended():
+            return
+        days = _touched_days(instance, field, to_day)
+        if days:
+            transaction.on_commit(partial(refresh, days))
+    return _receiver
+
+
+ROLLUPS = [(MissionSignup, "created_at", rollups.refresh_signups, rollups.local_date)]
+if HAS_HOURS:
+    ROLLUPS.append((HoursEntry, "date", rollups.refresh_hours, lambda v: v))
+if HAS_PAYMENTS:
+    ROLLUPS.append((Payment, "created_at", rollups.refresh_payments, rollups.local_date))
+
+for _model, _field, _refresh, _to_day in ROLLUPS:
+    track_fields(_model, [_field])
+    _rollup = _rollup_receiver(_field, _refresh, _to_day)
+    post_save.connect(_rollup, sender=_model, weak=False, dispatch_uid=f"rollup_save_{_model.__name__}")
+    post_delete.connect(_rollup, sender=_model, weak=False, dispatch_uid=f"rollup_delete_{_model.__name__}")
+
+
+# ────────────────────────────────
+# Disponibilités : masque dénormalisé sur Volunteer (cf. accounts/availability.py)
+# ────────────────────────────────
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+def _on_availability_change(sender, instance, raw=False, **kwargs):
+    if raw or signals_suspended():
+        return
+    recompute_masks([instance.volunteer_id])
+
+
+# ────────────────────────────────
+# Recommandations de missions (cf. staff/matching.py) : invalidation par bénévole
+# (catalogue : version "missions" ci-dessus)
+# ────────────────────────────────
+@receiver(m2m_changed, sender=Mission.required_skills.through)
+def _on_mission_skills_change(sender, **kwargs):
+    content_cache.bump("missions")
+
+
+@receiver(post_save, sender=Volunteer)
+@receiver(post_delete, sender=Volunteer)
+def _on_volunteer_profile_change(sender, instance, **kwargs):
+    content_cache.bump(recommendation_scope(instance.pk))
+
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+@receiver(post_save, sender=VolunteerSkill)
+@receiver(post_delete, sender=VolunteerSkill)
 @receiver(post_save, sender=MissionSignup)
 @receiver(post_delete, sender=MissionSignup)
-def _on_core_change(sender, **kwargs):
-    stats = SiteStats.get()
-    _recount(stats)
+def _on_volunteer_features_change(sender, instance, **kwargs):
+    content_cache.bump(recommendation_scope(instance.volunteer_id))
+
+
+# ────────────────────────────────
+# Valeurs en cache par bénévole (tâches du dashboard) : inscriptions et heures
+# (les opérations en masse sous suspend_signals() appellent bump_volunteer elles-mêmes)
+# ────────────────────────────────
+VOLUNTEER_SCOPED = [MissionSignup] + ([HoursEntry] if HAS_HOURS else [])
+
+
+def _on_volunteer_scoped_change(sender, instance, raw=False, **kwargs):
+    if raw or signals_suspended():
+        return
+    content_cache.bump_volunteer(instance.volunteer_id)
+
+
+for _model in VOLUNTEER_SCOPED:
+    post_save.connect(_on_volunteer_scoped_change, sender=_model, dispatch_uid=f"volunteer_scope_save_{_model.__name__}")
+    post_delete.connect(_on_volunteer_scoped_change, sender=_model, dispatch_uid=f"volunteer_scope_delete_{_model.__name__}")
+
+
+# ────────────────────────────────
+# Mission.effective_date (dénormalisée) : suit Event.date
+# ────────────────────────────────
+track_fields(Event, ["date"])
+
+
+@receiver(post_save, sender=Event)
+def _on_event_date_change(sender, instance, created, raw=False, **kwargs):
+    if raw or created or instance.tracked_initial("date") == instance.date:
+        return
+    Mission.refresh_effective_dates(Mission.objects.filter(event_id=instance.pk))
+
+
+@receiver(pre_delete, sender=Event)
+def _remember_event_missions(sender, instance, **kwargs):
+    # on_delete=SET_NULL se fait en UPDATE direct, sans save() des missions
+    instance._mission_ids = list(Mission.objects.filter(event_id=instance.pk).values_list("id", flat=True))
+
+
+@receiver(post_delete, sender=Event)
+def _on_event_delete(sender, instance, **kwargs):
+    ids = getattr(instance, "_mission_ids", None)
+    if ids:
+        Mission.refresh_effective_dates(Mission.objects.filter(id__in=ids))
+
+
+# ────────────────────────────────
+# Fil d'activité des bénévoles (cf. accounts/activity.py) : écrit avec sa source
+# (suppression : CASCADE depuis la source ; opérations en masse : activity.sync_* elles-mêmes)
+# ────────────────────────────────
+# champs recopiés dans les lignes du fil (titre, lieu, description, projets via l'événement)
+ACTIVITY_MISSION_FIELDS = ["title", "location", "description", "event"]
+ACTIVITY_EVENT_FIELDS = ["title", "location", "description"]
+track_fields(Mission, ACTIVITY_MISSION_FIELDS)
+track_fields(Event, ACTIVITY_EVENT_FIELDS)
+
+
+def _sync_event_hours(event_ids):
+    """Resynchronise les heures rattachées aux événements (directement ou via leurs missions)."""
+    if HAS_HOURS and event_ids:
+        activity.sync_hours(HoursEntry.objects
+                            .filter(Q(event_id__in=event_ids) | Q(mission__event_id__in=event_ids))
+                            .values_list("pk", flat=True))
+
 
 if HAS_HOURS:
     @receiver(post_save, sender=HoursEntry)
-    @receiver(post_delete, sender=HoursEntry)
-    def _on_hours_change(sender, **kwargs):
-        stats = SiteStats.get()
-        _recount(stats)
+    def _on_hours_activity(sender, instance, raw=False, **kwargs):
+        if raw or signals_suspended():
+            return
+        activity.sync_hours([instance.pk])
+
+
+@receiver(post_save, sender=UserDocument)
+def _on_document_activity(sender, instance, raw=False, **kwargs):
+    if raw or signals_suspended():
+        return
+    activity.sync_documents([instance.pk])
+
+
+@receiver(post_save, sender=Volunteer)
+def _on_volunteer_activity(sender, instance, created, raw=False, **kwargs):
+    # documents déposés avant de devenir bénévole
+    if created and not raw:
+        activity.sync_documents(UserDocument.objects.filter(user_id=instance.user_id).values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Mission)
+def _on_mission_activity(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created or signals_suspended():
+        return
+    if not instance.tracked_changes(update_fields, fields=ACTIVITY_MISSION_FIELDS):
+        return
+    if HAS_HOURS:
+        activity.sync_hours(HoursEntry.objects.filter(mission_id=instance.pk).values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Event)
+def _on_event_activity(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw or created or signals_suspended():
+        return
+    if instance.tracked_changes(update_fields, fields=ACTIVITY_EVENT_FIELDS):
+        _sync_event_hours([instance.pk])
+
+
+@receiver(m2m_changed, sender=Event.projects.through)
+def _on_event_projects_activity(sender, instance, action, reverse, pk_set, **kwargs):
+    if signals_suspended():
+        return
+    # côté Project (reverse), un clear ne donne pas les événements : on les relève avant
+    if action == "pre_clear" and reverse:
+        instance._cleared_event_ids = list(instance.events.values_list("pk", flat=True))
+        return
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    if not reverse:
+        _sync_event_hours([instance.pk])
+    elif action == "post_clear":
+        _sync_event_hours(getattr(instance, "_cleared_event_ids", []))
+    else:
+        _sync_event_hours(list(pk_set or []))
+
+
+# ────────────────────────────────
+# Statistiques par bénévole (cf. accounts/stats.py) : recalcul après commit
+# (les opérations en masse sous suspend_signals() appellent stats.refresh elles-mêmes)
+# ────────────────────────────────
+def _on_volunteer_stats_change(sender, instance, raw=False, **kwargs):
+    if raw or signals_suspended():
+        return
+    ids = {instance.volunteer_id, instance.tracked_initial("volunteer")} - {None}
+    transaction.on_commit(partial(volunteer_stats.refresh, ids))
+
+
+for _model in VOLUNTEER_SCOPED:
+    track_fields(_model, ["volunteer"])
+    post_save.connect(_on_volunteer_stats_change, sender=_model, dispatch_uid=f"volunteer_stats_save_{_model.__name__}")
+    post_delete.connect(_on_volunteer_stats_change, sender=_model, dispatch_uid=f"volunteer_stats_delete_{_model.__name__}")
@@ -0,0 +1,19 @@
+from django import template
+from django.http import QueryDict
+
+from core.pagination import CURSOR_PARAM
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def cursor_url(context, cursor=""):
+    """Querystring courant avec `?cursor=` remplacé (vide -> première page)."""
+    request = context.get("request")
+    params = request.GET.copy() if request is not None else QueryDict(mutable=True)
+    params.pop("page", None)
+    params.pop(CURSOR_PARAM, None)
+    if cursor:
+        params[CURSOR_PARAM] = cursor
+    query = params.urlencode()
+    return f"?{query}" if query else "?"
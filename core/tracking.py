@@ -0,0 +1,112 @@
+# core/tracking.py
+"""
+Suivi des champs modifiés, sans SELECT supplémentaire.
+
+Les valeurs des champs suivis sont photographiées au chargement depuis la base
+(`from_db`, et non `post_init` : une instance construite à la main porterait
+alors ses nouvelles valeurs) puis comparées en mémoire au moment du save.
+Une instance construite à la main avec une pk existante (`Mission(pk=…)`) est
+relue une fois, sur les seuls champs suivis, avant son save :
+
+    class Mission(TrackedFieldsMixin, models.Model): ...
+    track_fields(Mission, ["title", "status"])   # ex: depuis notifications/signals.py
+
+    mission.tracked_changes(fields=["status"])  # {"status": {"old": "draft", "new": "published"}}
+
+Plusieurs modules suivent des champs sur le même modèle : chacun passe à
+tracked_changes() le sous-ensemble qui le concerne (`fields=`).
+"""
+
+
+class TrackedFieldsMixin:
+    # attname par nom de champ, renseigné par track_fields()
+    _tracked_fields = {}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked()
+        return instance
+
+    def _snapshot_tracked(self, names=None):
+        tracked = self._tracked_fields
+        if not tracked:
+            return
+        snap = self.__dict__.setdefault("_tracked_snapshot", {})
+        for name in (names if names is not None else tracked):
+            attname = tracked.get(name)
+            if attname is not None and attname in self.__dict__:  # champ différé : ignoré
+                snap[name] = self.__dict__[attname]
+
+    def tracked_changes(self, update_fields=None, fields=None):
+        """
+        {champ: {"old": str, "new": str}} des champs suivis modifiés depuis le chargement,
+        limités à `fields` si fourni (les champs suivis pour d'autres modules sont ignorés).
+        Si `update_fields` ne touche aucun de ces champs, retourne {} sans rien comparer.
+        """
+        tracked = self._tracked_fields
+        if not tracked or self.pk is None:
+            return {}
+        names = list(tracked) if fields is None else [n for n in fields if n in tracked]
+        if update_fields is not None:
+            names = [n for n in names if n in update_fields]
+            if not names:
+                return {}
+
+        snap = self.__dict__.get("_tracked_snapshot", {})
+        missing = [n for n in names if n not in snap and tracked[n] in self.__dict__]
+        if missing:
+            # Instance construite à la main ou champ différé au chargement : on relit ces champs
+            row = self._read_tracked(missing)
+            if row is None:
+                return {}
+            snap = {**snap, **row}
+
+        def _s(v):
+            return str(v) if v is not None else ""
+
+        diff = {}
+        for name in names:
+            if name not in snap or tracked[name] not in self.__dict__:
+                continue
+            old, new = _s(snap[name]), _s(self.__dict__[tracked[name]])
+            if old != new:
+                diff[name] = {"old": old, "new": new}
+        return diff
+
+    def _read_tracked(self, names):
+        """{champ: valeur en base} pour `names`, ou None si la ligne n'existe pas."""
+        tracked = self._tracked_fields
+        row = type(self)._base_manager.filter(pk=self.pk).values(*(tracked[n] for n in names)).first()
+        return None if row is None else {n: row[tracked[n]] for n in names}
+
+    def tracked_initial(self, name, default=None):
+        """Valeur brute d'un champ suivi au chargement (encore disponible en post_save)."""
+        return self.__dict__.get("_tracked_snapshot", {}).get(name, default)
+
+    def save(self, *args, **kwargs):
+        if self._tracked_fields and self._state.adding and self.pk is not None \
+                and "_tracked_snapshot" not in self.__dict__:
+            # instance construite à la main : l'état en base sert de référence (pre_save et post_save)
+            self.__dict__["_tracked_snapshot"] = self._read_tracked(list(self._tracked_fields)) or {}
+        super().save(*args, **kwargs)
+        # Les valeurs enregistrées deviennent la nouvelle référence
+        update_fields = kwargs.get("update_fields")
+        self._snapshot_tracked(None if update_fields is None else [n for n in update_fields if n in self._tracked_fields])
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._snapshot_tracked()
+
+
+def track_fields(model, fields):
+    """Déclare les champs suivis d'un modèle (les noms inexistants sont ignorés)."""
+    tracked = dict(getattr(model, "_tracked_fields", {}) if "_tracked_fields" in model.__dict__ else {})
+    for name in fields:
+        try:
+            field = model._meta.get_field(name)
+        except Exception:
+            continue
+        if getattr(field, "concrete", False) and not field.many_to_many:
+            tracked[name] = field.attname
+    model._tracked_fields = tracked
@@ -16,6 +16,7 @@ from core.models import TeamMemberInvite
 from core.forms import TeamMemberSelfForm
 from .utils import grant_team_access
 from staff.forms import VolunteerApplicationForm
+from .cache import cached, make_key
 
 
 
@@ -42,25 +43,27 @@ class ContactForm(ModelForm):
 # -------------------------
 # Pages publiques
 # -------------------------
+def _home_blocks():
+    today = date.today()
+    return {
+        "projects": list(Project.objects.all()[:6]),
+        "testimonials": list(Testimonial.objects.all()[:6]),
+        "partners": list(Partenaire.objects.all()),
+        "team": list(TeamMember.objects.all()[:6]),
+        "upcoming_events": list(Event.objects.filter(date__gte=today).order_by("date")[:6]),
+        "news": list(News.objects.all()[:4]),
+    }
+
+
 def accueil(request):
-    projects = Project.objects.all()[:6]
-    testimonials = Testimonial.objects.all()[:6]
-    partners = Partenaire.objects.all()
-    team = TeamMember.objects.all()[:6]
-    upcoming_events = Event.objects.filter(date__gte=date.today()).order_by("date")[:6]
-    news = News.objects.all()[:4]
-    return render(
-        request,
-        "core/accueil.html",
-        {
-            "projects": projects,
-            "testimonials": testimonials,
-            "partners": partners,
-            "team": team,
-            "upcoming_events": upcoming_events,
-            "news": news,
-        },
+    # Servi depuis le cache tant que le contenu ne change pas (cf. core/cache.py).
+    # La date fait partie de la clé : les "événements à venir" basculent à minuit.
+    blocks = cached(
+        f"home:{date.today().isoformat()}",
+        ["projects", "testimonials", "partners", "team", "events", "news"],
+        _home_blocks,
     )
+    return render(request, "core/accueil.html", dict(blocks))
 
 @login_required
 def team_member_complete(request, token):
@@ -105,32 +108,47 @@ def team_member_complete(request, token):
         "invite": invite,
     })
 
+class CachedListMixin:
+    """
+    Sert la liste depuis le cache partagé tant que `cache_deps` n'ont pas bougé.
+    Les recherches libres (?q=) restent en direct : clés trop dispersées.
+    """
+    cache_deps = ()
+
+    def cached_list(self, qs, *key_parts):
+        key = make_key(f"list:{self.model._meta.label_lower}", *key_parts)
+        return cached(key, self.cache_deps, lambda: list(qs))
+
+
 # -------------------------
 # Projets
 # -------------------------
-class ProjectListView(ListView):
+class ProjectListView(CachedListMixin, ListView):
     model = Project
     template_name = "core/projects_list.html"
     context_object_name = "projects"
     paginate_by = 12
+    cache_deps = ("projects",)
 
     def get_queryset(self):
         qs = super().get_queryset()
         q = self.request.GET.get("q")
         if q:
             qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
-        return qs.order_by("title")
+            return qs.order_by("title")
+        return self.cached_list(qs.order_by("title"))
 
 
 
 # -------------------------
 # Evénements
 # -------------------------
-class EventListView(ListView):
+class EventListView(CachedListMixin, ListView):
     model = Event
     template_name = "core/events_list.html"
     context_object_name = "events"
     paginate_by = 12
+    cache_deps = ("events",)
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -139,7 +157,9 @@ class EventListView(ListView):
             qs = qs.filter(date__lt=date.today())
         elif when == "upcoming":
             qs = qs.filter(date__gte=date.today())
-        return qs.order_by("-date")
+        else:
+            when = "all"
+        return self.cached_list(qs.order_by("-date"), when, date.today().isoformat())
 
 
 class EventDetailView(DetailView):
@@ -153,18 +173,20 @@ class EventDetailView(DetailView):
 # -------------------------
 # News / Actus
 # -------------------------
-class NewsListView(ListView):
+class NewsListView(CachedListMixin, ListView):
     model = News
     template_name = "core/news_list.html"
     context_object_name = "items"
     paginate_by = 12
+    cache_deps = ("news",)
 
     def get_queryset(self):
         qs = super().get_queryset()
         q = self.request.GET.get("q")
         if q:
             qs = qs.filter(Q(title__icontains=q) | Q(content__icontains=q))
-        return qs.order_by("-date")
+            return qs.order_by("-date")
+        return self.cached_list(qs.order_by("-date"))
 
 
 class NewsDetailView(DetailView):
@@ -252,14 +274,17 @@ def event_detail_legacy(request, pk):
 
 
 
+def _about_blocks():
+    return cached("about", ["team", "partners", "testimonials"], lambda: {
+        "team": list(TeamMember.objects.all()),
+        "partners": list(Partenaire.objects.all()),
+        "testimonials": list(Testimonial.objects.all()[:10]),
+    })
+
+
 def nous(request):
-    team = TeamMember.objects.all()
-    partners = Partenaire.objects.all()
-    testimonials = Testimonial.objects.all()[:10]
     form = ContactForm()  # pour afficher le form sur la page "nous"
-    return render(request, "core/nous.html", {
-        "team": team, "partners": partners, "testimonials": testimonials, "form": form
-    })
+    return render(request, "core/nous.html", {**_about_blocks(), "form": form})
 
 
 def contact(request):
@@ -277,12 +302,7 @@ def contact(request):
     if not form.is_valid():
         messages.error(request, "Veuillez corriger les erreurs du formulaire.")
         # On ré-affiche la page 'nous' avec les erreurs
-        team = TeamMember.objects.all()
-        partners = Partenaire.objects.all()
-        testimonials = Testimonial.objects.all()[:10]
-        return render(request, "core/nous.html", {
-            "team": team, "partners": partners, "testimonials": testimonials, "form": form
-        })
+        return render(request, "core/nous.html", {**_about_blocks(), "form": form})
 
     # 1) Sauvegarde en BDD
     msg_obj = form.save()  # crée bien une ligne dans la table core_contactmessage
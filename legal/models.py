@@ -98,7 +98,7 @@ class LegalVersion(models.Model):
         self.published_at = timezone.now()
         if user:
             self.updated_by = user
-        self.save()
+        self.save()  # post_save → legal.registry.invalidate()
 
     @property
     def is_effective(self):
@@ -0,0 +1,106 @@
+# legal/registry.py
+"""
+Registre des versions légales en vigueur.
+
+Les versions publiées courantes sont chargées en une requête puis gardées en
+mémoire du process, indexées par (key, locale). Le registre est validé contre
+un tampon de version partagé (core.cache, espace "legal") : une publication
+dans un worker invalide donc les registres de tous les autres. La date du jour
+fait aussi partie de la validation (bascule des `effective_date`).
+
+Les ids des versions acceptées par chaque utilisateur sont gardés dans le cache
+partagé et invalidés à la création d'une LegalAcceptance (cf. legal/signals.py).
+"""
+import threading
+
+from django.db.models import Q
+from django.utils import timezone
+
+from core import cache as shared_cache
+from .models import LegalDocument, LegalVersion, LegalAcceptance
+
+OUTDATED_KEYS = ("privacy", "terms")
+
+_lock = threading.Lock()
+_state = {"stamp": None, "docs": {}, "current": {}}
+
+
+def _acceptance_scope(user_id) -> str:
+    return f"legal:acceptances:{user_id}"
+
+
+def _load():
+    today = timezone.localdate()
+    docs = {(d.key, d.locale): d for d in LegalDocument.objects.all()}
+    current = {}
+    versions = (
+        LegalVersion.objects.filter(status="published")
+        .filter(Q(effective_date__isnull=True) | Q(effective_date__lte=today))
+        .order_by("document_id", "-effective_date", "-published_at", "-id")
+    )
+    by_doc_id = {d.pk: d for d in docs.values()}
+    for v in versions:
+        doc = by_doc_id.get(v.document_id)
+        if doc is None or (doc.key, doc.locale) in current:
+            continue  # déjà la plus récente pour ce document
+        v.document = doc
+        current[(doc.key, doc.locale)] = v
+    return docs, current
+
+
+def _registry():
+    stamp = (shared_cache.get_version("legal"), timezone.localdate())
+    state = _state
+    if state["stamp"] != stamp:
+        with _lock:
+            if _state["stamp"] != stamp:
+                docs, current = _load()
+                _state.update(stamp=stamp, docs=docs, current=current)
+            state = _state
+    return state
+
+
+def invalidate():
+    """À appeler quand une version est publiée / un document modifié."""
+    shared_cache.bump("legal")
+    _state["stamp"] = None
+
+
+def get_document(key, locale="fr"):
+    return _registry()["docs"].get((key, locale))
+
+
+def current_version(key, locale="fr"):
+    """Version publiée en vigueur (LegalVersion, avec .document préchargé) ou None."""
+    return _registry()["current"].get((key, locale))
+
+
+def accepted_version_ids(user) -> frozenset:
+    if not getattr(user, "is_authenticated", False):
+        return frozenset()
+    return shared_cache.cached(
+        f"legal:accepted:{user.pk}",
+        [_acceptance_scope(user.pk)],
+        lambda: frozenset(LegalAcceptance.objects.filter(user=user).values_list("version_id", flat=True)),
+    )
+
+
+def invalidate_acceptances(user_id):
+    shared_cache.bump(_acceptance_scope(user_id))
+
+
+def has_accepted(user, version) -> bool:
+    return version is not None and version.pk in accepted_version_ids(user)
+
+
+def outdated(user, keys=OUTDATED_KEYS, locale="fr"):
+    """Documents dont la version en vigueur n'a pas été acceptée : [{"doc", "ver"}]."""
+    if not getattr(user, "is_authenticated", False):
+        return []
+    accepted = accepted_version_ids(user)
+    out = []
+    for key in keys:
+        ver = current_version(key, locale)
+        if ver is not None and ver.pk not in accepted:
+            out.append({"doc": ver.document, "ver": ver})
+    return out
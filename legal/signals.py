@@ -0,0 +1,19 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import registry
+from .models import LegalDocument, LegalVersion, LegalAcceptance
+
+
+@receiver(post_save, sender=LegalDocument)
+@receiver(post_delete, sender=LegalDocument)
+@receiver(post_save, sender=LegalVersion)
+@receiver(post_delete, sender=LegalVersion)
+def _on_legal_change(sender, **kwargs):
+    registry.invalidate()
+
+
+@receiver(post_save, sender=LegalAcceptance)
+@receiver(post_delete, sender=LegalAcceptance)
+def _on_acceptance_change(sender, instance, **kwargs):
+    registry.invalidate_acceptances(instance.user_id)
@@ -4,13 +4,15 @@ from django.views.decorators.http import require_POST
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
 from .models import LegalDocument, LegalVersion, LegalAcceptance
+from . import registry
 
 def _doc_by(key, locale="fr"):
-    doc = get_object_or_404(LegalDocument, key=key, locale=locale)
-    ver = doc.current_version()
+    if registry.get_document(key, locale) is None:
+        raise Http404("Document introuvable.")
+    ver = registry.current_version(key, locale)
     if not ver:
         raise Http404("Aucune version publiée.")
-    return doc, ver
+    return ver.document, ver
 
 def privacy(request):  return detail(request, "privacy")
 def terms(request):    return detail(request, "terms")
@@ -23,7 +25,7 @@ def detail(request, key, locale="fr"):
     history = doc.versions.filter(status="published").order_by("-effective_date","-published_at")[:5]
     accepted = False
     if request.user.is_authenticated:
-        accepted = LegalAcceptance.objects.filter(user=request.user, document=doc, version=ver).exists()
+        accepted = registry.has_accepted(request.user, ver)
     return render(request, "legal/detail.html", {"doc": doc, "ver": ver, "history": history, "accepted": accepted})
 
 def history(request, key, locale="fr"):
@@ -1,10 +1,12 @@
-from .models import Notification
+from core.cache import lazy_context
+from . import inbox
 
 def notifications_badge(request):
-    if request.user.is_authenticated:
-        return {
-            "unread_notifications": Notification.objects.filter(
-                recipient=request.user, is_read=False
-            ).count()
-        }
-    return {}
+    def _count():
+        if not request.user.is_authenticated:
+            return 0
+        return inbox.unread_count(request.user)
+    # Paresseux, mémoïsé par requête et gardé quelques secondes par utilisateur
+    # (invalidé aussi à chaque nouvelle diffusion staff)
+    return {"unread_notifications": lazy_context(request, "unread_notifications", _count, per_user=True,
+                                                 deps=("broadcasts:staff",))}
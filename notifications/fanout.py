@@ -0,0 +1,218 @@
+# notifications/fanout.py
+"""
+Moteur de diffusion (fan-out) des notifications.
+
+- l'URL cible est résolue une fois par rôle (staff / bénévole), pas par destinataire ;
+- l'ensemble des destinataires staff est mis en cache (invalidé quand un
+  TeamMember ou un utilisateur change, cf. core/signals.py et notifications/signals.py) ;
+- les insertions se font par lots bornés (NOTIFICATIONS_BATCH_SIZE) ;
+- avec NOTIFICATIONS_ASYNC=1, la diffusion est enregistrée (FanoutJob) dans la
+  transaction de l'action et écrite par `manage.py send_queued_notifications` :
+  la requête staff n'attend pas les N lignes, et rien ne se perd au redémarrage ;
+- les événements destinés à tout le staff passent par broadcast() : une seule
+  ligne, l'état lu/non-lu est calculé à la lecture (cf. notifications/inbox.py).
+"""
+import logging
+from collections import namedtuple
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection as db_connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.cache import cached, bump, bump_user
+from .models import FanoutJob, Notification
+
+logger = logging.getLogger(__name__)
+
+# Forme légère d'un destinataire : suffit pour choisir l'URL (rôle) et créer la ligne
+Recipient = namedtuple("Recipient", ["pk", "is_staff"])
+
+STAFF_RECIPIENTS_DEPS = ["team", "users"]
+
+# Bail d'une diffusion en cours d'écriture, prolongé à chaque lot : passé ce délai (worker tué), elle est reprise
+JOB_LEASE = timedelta(minutes=10)
+
+
+def staff_recipients():
+    """Utilisateurs actifs liés à un TeamMember (en cache, tuple de Recipient)."""
+    def _load():
+        from core.models import TeamMember
+        User = get_user_model()
+        staff_user_ids = TeamMember.objects.filter(user__isnull=False).values("user_id")
+        rows = User.objects.filter(id__in=staff_user_ids, is_active=True).values_list("pk", "is_staff")
+        return tuple(Recipient(pk, is_staff) for pk, is_staff in rows)
+    return cached("notif:staff_recipients", STAFF_RECIPIENTS_DEPS, _load)
+
+
+def as_recipients(recipients):
+    """Accepte un QuerySet d'utilisateurs, des utilisateurs ou des Recipient."""
+    if hasattr(recipients, "values_list"):
+        return [Recipient(pk, is_staff) for pk, is_staff in recipients.values_list("pk", "is_staff")]
+    out = []
+    for r in recipients:
+        out.append(r if isinstance(r, Recipient) else Recipient(r.pk, bool(getattr(r, "is_staff", False))))
+    return out
+
+
+def _role(is_staff):
+    # clé texte : le job passe par du JSON (FanoutJob.payload)
+    return "staff" if is_staff else "volunteer"
+
+
+def _urls_by_role(target, roles):
+    from .utils import url_for_recipient, safe_url_for
+    urls = {}
+    for is_staff in roles:
+        role = Recipient(None, is_staff)
+        urls[_role(is_staff)] = url_for_recipient(target, role) or safe_url_for(target)
+    return urls
+
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _write(job, job_id=None, start=0):
+    """
+    Insère les lignes par lots à partir du destinataire `start`. `job` ne contient que des
+    données simples (sérialisables). Avec `job_id`, chaque lot avance FanoutJob.done dans
+    sa propre transaction : un lot est écrit et compté en entier, ou pas du tout.
+    """
+    from .inbox import increment_unread
+    batch_size = getattr(settings, "NOTIFICATIONS_BATCH_SIZE", 500)
+    rows = (
+        Notification(
+            recipient_id=pk,
+            actor_id=job["actor_id"],
+            verb=job["verb"],
+            target_content_type_id=job["ctype_id"],
+            target_object_id=job["object_id"],
+            title=job["title"],
+            message=job["message"],
+            url=job["urls"][_role(is_staff)],
+        )
+        for pk, is_staff in job["recipients"][start:]
+    )
+    created = 0
+    for batch in _chunks(rows, batch_size):
+        ids = [n.recipient_id for n in batch]
+        with transaction.atomic():
+            Notification.objects.bulk_create(batch)
+            increment_unread(ids)  # compteur du badge
+            created += len(batch)
+            if job_id is not None:
+                FanoutJob.objects.filter(pk=job_id).update(
+                    done=start + created, next_attempt_at=timezone.now() + JOB_LEASE,
+                )
+        # rafraîchit le badge (cache par utilisateur des context processors)
+        bump_user(*ids)
+    return created
+
+
+def _backoff(attempts):
+    base = getattr(settings, "NOTIFICATIONS_RETRY_BASE", 60)
+    return timedelta(seconds=min(base * (2 ** max(attempts - 1, 0)), 6 * 3600))
+
+
+def claim_job():
+    """Réserve la plus ancienne diffusion due (bail JOB_LEASE) et la retourne, ou None."""
+    now = timezone.now()
+    with transaction.atomic():
+        qs = FanoutJob.objects.filter(next_attempt_at__lte=now).order_by("next_attempt_at", "id")
+        if db_connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        job = qs.first()
+        if job is not None:
+            FanoutJob.objects.filter(pk=job.pk).update(next_attempt_at=now + JOB_LEASE)
+    return job
+
+
+def run_job(job):
+    """Écrit la diffusion depuis `job.done` ; en cas d'échec, la replanifie avec backoff. Retourne True si terminée."""
+    try:
+        _write(job.payload, job_id=job.pk, start=job.done)
+    except Exception as exc:
+        logger.exception("Échec de la diffusion #%s (%s destinataires)", job.pk, len(job.payload["recipients"]))
+        FanoutJob.objects.filter(pk=job.pk).update(
+            attempts=F("attempts") + 1,
+            last_error=f"{type(exc).__name__}: {exc}"[:2000],
+            next_attempt_at=timezone.now() + _backoff(job.attempts + 1),
+        )
+        return False
+    job.delete()
+    return True
+
+
+def drain(max_jobs=None):
+    """Écrit les diffusions en attente. Retourne (terminées, échecs)."""
+    done = failed = 0
+    while max_jobs is None or done + failed < max_jobs:
+        job = claim_job()
+        if job is None:
+            break
+        if run_job(job):
+            done += 1
+        else:
+            failed += 1
+    return done, failed
+
+
+def fanout(*, recipients, actor, verb, target, title="", message=""):
+    """Diffuse une notification vers `recipients` (après commit de la transaction en cours)."""
+    actor_id = getattr(actor, "pk", None)
+    targets = [r for r in as_recipients(recipients) if r.pk != actor_id]  # pas d'auto-notification
+    targets = list({r.pk: r for r in targets}.values())  # un destinataire = une ligne
+    if not targets:
+        return
+    job = {
+        "recipients": [(r.pk, r.is_staff) for r in targets],
+        "actor_id": actor_id,
+        "verb": verb,
+        "ctype_id": ContentType.objects.get_for_model(target.__class__).pk,
+        "object_id": target.pk,
+        "title": title,
+        "message": message,
+        "urls": _urls_by_role(target, {r.is_staff for r in targets}),
+    }
+
+    if getattr(settings, "NOTIFICATIONS_ASYNC", False):
+        # même transaction que l'action : annulée avec elle, jamais perdue une fois commitée
+        FanoutJob.objects.create(payload=job)
+    else:
+        # Évite la notif avant commit DB
+        transaction.on_commit(lambda: _write(job))
+
+
+def broadcast(*, audience, actor, verb, target, title="", message=""):
+    """
+    Diffusion « fan-out à la lecture » : une seule ligne pour toute l'audience
+    (ex: tout le staff) au lieu d'une ligne par destinataire.
+    """
+    from .models import BroadcastNotification
+    from .utils import url_for_recipient, safe_url_for
+    row = BroadcastNotification(
+        audience=audience,
+        actor_id=getattr(actor, "pk", None),
+        verb=verb,
+        target_content_type=ContentType.objects.get_for_model(target.__class__),
+        target_object_id=target.pk,
+        title=title,
+        message=message,
+        url=url_for_recipient(target, Recipient(None, True)) or safe_url_for(target),
+    )
+
+    def _save():
+        row.save()
+        bump(f"broadcasts:{audience}")  # badges de l'audience
+
+    transaction.on_commit(_save)
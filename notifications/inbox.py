@@ -0,0 +1,218 @@
+# notifications/inbox.py
+"""
+Boîte de réception d'un utilisateur : fusion des notifications directes
+(une ligne par destinataire) et des diffusions (une ligne par audience).
+"""
+import heapq
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.pagination import KeysetPage, coerce_position, decode_cursor, encode_cursor, NEXT
+from .models import Notification, BroadcastNotification, BroadcastRead, NotificationState
+
+
+def audiences_for(user):
+    """Audiences de diffusion dont l'utilisateur fait partie."""
+    if not getattr(user, "is_authenticated", False):
+        return []
+    from .fanout import staff_recipients
+    if any(r.pk == user.pk for r in staff_recipients()):
+        return [BroadcastNotification.Audience.STAFF]
+    return []
+
+
+def get_state(user):
+    # Nouvel état : les diffusions antérieures comptent comme lues (pas de badge à 500 pour un nouveau staff)
+    state = NotificationState.objects.filter(user=user).first()
+    if state is None:
+        state, _ = NotificationState.objects.get_or_create(user=user, defaults={
+            "broadcasts_read_until": timezone.now(),
+            "unread_count": Notification.objects.filter(recipient=user, is_read=False).count(),
+        })
+    return state
+
+
+def broadcasts_for(user, audiences=None, state=None):
+    """(QuerySet des diffusions visibles, du plus récent au plus ancien ; NotificationState)."""
+    audiences = audiences_for(user) if audiences is None else audiences
+    if not audiences:
+        return BroadcastNotification.objects.none(), None
+    state = state or get_state(user)
+    read_one = BroadcastRead.objects.filter(user=user, broadcast=OuterRef("pk"))
+    qs = (BroadcastNotification.objects
+          .filter(audience__in=audiences)
+          .exclude(actor=user)  # pas d'auto-notification
+          .select_related("actor")
+          .annotate(read_one_flag=Exists(read_one))
+          .order_by("-created_at", "-id"))
+    return qs, state
+
+
+def _mark_broadcast_rows(rows, state):
+    for b in rows:
+        b.is_read = b.created_at <= state.broadcasts_read_until or b.read_one_flag
+        yield b
+
+
+def unread_count(user):
+    """Compteur dénormalisé (directes) + diffusions non lues de ses audiences."""
+    state = get_state(user)
+    audiences = audiences_for(user)
+    if not audiences:
+        return state.unread_count
+    qs, state = broadcasts_for(user, audiences, state=state)
+    return state.unread_count + qs.filter(created_at__gt=state.broadcasts_read_until, read_one_flag=False).count()
+
+
+# Rang de chaque flux dans le tri fusionné (created_at, rang, id) : départage les ex aequo
+DIRECT, BROADCAST = 1, 0
+
+
+def _position(n):
+    return (n.created_at, BROADCAST if n.is_broadcast else DIRECT, n.id)
+
+
+def _after(qs, rank, after):
+    """Éléments strictement après `after` = (created_at, rang, id) dans l'ordre décroissant."""
+    if after is None:
+        return qs
+    created_at, after_rank, after_id = after
+    cond = Q(created_at__lt=created_at)
+    if rank < after_rank:
+        cond |= Q(created_at=created_at)
+    elif rank == after_rank:
+        cond |= Q(created_at=created_at, id__lt=after_id)
+    return qs.filter(cond)
+
+
+def items(user, read=None, limit=None, after=None):
+    """
+    Liste fusionnée, du plus récent au plus ancien. `read` : None (toutes),
+    True (lues) ou False (non lues). Les éléments exposent is_read / get_open_url.
+    `after` : position (created_at, rang, id) du dernier élément déjà affiché.
+    """
+    direct = Notification.objects.filter(recipient=user).select_related("actor").order_by("-created_at", "-id")
+    if read is not None:
+        direct = direct.filter(is_read=read)
+    direct = _after(direct, DIRECT, after)
+    if limit:
+        direct = direct[:limit]
+    streams = [iter(direct)]
+
+    audiences = audiences_for(user)
+    if audiences:
+        qs, state = broadcasts_for(user, audiences)
+        if read is False:
+            qs = qs.filter(created_at__gt=state.broadcasts_read_until, read_one_flag=False)
+        elif read is True:
+            qs = qs.filter(Q(created_at__lte=state.broadcasts_read_until) | Q(read_one_flag=True))
+        qs = _after(qs, BROADCAST, after)
+        if limit:
+            qs = qs[:limit]
+        streams.append(_mark_broadcast_rows(qs, state))
+
+    merged = heapq.merge(*streams, key=_position, reverse=True)
+    out = []
+    for n in merged:
+        out.append(n)
+        if limit and len(out) >= limit:
+            break
+    return out
+
+
+def page(user, read=None, cursor=None, per_page=30):
+    """Page de la liste fusionnée, par curseur (cf. core.pagination) : ni OFFSET ni COUNT."""
+    position = decode_cursor(cursor)
+    after = None
+    if position and position[0] == NEXT and len(position[1]) == 3:
+        values = coerce_position(Notification, ["created_at", "id", "id"], position[1])  # rang : entier
+        if values is not None and values[1] in (DIRECT, BROADCAST):
+            after = tuple(values)
+    rows = items(user, read=read, limit=per_page + 1, after=after)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    return KeysetPage(
+        rows,
+        has_next=has_next,
+        has_previous=after is not None,  # retour à la première page (« plus récentes »)
+        next_cursor=encode_cursor(_position(rows[-1]), NEXT) if has_next else "",
+    )
+
+
+def mark_all_read(user):
+    now = timezone.now()
+    with transaction.atomic():
+        Notification.objects.filter(recipient=user, is_read=False).update(is_read=True)
+        NotificationState.objects.update_or_create(user=user, defaults={"unread_count": 0, "broadcasts_read_until": now})
+    # les lectures unitaires antérieures sont couvertes par l'horodatage
+    BroadcastRead.objects.filter(user=user, broadcast__created_at__lte=now).delete()
+
+
+def mark_read(notification):
+    """Marque une notification directe comme lue et décrémente le compteur (une seule fois)."""
+    if notification.is_read:
+        return
+    updated = Notification.objects.filter(pk=notification.pk, is_read=False).update(is_read=True)
+    notification.is_read = True
+    if updated:
+        NotificationState.objects.filter(user_id=notification.recipient_id).update(
+            unread_count=Greatest(F("unread_count") - 1, Value(0))
+        )
+
+
+def increment_unread(user_ids):
+    """Appelé par le chemin d'insertion en masse (fanout) : +1 pour chaque destinataire."""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return
+    NotificationState.objects.bulk_create(
+        [NotificationState(user_id=uid) for uid in user_ids], ignore_conflicts=True,
+    )
+    NotificationState.objects.filter(user_id__in=user_ids).update(unread_count=F("unread_count") + 1)
+
+
+def repair_counters(user_ids=None):
+    """Recalcule unread_count depuis la table ; retourne {user_id: (avant, après)} des écarts."""
+    real = Notification.objects.filter(is_read=False)
+    states = NotificationState.objects.all()
+    if user_ids is not None:
+        real = real.filter(recipient_id__in=user_ids)
+        states = states.filter(user_id__in=user_ids)
+    counts = dict(real.values("recipient_id").annotate(n=Count("id")).values_list("recipient_id", "n"))
+    drift = {}
+    for state in states.only("pk", "user_id", "unread_count").iterator():
+        expected = counts.pop(state.user_id, 0)
+        if state.unread_count != expected:
+            drift[state.user_id] = (state.unread_count, expected)
+            NotificationState.objects.filter(pk=state.pk).update(unread_count=expected)
+    for uid, n in counts.items():  # utilisateurs sans ligne d'état
+        NotificationState.objects.update_or_create(user_id=uid, defaults={"unread_count": n})
+        drift[uid] = (0, n)
+    return drift
+
+
+def purge_broadcasts(cutoff):
+    """
+    Supprime les diffusions antérieures à `cutoff` et leurs lectures unitaires ;
+    retourne le nombre de diffusions supprimées. Les états encore en deçà passent
+    à `cutoff` : rien d'antérieur ne subsiste, le badge reste identique.
+    """
+    from core.cache import bump
+    old = BroadcastNotification.objects.filter(created_at__lt=cutoff)
+    audiences = list(old.values_list("audience", flat=True).distinct())
+    with transaction.atomic():
+        # DELETE direct plutôt que la cascade (qui chargerait chaque lecture)
+        BroadcastRead.objects.filter(broadcast__in=old).delete()
+        _, deleted = old.delete()
+        NotificationState.objects.filter(broadcasts_read_until__lt=cutoff).update(broadcasts_read_until=cutoff)
+    bump(*(f"broadcasts:{a}" for a in audiences))
+    return deleted.get(BroadcastNotification._meta.label, 0)
+
+
+def mark_broadcast_read(user, broadcast):
+    state = get_state(user)
+    if broadcast.created_at > state.broadcasts_read_until:
+        BroadcastRead.objects.get_or_create(user=user, broadcast=broadcast)
@@ -3,10 +3,11 @@ from django.utils import timezone
 from datetime import timedelta
 
 from notifications.models import Notification
+from notifications.inbox import purge_broadcasts, repair_counters
 
 
 class Command(BaseCommand):
-    help = "Purge old notifications (default: older than 90 days)."
+    help = "Purge old notifications and broadcasts (default: older than 90 days)."
 
     def add_arguments(self, parser):
         parser.add_argument("--days", type=int, default=90, help="Delete notifications older than N days (default 90)")
@@ -16,6 +17,13 @@ class Command(BaseCommand):
         cutoff = timezone.now() - timedelta(days=days)
         qs = Notification.objects.filter(created_at__lt=cutoff)
         count = qs.count()
+        # des non-lues peuvent partir avec la purge : on recale leurs compteurs
+        affected = list(qs.filter(is_read=False).values_list("recipient_id", flat=True).distinct())
         qs.delete()
-        self.stdout.write(self.style.SUCCESS(f"Deleted {count} notifications older than {days} days."))
+        if affected:
+            repair_counters(affected)
+        broadcasts = purge_broadcasts(cutoff)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {count} notifications and {broadcasts} broadcasts older than {days} days."
+        ))
 
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from notifications.inbox import repair_counters
+
+
+class Command(BaseCommand):
+    help = "Recalculate the denormalized unread-notification counters (NotificationState.unread_count)."
+
+    def handle(self, *args, **options):
+        drift = repair_counters()
+        for user_id, (before, after) in sorted(drift.items()):
+            self.stdout.write(f"user #{user_id}: {before} → {after}")
+        self.stdout.write(self.style.SUCCESS(f"{len(drift)} counter(s) repaired."))
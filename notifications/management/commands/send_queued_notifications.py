@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.fanout import drain
+
+
+class Command(BaseCommand):
+    help = "Écrit les diffusions de notifications en attente (FanoutJob, NOTIFICATIONS_ASYNC=1) par lots."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Tourne en continu (worker)")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Pause entre deux passes à vide en mode --loop (s)")
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                done, failed = drain()
+                if done or failed:
+                    self.stdout.write(self.style.SUCCESS(f"{done} diffusion(s) écrite(s), {failed} échec(s)."))
+                if not options["loop"]:
+                    break
+                if not (done or failed):
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:11
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_counts(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationState = apps.get_model("notifications", "NotificationState")
+    counts = (Notification.objects.filter(is_read=False)
+              .values("recipient_id").annotate(n=Count("id")))
+    for row in counts.iterator():
+        NotificationState.objects.update_or_create(
+            user_id=row["recipient_id"], defaults={"unread_count": row["n"]},
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('notifications', '0002_broadcasts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationstate',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='notificationstate',
+            name='broadcasts_read_until',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notificatio_recipie_a972ce_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', 'is_read', '-created_at'], name='notificatio_recipie_684eac_idx'),
+        ),
+        migrations.RunPython(backfill_unread_counts, migrations.RunPython.noop),
+    ]
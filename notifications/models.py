@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 
@@ -32,6 +33,107 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # liste (toutes) et liste filtrée lues / non lues, triées par date
+            models.Index(fields=["recipient", "-created_at"]),
+            models.Index(fields=["recipient", "is_read", "-created_at"]),
+        ]
 
     def __str__(self):
         return f"{self.verb} • {self.title or self.target}"
+
+    @property
+    def is_broadcast(self):
+        return False
+
+    def get_open_url(self):
+        from django.urls import reverse
+        return reverse("notifications:open", args=[self.pk])
+
+
+class BroadcastNotification(models.Model):
+    """
+    Notification stockée une seule fois pour toute une audience (ex: tout le staff).
+    L'état "lu" est calculé à la lecture : horodatage de NotificationState
+    (tout ce qui est antérieur est lu) + BroadcastRead pour les ouvertures unitaires.
+    """
+    class Audience(models.TextChoices):
+        STAFF = "staff", "Tout le staff"
+
+    audience = models.CharField(max_length=20, choices=Audience.choices, default=Audience.STAFF)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="broadcast_actions"
+    )
+    verb = models.CharField(max_length=20, choices=Notification.Verb.choices)
+
+    target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    target_object_id = models.PositiveIntegerField()
+    target = GenericForeignKey("target_content_type", "target_object_id")
+
+    title = models.CharField(max_length=200, blank=True)
+    message = models.TextField(blank=True)
+    url = models.CharField(max_length=500, blank=True)  # lien résolu pour le rôle staff
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["audience", "-created_at"])]
+
+    def __str__(self):
+        return f"[{self.audience}] {self.verb} • {self.title or self.target}"
+
+    @property
+    def is_broadcast(self):
+        return True
+
+    def get_open_url(self):
+        from django.urls import reverse
+        return reverse("notifications:open_broadcast", args=[self.pk])
+
+
+class BroadcastRead(models.Model):
+    """Lecture unitaire d'une diffusion (au-delà de l'horodatage de NotificationState)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="broadcast_reads")
+    broadcast = models.ForeignKey(BroadcastNotification, on_delete=models.CASCADE, related_name="reads")
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [("user", "broadcast")]
+
+
+class NotificationState(models.Model):
+    """
+    État par utilisateur :
+    - unread_count : compteur dénormalisé des notifications directes non lues (badge en O(1)),
+      corrigé au besoin par `manage.py notifications_repair_counters` ;
+    - broadcasts_read_until : toute diffusion créée avant cette date est lue.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="notification_state")
+    unread_count = models.PositiveIntegerField(default=0)
+    broadcasts_read_until = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"État notifications — {self.user}"
+
+
+class FanoutJob(models.Model):
+    """
+    Diffusion en attente (NOTIFICATIONS_ASYNC=1, cf. notifications/fanout.py), enregistrée
+    dans la transaction de l'action métier : `manage.py send_queued_notifications` l'écrit
+    par lots. `done` avance avec chaque lot : après un arrêt, la reprise saute les
+    destinataires déjà servis. La ligne est supprimée une fois la diffusion terminée.
+    """
+    payload = models.JSONField()
+    done = models.PositiveIntegerField(default=0)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["next_attempt_at", "id"]
+        indexes = [models.Index(fields=["next_attempt_at"])]
+
+    def __str__(self):
+        return f"Diffusion #{self.pk} ({self.done}/{len(self.payload.get('recipients', []))})"
@@ -1,12 +1,15 @@
 from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from django.forms.models import model_to_dict
 from django.conf import settings
-from django.core.mail import send_mail
+from core.mail import enqueue_mail
 
-from .utils import send_notification, recipients_for
+from .utils import send_notification, notify_staff
 from .models import Notification
 from core.middleware import get_current_user
+from core.signals import signals_suspended
+from core.tracking import track_fields
+from core import cache as shared_cache
+from django.contrib.auth import get_user_model
 
 # Observed models
 from core.models import Project, Event
@@ -24,10 +27,12 @@ WATCHED_FIELDS = {
 }
 
 
-def _snapshot(instance):
-    fields = WATCHED_FIELDS.get(instance.__class__, [])
-    data = model_to_dict(instance, fields=fields)
-    return {k: (str(v) if v is not None else "") for k, v in data.items()}
+# Suivi en mémoire (core.tracking) : plus de SELECT en pre_save
+for _model, _fields in WATCHED_FIELDS.items():
+    track_fields(_model, _fields)
+
+# Les receivers de notification sortent tout de suite sous suspend_signals() :
+# pendant une opération en masse, l'appelant notifie lui-même, une fois pour le lot.
 
 
 @receiver(pre_save, sender=Project)
@@ -36,32 +41,26 @@ def _snapshot(instance):
 @receiver(pre_save, sender=MissionSignup)
 @receiver(pre_save, sender=UserDocument)
 @receiver(pre_save, sender=VolunteerApplication)
-def _capture_changes(sender, instance, **kwargs):
-    if instance.pk:
-        try:
-            old = sender.objects.get(pk=instance.pk)
-            old_snap = _snapshot(old)
-            new_snap = _snapshot(instance)
-            diff = {k: {"old": old_snap[k], "new": new_snap[k]} for k in new_snap if old_snap.get(k) != new_snap.get(k)}
-            setattr(instance, "_pending_changes", diff)
-        except sender.DoesNotExist:
-            setattr(instance, "_pending_changes", {})
-    else:
-        setattr(instance, "_pending_changes", {})
+def _capture_changes(sender, instance, update_fields=None, **kwargs):
+    if signals_suspended():
+        return
+    # seuls les champs surveillés ici : d'autres modules suivent aussi des champs sur ces modèles
+    instance._pending_changes = instance.tracked_changes(update_fields=update_fields,
+                                                         fields=WATCHED_FIELDS[sender])
 
 
 @receiver(post_save, sender=Project)
 @receiver(post_save, sender=Event)
 @receiver(post_save, sender=Mission)
 def _notify_create_update(sender, instance, created, **kwargs):
+    if signals_suspended():
+        return
     actor = get_current_user()
-    recipients = list(recipients_for(instance))
 
     if created:
         title = f"{sender.__name__} créé"
         message = getattr(instance, "title", str(instance)) or str(instance)
-        send_notification(
-            recipients=recipients,
+        notify_staff(
             actor=actor,
             verb=Notification.Verb.CREATED,
             target=instance,
@@ -74,8 +73,7 @@ def _notify_create_update(sender, instance, created, **kwargs):
             changed_keys = ", ".join(changes.keys())
             title = f"{sender.__name__} modifié"
             message = f"Changements: {changed_keys}"
-            send_notification(
-                recipients=recipients,
+            notify_staff(
                 actor=actor,
                 verb=Notification.Verb.UPDATED,
                 target=instance,
@@ -86,6 +84,8 @@ def _notify_create_update(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=MissionSignup)
 def _notify_signup(sender, instance: MissionSignup, created, **kwargs):
+    if signals_suspended():
+        return
     actor = get_current_user()
     u = getattr(getattr(instance, "volunteer", None), "user", None)
     if not u:
@@ -103,16 +103,13 @@ def _notify_signup(sender, instance: MissionSignup, created, **kwargs):
         )
         # Notify staff if the action was initiated by a volunteer (not staff)
         if not getattr(actor, "is_staff", False):
-            staff = list(recipients_for(getattr(instance, "mission", instance)))
-            if staff:
-                send_notification(
-                    recipients=staff,
-                    actor=actor,
-                    verb=Notification.Verb.CREATED,
-                    target=getattr(instance, "mission", instance),
-                    title="Nouvelle inscription a une mission",
-                    message=f"{getattr(u, 'get_full_name', lambda: u.username)()} sur '{title}'",
-                )
+            notify_staff(
+                actor=actor,
+                verb=Notification.Verb.CREATED,
+                target=getattr(instance, "mission", instance),
+                title="Nouvelle inscription a une mission",
+                message=f"{getattr(u, 'get_full_name', lambda: u.username)()} sur '{title}'",
+            )
     else:
         changes = getattr(instance, "_pending_changes", {}) or {}
         if "status" in changes:
@@ -135,34 +132,30 @@ def _notify_signup(sender, instance: MissionSignup, created, **kwargs):
                 message="",
             )
             if not getattr(actor, "is_staff", False):
-                staff = list(recipients_for(getattr(instance, "mission", instance)))
-                if staff:
-                    send_notification(
-                        recipients=staff,
-                        actor=actor,
-                        verb=Notification.Verb.UPDATED,
-                        target=getattr(instance, "mission", instance),
-                        title=f"Statut d'inscription modifie ({label})",
-                        message=f"{getattr(u, 'get_full_name', lambda: u.username)()} sur '{title}'",
-                    )
+                notify_staff(
+                    actor=actor,
+                    verb=Notification.Verb.UPDATED,
+                    target=getattr(instance, "mission", instance),
+                    title=f"Statut d'inscription modifie ({label})",
+                    message=f"{getattr(u, 'get_full_name', lambda: u.username)()} sur '{title}'",
+                )
 
 
 @receiver(post_save, sender=UserDocument)
 def _notify_document(sender, instance: UserDocument, created, **kwargs):
+    if signals_suspended():
+        return
     actor = get_current_user()
     if created:
         # Volunteer uploaded a new document -> notify staff
         if not getattr(actor, "is_staff", False):
-            staff = list(recipients_for(instance))
-            if staff:
-                send_notification(
-                    recipients=staff,
-                    actor=actor,
-                    verb=Notification.Verb.CREATED,
-                    target=instance,
-                    title="Nouveau document utilisateur",
-                    message=getattr(instance, "name", ""),
-                )
+            notify_staff(
+                actor=actor,
+                verb=Notification.Verb.CREATED,
+                target=instance,
+                title="Nouveau document utilisateur",
+                message=getattr(instance, "name", ""),
+            )
         return
     u = getattr(instance, "user", None)
     if not u:
@@ -184,33 +177,32 @@ def _notify_document(sender, instance: UserDocument, created, **kwargs):
 
 @receiver(post_save, sender=VolunteerApplication)
 def _notify_application(sender, instance: VolunteerApplication, created, **kwargs):
+    if signals_suspended():
+        return
     actor = get_current_user()
     if created:
         # New application submitted by a candidate -> notify staff (in‑app + email)
-        staff = list(recipients_for(instance))
-        if staff:
+        try:
+            u = getattr(instance, "user", None)
+            full_name = u.get_full_name() if u and hasattr(u, "get_full_name") else (u.username if u else "")
+        except Exception:
+            full_name = ""
+        notify_staff(
+            actor=actor,
+            verb=Notification.Verb.CREATED,
+            target=instance,
+            title="Nouvelle candidature",
+            message=full_name,
+        )
+        # Optional email alert to SUPPORT_EMAIL
+        support_email = getattr(settings, "SUPPORT_EMAIL", "")
+        if support_email:
             try:
-                u = getattr(instance, "user", None)
-                full_name = u.get_full_name() if u and hasattr(u, "get_full_name") else (u.username if u else "")
+                subj = "[BWF] Nouvelle candidature bénévole"
+                body = f"Candidat: {full_name}\nID: {getattr(instance, 'pk', '')}"
+                enqueue_mail(subj, body, getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@localhost"), [support_email])
             except Exception:
-                full_name = ""
-            send_notification(
-                recipients=staff,
-                actor=actor,
-                verb=Notification.Verb.CREATED,
-                target=instance,
-                title="Nouvelle candidature",
-                message=full_name,
-            )
-            # Optional email alert to SUPPORT_EMAIL
-            support_email = getattr(settings, "SUPPORT_EMAIL", "")
-            if support_email:
-                try:
-                    subj = "[BWF] Nouvelle candidature bénévole"
-                    body = f"Candidat: {full_name}\nID: {getattr(instance, 'pk', '')}"
-                    send_mail(subj, body, getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@localhost"), [support_email], fail_silently=True)
-                except Exception:
-                    pass
+                pass
         return
     u = getattr(instance, "user", None)
     if not u:
@@ -230,32 +222,29 @@ def _notify_application(sender, instance: VolunteerApplication, created, **kwarg
         )
         # If candidate updated (not staff), also alert staff
         if not getattr(actor, "is_staff", False):
-            staff = list(recipients_for(instance))
-            if staff:
-                try:
-                    full_name2 = u.get_full_name() if hasattr(u, "get_full_name") else u.username
-                except Exception:
-                    full_name2 = ""
-                send_notification(
-                    recipients=staff,
-                    actor=actor,
-                    verb=Notification.Verb.UPDATED,
-                    target=instance,
-                    title=f"Candidature mise a jour ({labels.get(new, str(new))})",
-                    message=full_name2,
-                )
+            try:
+                full_name2 = u.get_full_name() if hasattr(u, "get_full_name") else u.username
+            except Exception:
+                full_name2 = ""
+            notify_staff(
+                actor=actor,
+                verb=Notification.Verb.UPDATED,
+                target=instance,
+                title=f"Candidature mise a jour ({labels.get(new, str(new))})",
+                message=full_name2,
+            )
 
 
 @receiver(post_delete, sender=Project)
 @receiver(post_delete, sender=Event)
 @receiver(post_delete, sender=Mission)
 def _notify_delete(sender, instance, **kwargs):
+    if signals_suspended():
+        return
     actor = get_current_user()
-    recipients = list(recipients_for(instance))
     title = f"{sender.__name__} supprimé"
     message = getattr(instance, "title", str(instance)) or str(instance)
-    send_notification(
-        recipients=recipients,
+    notify_staff(
         actor=actor,
         verb=Notification.Verb.DELETED,
         target=instance,
@@ -264,3 +253,10 @@ def _notify_delete(sender, instance, **kwargs):
     )
 
 
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def _on_user_change(sender, instance, update_fields=None, **kwargs):
+    # is_active / is_staff peuvent changer : invalide l'ensemble des destinataires staff en cache
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    shared_cache.bump("users")
@@ -1,7 +1,7 @@
 # Crée le dossier templatetags si besoin + __init__.py vide
 from django import template
 from django.contrib.auth.models import AnonymousUser
-from ..models import Notification
+from .. import inbox
 
 register = template.Library()
 
@@ -10,9 +10,6 @@ def notifications_menu(context, limit=8):
     request = context.get("request")
     if not request or isinstance(request.user, AnonymousUser) or not request.user.is_authenticated:
         return {"items": [], "unread_count": 0, "request": request}
-    qs = (Notification.objects
-          .filter(recipient=request.user)
-          .select_related("actor")
-          .order_by("-created_at")[:limit])
-    unread = Notification.objects.filter(recipient=request.user, is_read=False).count()
-    return {"items": qs, "unread_count": unread, "request": request}
+    items = inbox.items(request.user, limit=limit)
+    unread = inbox.unread_count(request.user)
+    return {"items": items, "unread_count": unread, "request": request}
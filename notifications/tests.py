@@ -1,3 +1,144 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Event
+from staff.models import Mission
+
+from . import fanout
+from .models import BroadcastNotification, BroadcastRead, FanoutJob, Notification, NotificationState
+
+
+class WatchedFieldsBroadcastTests(TestCase):
+    """Seuls les champs de WATCHED_FIELDS déclenchent la diffusion « <Modèle> modifié »."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.event = Event.objects.create(title="Collecte", date=date(2030, 5, 1), description="…")
+        cls.other_event = Event.objects.create(title="Maraude", date=date(2030, 6, 1), description="…")
+        cls.mission = Mission.objects.create(title="Accueil", event=cls.event)
+
+    def _save(self, instance, **changes):
+        for name, value in changes.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            instance.save()
+        return list(BroadcastNotification.objects.values_list("title", "message"))
+
+    def test_watched_field_broadcasts(self):
+        mission = Mission.objects.get(pk=self.mission.pk)
+        self.assertEqual(self._save(mission, title="Accueil du public"),
+                         [("Mission modifié", "Changements: title")])
+
+    def test_mission_description_only_sends_nothing(self):
+        # description : suivie pour le fil d'activité, pas surveillée ici
+        mission = Mission.objects.get(pk=self.mission.pk)
+        self.assertEqual(self._save(mission, description="Nouvelle description"), [])
+
+    def test_mission_event_change_sends_nothing(self):
+        mission = Mission.objects.get(pk=self.mission.pk)
+        self.assertEqual(self._save(mission, event=self.other_event), [])
+
+    def test_unwatched_fields_only_report_watched_ones(self):
+        mission = Mission.objects.get(pk=self.mission.pk)
+        self.assertEqual(self._save(mission, description="…", location="Salle B"),
+                         [("Mission modifié", "Changements: location")])
+
+    def test_event_date_change_sends_nothing(self):
+        # date : suivie pour Mission.effective_date, pas surveillée ici
+        event = Event.objects.get(pk=self.event.pk)
+        self.assertEqual(self._save(event, date=date(2030, 5, 2)), [])
+        self.mission.refresh_from_db()
+        self.assertEqual(self.mission.effective_date, date(2030, 5, 2))
+
+
+class PurgeBroadcastsTests(TestCase):
+    """notifications_purge supprime aussi les diffusions anciennes et leurs lectures."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="staff", password="x")
+        self.event = Event.objects.create(title="Collecte", date=date(2030, 5, 1), description="…")
+        now = timezone.now()
+        self.old = self._broadcast(now - timedelta(days=120))
+        self.recent = self._broadcast(now - timedelta(days=10))
+        BroadcastRead.objects.create(user=self.user, broadcast=self.old)
+        BroadcastRead.objects.create(user=self.user, broadcast=self.recent)
+        NotificationState.objects.create(user=self.user, broadcasts_read_until=now - timedelta(days=200))
+
+    def _broadcast(self, created_at):
+        b = BroadcastNotification.objects.create(
+            verb="updated", title="Event modifié",
+            target_content_type=ContentType.objects.get_for_model(Event), target_object_id=self.event.pk,
+        )
+        BroadcastNotification.objects.filter(pk=b.pk).update(created_at=created_at)
+        return b
+
+    def test_purge_removes_old_broadcasts_and_reads(self):
+        out = StringIO()
+        call_command("notifications_purge", days=90, stdout=out)
+        self.assertIn("1 broadcasts", out.getvalue())
+        self.assertQuerySetEqual(BroadcastNotification.objects.all(), [self.recent])
+        self.assertQuerySetEqual(BroadcastRead.objects.values_list("broadcast_id", flat=True), [self.recent.pk])
+
+        # l'horodatage de lecture ne pointe plus avant la fenêtre purgée ; la diffusion récente reste non lue
+        state = NotificationState.objects.get(user=self.user)
+        self.assertGreater(state.broadcasts_read_until, timezone.now() - timedelta(days=91))
+        self.assertLess(state.broadcasts_read_until, BroadcastNotification.objects.get().created_at)
+
+
+@override_settings(NOTIFICATIONS_ASYNC=True, NOTIFICATIONS_BATCH_SIZE=2)
+class QueuedFanoutTests(TestCase):
+    """NOTIFICATIONS_ASYNC=1 : diffusion durable (FanoutJob), reprise sans doublon après un échec."""
+
+    def setUp(self):
+        User = get_user_model()
+        self.users = [User.objects.create_user(username=f"u{i}", password="x") for i in range(3)]
+        self.event = Event.objects.create(title="Collecte", date=date(2030, 5, 1), description="…")
+
+    def test_job_is_queued_with_the_transaction(self):
+        fanout.fanout(recipients=self.users, actor=None, verb="created", target=self.event, title="Nouvel événement")
+        self.assertEqual(FanoutJob.objects.count(), 1)
+        self.assertFalse(Notification.objects.exists())
+
+        self.assertEqual(fanout.drain(), (1, 0))
+        self.assertFalse(FanoutJob.objects.exists())
+        self.assertEqual(Notification.objects.count(), 3)
+        self.assertEqual(sorted(NotificationState.objects.values_list("unread_count", flat=True)), [1, 1, 1])
+
+    def test_failed_batch_is_retried_from_where_it_stopped(self):
+        fanout.fanout(recipients=self.users, actor=None, verb="created", target=self.event, title="Nouvel événement")
+        bulk_create = Notification.objects.bulk_create
+        calls = []
+
+        def _flaky(batch, *args, **kwargs):
+            calls.append(len(batch))
+            if len(calls) == 2:
+                raise RuntimeError("connexion perdue")
+            return bulk_create(batch, *args, **kwargs)
+
+        with mock.patch.object(Notification.objects, "bulk_create", side_effect=_flaky), \
+                self.assertLogs("notifications.fanout", "ERROR"):
+            self.assertEqual(fanout.drain(), (0, 1))
+        job = FanoutJob.objects.get()
+        self.assertEqual((job.done, job.attempts), (2, 1))
+        self.assertIn("connexion perdue", job.last_error)
+        self.assertGreater(job.next_attempt_at, timezone.now())  # backoff : pas repris tout de suite
+        self.assertEqual(fanout.drain(), (0, 0))
+
+        FanoutJob.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(fanout.drain(), (1, 0))
+        self.assertEqual(sorted(Notification.objects.values_list("recipient_id", flat=True)),
+                         sorted(u.pk for u in self.users))  # chaque destinataire une seule fois
+        self.assertFalse(FanoutJob.objects.exists())
+
+    def test_claimed_job_is_leased(self):
+        fanout.fanout(recipients=self.users, actor=None, verb="created", target=self.event)
+        job = fanout.claim_job()
+        self.assertIsNotNone(job)
+        self.assertIsNone(fanout.claim_job())  # bail en cours : pas de seconde prise
@@ -6,4 +6,5 @@ urlpatterns = [
     path("", views.list_notifications, name="list"),
     path("read-all/", views.mark_all_read, name="read_all"),
     path("open/<int:pk>/", views.open_notification, name="open"),
+    path("open/b/<int:pk>/", views.open_broadcast, name="open_broadcast"),
 ]
@@ -1,9 +1,5 @@
-from django.contrib.contenttypes.models import ContentType
-from django.db import transaction
 from django.urls import reverse
 
-from .models import Notification
-
 
 def safe_url_for(obj):
     # 1) Priorité au get_absolute_url (gère slug/PK selon ton URLconf)
@@ -85,47 +81,27 @@ def url_for_recipient(target, user):
 
 def recipients_for(obj):
     """
-    DǸtermine qui re��oit la notif. �? ajuster selon ta logique:
-    - Staff (TeamMember) pour tout
-    - + Ǹventuellement watchers, inscrits, etc.
+    Détermine qui reçoit la notif : le staff (TeamMember actifs), ensemble
+    en cache (cf. fanout.staff_recipients).
     """
-    from django.contrib.auth import get_user_model
-    User = get_user_model()
-
-    # Exemple : tous les membres d�?TǸquipe actifs (via TeamMember.user)
-    try:
-        from core.models import TeamMember  # ou staff.models selon ton projet
-        staff_user_ids = TeamMember.objects.values_list("user_id", flat=True)
-        qs = User.objects.filter(id__in=staff_user_ids, is_active=True)
-    except Exception:
-        qs = User.objects.filter(is_staff=True, is_active=True)
-
-    # TODO: Ǹtendre selon le type d�?Tobjet (ex: pour Mission publiǸe -> bǸnǸvoles, inscrits, watchers...)
-    return qs.distinct()
+    from .fanout import staff_recipients
+    return staff_recipients()
 
 
 def send_notification(*, recipients, actor, verb, target, title="", message=""):
-    if not recipients:
+    """
+    Compatibilité : délègue au moteur de diffusion par lots (notifications/fanout.py),
+    qui matérialise `recipients` (liste ou QuerySet) une seule fois et ignore un lot vide.
+    """
+    if recipients is None:
         return
-    ctype = ContentType.objects.get_for_model(target.__class__)
-    payload = []
-    for u in recipients:
-        # Ǹvite d�?Tauto-notifier l�?Tauteur
-        if actor is not None and u.pk == getattr(actor, "pk", None):
-            continue
-        url = url_for_recipient(target, u) or safe_url_for(target)
-        payload.append(
-            Notification(
-                recipient=u,
-                actor=actor,
-                verb=verb,
-                target_content_type=ctype,
-                target_object_id=target.pk,
-                title=title,
-                message=message,
-                url=url,
-            )
-        )
-    # �%vite la notif avant commit DB :
-    if payload:
-        transaction.on_commit(lambda: Notification.objects.bulk_create(payload))
+    from .fanout import fanout
+    fanout(recipients=recipients, actor=actor, verb=verb, target=target, title=title, message=message)
+
+
+def notify_staff(*, actor, verb, target, title="", message=""):
+    """Événement destiné à tout le staff : une diffusion unique (lue à la demande)."""
+    from .fanout import broadcast
+    from .models import BroadcastNotification
+    broadcast(audience=BroadcastNotification.Audience.STAFF, actor=actor, verb=verb,
+              target=target, title=title, message=message)
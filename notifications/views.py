@@ -1,7 +1,9 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
-from .models import Notification
-from django.http import HttpResponse
+from .models import Notification, BroadcastNotification
+from django.http import HttpResponse, Http404
+from core.cache import bump_user
+from . import inbox
 
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib import messages
@@ -9,13 +11,16 @@ from django.contrib import messages
 
 @login_required
 def list_notifications(request):
-    qs = Notification.objects.filter(recipient=request.user).select_related("actor")
-    return render(request, "notifications/list.html", {"notifications": qs})
+    # Notifications directes + diffusions (staff) fusionnées par date
+    read = {"0": False, "1": True}.get(request.GET.get("read"))
+    page_obj = inbox.page(request.user, read=read, cursor=request.GET.get("cursor"))
+    return render(request, "notifications/list.html", {"notifications": page_obj.object_list, "page_obj": page_obj})
 
 
 @login_required
 def mark_all_read(request):
-    Notification.objects.filter(recipient=request.user, is_read=False).update(is_read=True)
+    inbox.mark_all_read(request.user)
+    bump_user(request.user.pk)
     if request.method == "POST":
         return HttpResponse(status=204)
     from django.shortcuts import redirect
@@ -28,8 +33,8 @@ def open_notification(request, pk):
 
     # marque comme lu
     if not n.is_read:
-        n.is_read = True
-        n.save(update_fields=["is_read"])
+        inbox.mark_read(n)  # décrémente aussi le compteur du badge
+        bump_user(request.user.pk)
 
     # Choix du lien: staff -> privilégie l'URL stockée par-notif; bénévole -> cible directe d'abord
     url = ""
@@ -55,3 +60,24 @@ def open_notification(request, pk):
     messages.warning(request, "Cet élément n'existe plus ou n'est pas accessible.")
     return redirect("notifications:list")
 
+
+
+@login_required
+def open_broadcast(request, pk):
+    b = get_object_or_404(BroadcastNotification, pk=pk)
+    if b.audience not in inbox.audiences_for(request.user):
+        raise Http404()
+    inbox.mark_broadcast_read(request.user, b)
+    bump_user(request.user.pk)
+
+    url = b.url or ""
+    if not url and b.target:
+        try:
+            url = b.target.get_absolute_url()
+        except Exception:
+            url = ""
+    if url:
+        return redirect(url)
+
+    messages.warning(request, "Cet élément n'existe plus ou n'est pas accessible.")
+    return redirect("notifications:list")
@@ -1,8 +1,9 @@
 from django.conf import settings
 from django.db import models
 from django.utils import timezone
+from core.tracking import TrackedFieldsMixin
 
-class Payment(models.Model):
+class Payment(TrackedFieldsMixin, models.Model):
     class Provider(models.TextChoices):
         CINETPAY = "CINETPAY", "CinetPay"
         FLUTTERWAVE = "FLUTTERWAVE", "Flutterwave"
@@ -3,6 +3,8 @@ from .models import Mission, MissionSignup, VolunteerApplication
 from .security.models import AuthorizationKey, AuthorizationKeyUse
 from django.utils import timezone
 
+from core import cache as content_cache
+
 
 class MissionSignupInline(admin.TabularInline):
     model = MissionSignup
@@ -57,14 +59,23 @@ class VolunteerApplicationAdmin(admin.ModelAdmin):
     date_hierarchy = "submitted_at"
     actions = ["approve_applications", "reject_applications"]
 
+    def _review(self, queryset, status):
+        user_ids = list(queryset.values_list("user_id", flat=True))
+        updated = queryset.update(status=status, reviewed_at=timezone.now())
+        # update() n'envoie pas post_save : mêmes invalidations que _on_application_change
+        # (badge staff, contexte des candidats)
+        content_cache.bump("applications")
+        content_cache.bump_user(*user_ids)
+        return updated
+
     @admin.action(description="Approuver les candidatures sélectionnées")
     def approve_applications(self, request, queryset):
-        updated = queryset.update(status='approved', reviewed_at=timezone.now())
+        updated = self._review(queryset, 'approved')
         self.message_user(request, f"{updated} candidatures approuvées.")
 
     @admin.action(description="Rejeter les candidatures sélectionnées")
     def reject_applications(self, request, queryset):
-        updated = queryset.update(status='rejected', reviewed_at=timezone.now())
+        updated = self._review(queryset, 'rejected')
         self.message_user(request, f"{updated} candidatures rejetées.")
 
 admin.site.site_header = "Administration WBF"
\ No newline at end of file
@@ -0,0 +1,251 @@
+# staff/dashboard.py
+"""
+Instantané des KPIs du dashboard staff.
+
+Tous les indicateurs partagés (compteurs, séries, listes « à traiter ») sont
+calculés en quelques requêtes groupées puis mis en cache STAFF_DASHBOARD_TTL
+secondes. Le recalcul est « single-flight » : une seule requête prend le
+verrou (cache.add) et recalcule ; les autres servent l'instantané précédent,
+même périmé, plutôt que de relancer le calcul en parallèle.
+
+Les parties propres à l'utilisateur (notifications, compteur non lu) ne sont
+pas dans l'instantané : cf. staff.views.staff_dashboard.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .services import fill_rate, signup_count_annotations
+
+SNAPSHOT_KEY = "staff:dashboard:snapshot"
+LOCK_KEY = "staff:dashboard:lock"
+LOCK_TIMEOUT = 60   # s : un calcul planté ne bloque pas indéfiniment
+WAIT_TIMEOUT = 5.0  # s : attente max d'un calcul en cours quand il n'y a rien à servir
+STALE_FACTOR = 10   # l'instantané reste servable (périmé) 10×TTL
+
+
+def _ttl():
+    return getattr(settings, "STAFF_DASHBOARD_TTL", 120)
+
+
+def _date_range_display(sd, ed):
+    sd_d = sd.date() if hasattr(sd, "date") else sd
+    ed_d = ed.date() if hasattr(ed, "date") else ed
+    if sd_d and ed_d and sd_d != ed_d:
+        return f"{sd_d:%d/%m/%Y} → {ed_d:%d/%m/%Y}"
+    if sd_d:
+        return f"{sd_d:%d/%m/%Y}"
+    return "Dates à confirmer"
+
+
+def compute():
+    """Calcule l'instantané (dict de types simples)."""
+    from accounts.models import UserDocument
+    from core.models import Event, Project, SiteStats, DailyHours, DailyVolunteerHours, DailySignups, DailyPayments
+    from staff.models import Mission, MissionSignup, VolunteerApplication, ApplicationStatus
+    try:
+        from payments.models import Payment
+    except Exception:
+        Payment = None
+
+    today = timezone.localdate()
+    start_month = today.replace(day=1)
+    start_30 = today - timedelta(days=29)
+    seven_days_ago = today - timedelta(days=7)
+    doc_review_statuses = ["submitted", "under_review"]
+    has_doc_status = hasattr(UserDocument, "status")
+
+    # -------- KPIs : un agrégat conditionnel par table --------
+    missions = Mission.objects.aggregate(
+        total=Count("id"),
+        published=Count("id", filter=Q(status="published")),
+    )
+    # chaque inscription est dans exactement un agrégat (jour de création, statut courant)
+    signups = DailySignups.objects.aggregate(
+        total=Sum("count"),
+        pending=Sum("count", filter=Q(status=MissionSignup.Status.PENDING)),
+    )
+    doc_aggs = {"total": Count("id")}
+    if has_doc_status:
+        doc_aggs["pending"] = Count("id", filter=Q(status__in=doc_review_statuses))
+    docs = UserDocument.objects.aggregate(**doc_aggs)
+
+    # -------- Heures : série 30 jours (agrégats journaliers ; les KPIs 7 jours en découlent) --------
+    raw = DailyHours.objects.filter(date__range=[start_30, today]).values("date", "hours", "entries")
+    by_date = {}
+    hours_7d = 0
+    hours_entries_7d = 0
+    for row in raw:
+        by_date[row["date"]] = float(row["hours"] or 0.0)
+        if row["date"] >= seven_days_ago:
+            hours_7d += row["hours"] or 0
+            hours_entries_7d += row["entries"]
+    max_val = max([0.0] + list(by_date.values()))
+    hours_series = []
+    for i in range(30):
+        d = start_30 + timedelta(days=i)
+        v = float(by_date.get(d, 0.0))
+        pct = 0 if max_val == 0 else int(round((v / max_val) * 100))
+        hours_series.append({"date": d, "value": v, "height": pct})
+
+    payments_7d = {"count": 0, "amount": 0}
+    payments = []
+    if Payment:
+        payments_7d = DailyPayments.objects.filter(date__gte=seven_days_ago).aggregate(
+            count=Sum("count"),
+            amount=Sum("amount", filter=Q(status=Payment.Status.ACCEPTED)),
+        )
+        payments = list(Payment.objects
+                        .order_by("-created_at")
+                        .values("id", "amount", "currency", "status", "provider", "created_at")[:5])
+
+    stats = {
+        "missions": missions["total"],
+        "missions_published": missions["published"],
+        "signups": signups["total"] or 0,
+        "signups_pending": signups["pending"] or 0,
+        "events_upcoming": Event.objects.filter(date__gte=today).count(),
+        "projects": Project.objects.count(),
+        "volunteers": SiteStats.get().total_volunteers,  # compteur dénormalisé
+        "docs_total": docs["total"],
+        "docs_submitted": docs.get("pending", 0),
+        "applications_pending": VolunteerApplication.objects.filter(status=ApplicationStatus.PENDING).count(),
+        "hours_entries_7d": hours_entries_7d,
+        "hours_7d": hours_7d,
+        "payments_7d_count": payments_7d["count"] or 0,
+        "payments_7d_amount": payments_7d["amount"] or 0,
+    }
+
+    # -------- Missions à venir/en cours + taux de remplissage --------
+    missions_qs = (
+        Mission.objects.filter(status="published")
+        .filter(Q(effective_date__gte=today) | Q(end_date__date__gte=today))  # à venir ou en cours
+        .annotate(**signup_count_annotations(MissionSignup.Status.ACCEPTED))
+        .select_related("event")
+        .order_by("effective_date", "start_date", "end_date")[:8]
+    )
+    upcoming = []
+    for m in missions_qs:
+        cap = m.capacity or 0
+        acc = m.accepted_count or 0
+        upcoming.append({
+            "mission_id": m.id,
+            "title": m.title,
+            "date": _date_range_display(m.start_date, m.end_date),
+            "location": m.location or (getattr(m.event, "location", "") or ""),
+            "accepted": acc,
+            "capacity": cap,
+            "fill_pct": fill_rate(acc, cap),
+        })
+
+    # -------- Inscriptions en attente (les plus anciennes d'abord) --------
+    pending = [{
+        "signup_id": s.id,
+        "volunteer_name": s.volunteer.display_name,
+        "mission_title": s.mission.title,
+        "created_at": s.created_at,
+    } for s in (MissionSignup.objects
+                .select_related("mission", "volunteer__user")
+                .filter(status=MissionSignup.Status.PENDING)
+                .order_by("created_at")[:10])]
+
+    # -------- Documents à vérifier --------
+    documents_review = []
+    if has_doc_status:
+        for d in (UserDocument.objects.select_related("user")
+                  .filter(status__in=doc_review_statuses)
+                  .order_by("-uploaded_at")[:8]):
+            documents_review.append({
+                "id": d.id,
+                "name": d.name or (getattr(d.file, "name", "") or "Document"),
+                "user": d.user.get_full_name() or d.user.get_username(),
+                "status": d.status,
+                "uploaded_at": d.uploaded_at,
+            })
+
+    # -------- Top bénévoles du mois (par heures) --------
+    top_volunteers = []
+    for r in (DailyVolunteerHours.objects
+              .filter(date__gte=start_month)
+              .values("volunteer", "volunteer__name",
+                      "volunteer__user__first_name", "volunteer__user__last_name")
+              .annotate(total=Sum("hours"))
+              .order_by("-total")[:5]):
+        label = r.get("volunteer__name") or f"{r.get('volunteer__user__first_name', '')} {r.get('volunteer__user__last_name', '')}".strip()
+        top_volunteers.append({"volunteer_id": r["volunteer"], "name": label or "Bénévole", "hours": r["total"] or 0})
+
+    # -------- Projets « actifs » (missions à venir via Event) --------
+    projects_rows = [{
+        "id": p.id,
+        "title": p.title,
+        "events_count": p.events_count,
+        "upcoming_missions": p.upcoming_missions,
+        "slug": p.slug,
+    } for p in (Project.objects
+                .annotate(
+                    upcoming_missions=Count(
+                        "events__missions",
+                        filter=Q(events__missions__status="published") &
+                               (Q(events__missions__effective_date__gte=today) |
+                                Q(events__missions__end_date__date__gte=today)),
+                        distinct=True,
+                    ),
+                    events_count=Count("events", distinct=True),
+                )
+                .order_by("-upcoming_missions", "title")[:5])]
+
+    return {
+        "stats": stats,
+        "upcoming": upcoming,
+        "pending": pending,
+        "documents_review": documents_review,
+        "top_volunteers": top_volunteers,
+        "hours": hours_series,
+        "projects_rows": projects_rows,
+        "payments": payments,
+    }
+
+
+def _store(data):
+    entry = {"data": data, "generated_at": timezone.now(), "fresh_until": time.time() + _ttl()}
+    cache.set(SNAPSHOT_KEY, entry, _ttl() * STALE_FACTOR)
+    return entry
+
+
+def refresh():
+    """Recalcule immédiatement (action « Rafraîchir »), sous le même verrou."""
+    got_lock = cache.add(LOCK_KEY, 1, LOCK_TIMEOUT)
+    try:
+        return _store(compute())
+    finally:
+        if got_lock:
+            cache.delete(LOCK_KEY)
+
+
+def get_snapshot():
+    """{"data", "generated_at", "fresh_until"} ; ne recalcule que si périmé, une requête à la fois."""
+    entry = cache.get(SNAPSHOT_KEY)
+    if entry is not None and entry["fresh_until"] > time.time():
+        return entry
+
+    if cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        try:
+            return _store(compute())
+        finally:
+            cache.delete(LOCK_KEY)
+
+    # Un autre process recalcule : on sert l'ancien instantané s'il existe…
+    if entry is not None:
+        return entry
+    # …sinon (démarrage à froid) on attend brièvement son résultat
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.1)
+        entry = cache.get(SNAPSHOT_KEY)
+        if entry is not None:
+            return entry
+    return _store(compute())
@@ -69,7 +69,7 @@ class MissionForm(forms.ModelForm):
         fields = [
             "title", "description", "location",
             "event", "start_date", "end_date",
-            "capacity", "status",
+            "capacity", "required_skills", "status",
         ]
         widgets = {
             "title":       forms.TextInput(attrs={"class": BASE_INPUT}),
@@ -79,6 +79,7 @@ class MissionForm(forms.ModelForm):
             "start_date":  forms.DateTimeInput(attrs={"type": "datetime-local", "class": BASE_INPUT}),
             "end_date":    forms.DateTimeInput(attrs={"type": "datetime-local", "class": BASE_INPUT}),
             "capacity":    forms.NumberInput(attrs={"class": BASE_INPUT, "min": 0}),
+            "required_skills": forms.SelectMultiple(attrs={"class": BASE_INPUT, "size": 6}),
             "status":      forms.Select(attrs={"class": BASE_INPUT}),
         }
 
@@ -99,11 +100,9 @@ class InviteFilterForm(forms.Form):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
-        # Choices dynamiques
-        days = Availability.objects.order_by().values_list("day", flat=True).distinct()
-        slots = Availability.objects.order_by().values_list("slot", flat=True).distinct()
-        self.fields["day"].choices = [("", "— Jour —")] + [(d, str(d).title()) for d in days if d]
-        self.fields["slot"].choices = [("", "— Créneau —")] + [(s, str(s).title()) for s in slots if s]
+        # Choix fixes (le filtre porte sur le masque de disponibilités, cf. accounts/availability.py)
+        self.fields["day"].choices = [("", "— Jour —")] + list(Availability.Day.choices)
+        self.fields["slot"].choices = [("", "— Créneau —")] + list(Availability.Slot.choices)
 
         # Styles dark mode
         self.fields["q"].widget.attrs.update({"class": BASE_INPUT, "placeholder": "Nom, email, téléphone…"})
@@ -130,6 +129,53 @@ class BulkInviteForm(forms.Form):
         # les choices seront injectées dans la vue selon la page courante
         self.fields["volunteer_ids"].choices = []
 
+# -------------------------------------------------------------------
+# Import d'heures (CSV ou grille collée, cf. staff/hours_import.py)
+# -------------------------------------------------------------------
+class HoursImportForm(forms.Form):
+    file = forms.FileField(
+        label="Fichier CSV",
+        required=False,
+        widget=forms.ClearableFileInput(attrs={"class": FILE_INPUT, "accept": ".csv,text/csv"}),
+    )
+    data = forms.CharField(
+        label="…ou lignes collées (tableur)",
+        required=False,
+        widget=forms.Textarea(attrs={
+            "rows": 8, "class": BASE_INPUT + " font-mono text-xs",
+            "placeholder": "benevole;mission;date;heures;note\nmarie@exemple.org;12;2025-03-01;3,5;Accueil",
+        }),
+    )
+    dry_run = forms.BooleanField(
+        label="Simulation (valider sans enregistrer)",
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={"class": "h-4 w-4 align-middle"}),
+    )
+
+    MAX_UPLOAD_MB = 2
+
+    def clean_file(self):
+        f = self.cleaned_data.get("file")
+        if f and f.size > self.MAX_UPLOAD_MB * 1024 * 1024:
+            raise forms.ValidationError(f"Fichier trop volumineux ({self.MAX_UPLOAD_MB} Mo maximum).")
+        return f
+
+    def clean(self):
+        cleaned = super().clean()
+        f = cleaned.get("file")
+        if f:
+            try:
+                cleaned["text"] = f.read().decode("utf-8-sig")
+            except UnicodeDecodeError:
+                self.add_error("file", "Le fichier doit être encodé en UTF-8.")
+        elif (cleaned.get("data") or "").strip():
+            cleaned["text"] = cleaned["data"]
+        elif not self.errors:
+            raise forms.ValidationError("Choisissez un fichier CSV ou collez des lignes.")
+        return cleaned
+
+
 # -------------------------------------------------------------------
 # Événements
 # -------------------------------------------------------------------
@@ -0,0 +1,286 @@
+# staff/hours_import.py
+"""
+Import en masse de déclarations d'heures (CSV ou grille collée), côté staff.
+
+HoursEntry.save() appelle full_clean() : une requête d'inscription acceptée,
+le chargement de la mission et de son événement… par ligne. Ici le lot est
+validé de façon ensembliste, avec les mêmes règles que HoursEntry.clean() :
+
+- bénévoles (id ou e-mail) et missions du lot : une requête chacun ;
+- inscriptions acceptées des couples (bénévole, mission) : une requête ;
+- contrainte unique (bénévole, mission, date) : une requête sur la base,
+  plus les doublons internes au lot ;
+
+puis un seul bulk_create, signaux coupés : compteurs, agrégats journaliers,
+fil d'activité, statistiques et caches sont mis à jour une fois pour le lot.
+
+    report = import_hours(parse_csv(text), dry_run=True)
+    report.valid_count, [(row.line, row.errors) for row in report.errors]
+"""
+import csv
+import io
+import re
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from accounts.models import HoursEntry, Volunteer
+from .models import Mission, MissionSignup
+
+MAX_ROWS = 2000
+CHUNK = 500
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+MAX_HOURS = Decimal("999.99")  # max_digits=5, decimal_places=2
+
+# En-têtes acceptés (insensibles à la casse) → colonne
+COLUMNS = {
+    "benevole": "volunteer", "bénévole": "volunteer", "volunteer": "volunteer", "email": "volunteer",
+    "mission": "mission", "mission_id": "mission",
+    "date": "date",
+    "heures": "hours", "hours": "hours",
+    "note": "note",
+}
+REQUIRED = {"volunteer": "benevole", "mission": "mission", "date": "date", "hours": "heures"}
+
+Row = namedtuple("Row", "line data errors entry")
+
+
+class ImportReport:
+    """Résultat ligne à ligne d'un import (ou d'une simulation)."""
+
+    def __init__(self, rows, *, dry_run, created=0, error=""):
+        self.rows = rows
+        self.dry_run = dry_run
+        self.created = created
+        self.error = error  # erreur globale (fichier illisible, conflit à l'écriture…)
+
+    @property
+    def errors(self):
+        return [r for r in self.rows if r.errors]
+
+    @property
+    def valid_count(self):
+        return sum(1 for r in self.rows if not r.errors)
+
+
+# ────────────────────────────────
+# Lecture
+# ────────────────────────────────
+def parse_csv(text):
+    """
+    Lignes brutes [(n° de ligne, {colonne: valeur})] d'un CSV avec en-tête
+    (séparateur « , », « ; » ou tabulation). Lève ValueError si l'en-tête est invalide.
+    """
+    text = (text or "").lstrip("\ufeff")
+    if not text.strip():
+        raise ValueError("Aucune donnée à importer.")
+    try:
+        dialect = csv.Sniffer().sniff(text.split("\n", 1)[0], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(io.StringIO(text), dialect)
+
+    header = [COLUMNS.get((h or "").strip().lower()) for h in next(reader)]
+    missing = [label for col, label in REQUIRED.items() if col not in header]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)} "
+                         f"(attendu : benevole, mission, date, heures, note).")
+
+    rows = []
+    for values in reader:
+        if not any(v.strip() for v in values):
+            continue
+        if len(rows) >= MAX_ROWS:
+            raise ValueError(f"Trop de lignes (maximum {MAX_ROWS} par import).")
+        data = {col: (v or "").strip() for col, v in zip(header, values) if col}
+        rows.append((reader.line_num, data))
+    return rows
+
+
+def _parse_id(value):
+    """Identifiant numérique (ASCII, dans la plage d'un BIGINT) ou None."""
+    return int(value) if re.fullmatch(r"[0-9]{1,18}", value or "") else None
+
+
+def _parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            pass
+    return None
+
+
+def _parse_hours(value):
+    try:
+        hours = Decimal(value.replace(",", "."))
+    except InvalidOperation:
+        return None
+    return hours if hours.is_finite() else None
+
+
+# ────────────────────────────────
+# Validation ensembliste
+# ────────────────────────────────
+def _load_volunteers(refs):
+    """{référence: volunteer_id} pour des ids et des e-mails (une requête)."""
+    ids = {_parse_id(r) for r in refs} - {None}
+    emails = {r.lower() for r in refs if "@" in r}
+    if not ids and not emails:
+        return {}
+    out = {}
+    for vid, email in (Volunteer.objects
+                       .annotate(email_l=Lower("user__email"))
+                       .filter(Q(id__in=ids) | Q(email_l__in=emails))
+                       .values_list("id", "email_l")):
+        if vid in ids:
+            out[str(vid)] = vid  # clé : forme canonique de l'id (cf. validate)
+        if email in emails:
+            out[email] = vid
+    return out
+
+
+def validate(raw_rows):
+    """Liste de Row ; `entry` (HoursEntry non enregistrée) n'est posé que sur les lignes valides."""
+    today = timezone.localdate()
+    parsed = []
+    for line, data in raw_rows:
+        errors = []
+        vref = data.get("volunteer", "")
+        if not vref:
+            errors.append("Bénévole manquant.")
+        elif _parse_id(vref) is not None:
+            vref = str(_parse_id(vref))  # forme canonique (« 06 » → « 6 »)
+        elif "@" not in vref:
+            errors.append("Bénévole : identifiant numérique ou e-mail attendu.")
+            vref = ""
+        mref = data.get("mission", "")
+        if not mref:
+            errors.append("Mission manquante.")
+        elif _parse_id(mref) is None:
+            errors.append("Mission : identifiant numérique attendu.")
+        day = _parse_date(data.get("date", ""))
+        if day is None:
+            errors.append("Date invalide (AAAA-MM-JJ ou JJ/MM/AAAA).")
+        elif day > today:
+            errors.append("La date ne peut pas être dans le futur.")
+        hours = _parse_hours(data.get("hours", ""))
+        if hours is None:
+            errors.append("Nombre d’heures invalide.")
+        elif hours <= 0:
+            errors.append("Le nombre d’heures doit être strictement positif.")
+        elif hours > MAX_HOURS or hours != hours.quantize(Decimal("0.01")):
+            errors.append("Nombre d’heures : au plus 999,99 avec deux décimales.")
+        note = data.get("note", "")
+        if len(note) > 255:
+            errors.append("Note trop longue (255 caractères maximum).")
+        parsed.append((line, data, errors, vref.lower(), _parse_id(mref), day, hours, note))
+
+    volunteers = _load_volunteers({p[3] for p in parsed if p[3]})
+    missions = {
+        m["id"]: m for m in Mission.objects
+        .filter(id__in={p[4] for p in parsed if p[4] is not None})
+        .values("id", "event_id", "start_date", "end_date")
+    }
+    vids = set(volunteers.values())
+    accepted = set(MissionSignup.objects
+                   .filter(volunteer_id__in=vids, mission_id__in=list(missions),
+                           status=MissionSignup.Status.ACCEPTED)
+                   .values_list("volunteer_id", "mission_id"))
+    existing = set(HoursEntry.objects
+                   .filter(volunteer_id__in=vids, mission_id__in=list(missions),
+                           date__in={p[5] for p in parsed if p[5]})
+                   .values_list("volunteer_id", "mission_id", "date"))
+
+    rows, seen = [], {}
+    for line, data, errors, vref, mid, day, hours, note in parsed:
+        vid = volunteers.get(vref)
+        if vref and vid is None:
+            errors.append("Bénévole introuvable.")
+        m = missions.get(mid)
+        if mid is not None and m is None:
+            errors.append("Mission introuvable.")
+
+        if vid and m:
+            if (vid, m["id"]) not in accepted:
+                errors.append("Le bénévole doit avoir été 'accepté' sur la mission.")
+            if day:
+                # mêmes bornes que HoursEntry.clean()
+                if m["start_date"] and day < m["start_date"].date():
+                    errors.append("La date est avant le début de la mission.")
+                if m["end_date"] and day > m["end_date"].date():
+                    errors.append("La date est après la fin de la mission.")
+                key = (vid, m["id"], day)
+                if key in existing:
+                    errors.append("Heures déjà déclarées pour ce bénévole, cette mission et cette date.")
+                elif key in seen:
+                    errors.append(f"Doublon de la ligne {seen[key]}.")
+                else:
+                    seen[key] = line
+
+        entry = None
+        if not errors:
+            entry = HoursEntry(volunteer_id=vid, mission_id=m["id"], event_id=m["event_id"],
+                               date=day, hours=hours, note=note)
+        rows.append(Row(line, data, errors, entry))
+    return rows
+
+
+# ────────────────────────────────
+# Écriture
+# ────────────────────────────────
+def _after_import(entry_ids, volunteer_ids, days):
+    from accounts import activity, stats as volunteer_stats
+    from core import cache as content_cache, rollups
+
+    rollups.refresh_hours(days)
+    for i in range(0, len(entry_ids), CHUNK):
+        activity.sync_hours(entry_ids[i:i + CHUNK])
+    volunteer_stats.refresh(volunteer_ids)
+    content_cache.bump_volunteer(*volunteer_ids)
+
+
+def import_hours(raw_rows, *, dry_run=False):
+    """
+    Valide le lot et, hors simulation et seulement s'il n'y a aucune erreur,
+    crée toutes les déclarations (tout ou rien). Retourne un ImportReport.
+    """
+    from core.models import SiteStats
+    from core.signals import suspend_signals
+
+    rows = validate(raw_rows)
+    report = ImportReport(rows, dry_run=dry_run)
+    if dry_run or report.errors or not rows:
+        return report
+
+    entries = [r.entry for r in rows]
+    try:
+        with transaction.atomic():
+            # signaux coupés : compteurs, agrégats, fil d'activité et stats sont faits une fois pour le lot
+            with suspend_signals():
+                created = HoursEntry.objects.bulk_create(entries, batch_size=CHUNK)
+            SiteStats.apply_delta(total_hours_entries=len(created))
+
+            entry_ids = [e.pk for e in created]
+            if None in entry_ids:  # base sans RETURNING : relecture des ids du lot
+                entry_ids = list(HoursEntry.objects
+                                 .filter(volunteer_id__in={e.volunteer_id for e in created},
+                                         date__in={e.date for e in created})
+                                 .filter(Q(*[Q(volunteer_id=e.volunteer_id, mission_id=e.mission_id, date=e.date)
+                                             for e in created], _connector=Q.OR))
+                                 .values_list("pk", flat=True))
+            volunteer_ids = sorted({e.volunteer_id for e in created})
+            days = {e.date for e in created}
+            transaction.on_commit(lambda: _after_import(entry_ids, volunteer_ids, days))
+    except IntegrityError:
+        # saisie concurrente entre la validation et l'écriture
+        report.error = "Conflit à l'enregistrement (heures saisies entre-temps) : aucune ligne importée."
+        return report
+
+    report.created = len(created)
+    return report
@@ -0,0 +1,244 @@
+# staff/matching.py
+"""
+Classement des bénévoles candidats pour une mission.
+
+Le score (0–100) combine :
+- compétences : compétences requises de la mission (Mission.required_skills)
+  pondérées par le niveau déclaré (VolunteerSkill.level) ;
+- disponibilités : créneau de la mission comparé au masque de disponibilités
+  (Volunteer.availability_mask, cf. accounts/availability.py) ;
+- ville : même ville que la mission ;
+- fiabilité : missions acceptées vs annulées (lissé : un nouveau bénévole vaut 0,5) ;
+- charge : engagements actifs sur des missions à venir.
+
+Les caractéristiques de tous les candidats sont chargées en trois requêtes
+groupées (profils, compétences, historique d'inscriptions), puis le score est
+calculé en mémoire : aucune requête par bénévole.
+
+    page_obj = ranked_page(mission, Volunteer.objects.all(), request.GET.get("page"))
+    for v in page_obj.object_list:
+        v.match.score, v.match.components
+
+Dans l'autre sens, recommend() classe les missions à venir pour un bénévole
+(page « Missions » côté bénévole), résultat mis en cache par bénévole.
+"""
+from collections import namedtuple
+
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from accounts.availability import bit, day_mask
+from accounts.models import Availability, Volunteer, VolunteerSkill
+from .models import Mission, MissionSignup
+
+Status = MissionSignup.Status
+
+# Poids relatifs ; les critères sans objet pour la mission (pas de compétence
+# requise, pas de date, pas de ville) sont écartés et les autres renormalisés.
+WEIGHTS = {
+    "skills": 0.35,
+    "availability": 0.25,
+    "city": 0.15,
+    "reliability": 0.15,
+    "load": 0.10,
+}
+
+ACTIVE_STATUSES = [Status.INVITED, Status.PENDING, Status.ACCEPTED]
+MAX_LEVEL = max(VolunteerSkill.Level.values)
+FULLDAY_HOURS = 6  # une mission d'au moins 6 h occupe la journée
+
+Features = namedtuple("Features", "mask city_id skills accepted cancelled load")
+Candidate = namedtuple("Candidate", "volunteer_id score components")
+
+
+def slot_for(effective_date, start, end):
+    """(jour 0–6, créneau) d'une mission à partir de ses dates, ou None si elle n'est pas datée."""
+    day = effective_date
+    if start is not None:
+        local = timezone.localtime(start) if timezone.is_aware(start) else start
+        day = day or local.date()
+        if end is not None and (end - start).total_seconds() >= FULLDAY_HOURS * 3600:
+            slot = Availability.Slot.FULLDAY
+        elif local.hour < 12:
+            slot = Availability.Slot.MORNING
+        elif local.hour < 18:
+            slot = Availability.Slot.AFTERNOON
+        else:
+            slot = Availability.Slot.EVENING
+    else:
+        slot = Availability.Slot.FULLDAY
+    if day is None:
+        return None
+    return day.weekday(), slot
+
+
+def mission_slot(mission):
+    return slot_for(mission.effective_date, mission.start_date, mission.end_date)
+
+
+def load_features(mission, volunteers, required):
+    """{volunteer_id: Features} pour un QuerySet de Volunteer (3 requêtes)."""
+    ids_qs = volunteers.order_by().values("id")
+    features = {
+        vid: [mask, city_id, {}, 0, 0, 0]
+        for vid, mask, city_id in volunteers.order_by().values_list("id", "availability_mask", "city_id")
+    }
+    if not features:
+        return {}
+
+    if required:
+        for vid, skill_id, level in (VolunteerSkill.objects
+                                     .filter(volunteer_id__in=ids_qs, skill_id__in=required)
+                                     .values_list("volunteer_id", "skill_id", "level")):
+            if vid in features:
+                features[vid][2][skill_id] = level
+
+    now = timezone.now()
+    upcoming = Q(mission__end_date__gte=now) | Q(mission__end_date__isnull=True, mission__start_date__gte=now)
+    history = (MissionSignup.objects
+               .filter(volunteer_id__in=ids_qs)
+               .exclude(mission_id=mission.id)
+               .values("volunteer_id")
+               .annotate(
+                   accepted=Count("id", filter=Q(status=Status.ACCEPTED)),
+                   cancelled=Count("id", filter=Q(status=Status.CANCELLED)),
+                   load=Count("id", filter=Q(status__in=ACTIVE_STATUSES) & upcoming),
+               )
+               .order_by())
+    for row in history:
+        f = features.get(row["volunteer_id"])
+        if f is not None:
+            f[3:] = [row["accepted"], row["cancelled"], row["load"]]
+
+    return {vid: Features(*f) for vid, f in features.items()}
+
+
+def _availability(mask, day, slot):
+    """1 : créneau couvert ; 0,5 : disponible ce jour-là sur un autre créneau ; 0 sinon."""
+    wanted = bit(day, slot) | bit(day, Availability.Slot.FULLDAY)
+    if mask & wanted:
+        return 1.0
+    return 0.5 if mask & day_mask(day) else 0.0
+
+
+def score_features(mission, features, required):
+    """Liste de Candidate triée par score décroissant (à score égal : id croissant)."""
+    when = mission_slot(mission)
+
+    weights = dict(WEIGHTS)
+    if not required:
+        weights.pop("skills")
+    if when is None:
+        weights.pop("availability")
+    if not mission.city_id:
+        weights.pop("city")
+    total = sum(weights.values()) or 1.0
+    weights = {k: w / total for k, w in weights.items()}
+
+    ranked = []
+    for vid, f in features.items():
+        components = {}
+        if "skills" in weights:
+            components["skills"] = sum(f.skills.get(s, 0) for s in required) / (MAX_LEVEL * len(required))
+        if "availability" in weights:
+            components["availability"] = _availability(f.mask, *when)
+        if "city" in weights:
+            components["city"] = 1.0 if f.city_id == mission.city_id else 0.0
+        components["reliability"] = (f.accepted + 1) / (f.accepted + f.cancelled + 2)
+        components["load"] = 1 / (1 + f.load)
+        score = 100 * sum(weights[k] * v for k, v in components.items())
+        ranked.append(Candidate(vid, round(score, 1), {k: round(v, 2) for k, v in components.items()}))
+
+    ranked.sort(key=lambda c: (-c.score, c.volunteer_id))
+    return ranked
+
+
+def rank(mission, volunteers):
+    """Candidats d'un QuerySet de Volunteer classés pour `mission`."""
+    required = list(mission.required_skills.values_list("id", flat=True))
+    return score_features(mission, load_features(mission, volunteers, required), required)
+
+
+def ranked_page(mission, volunteers, page_number, per_page=20):
+    """
+    Page du classement : les Volunteer de la page (user préchargé) dans l'ordre
+    du score, chacun avec l'attribut `match` (Candidate).
+    """
+    page_obj = Paginator(rank(mission, volunteers), per_page).get_page(page_number)
+    candidates = list(page_obj.object_list)
+    by_id = Volunteer.objects.select_related("user").in_bulk([c.volunteer_id for c in candidates])
+    rows = []
+    for c in candidates:
+        v = by_id.get(c.volunteer_id)
+        if v is not None:
+            v.match = c
+            rows.append(v)
+    page_obj.object_list = rows
+    return page_obj
+
+
+# ────────────────────────────────
+# Recommandations : missions classées pour un bénévole
+# ────────────────────────────────
+RECO_WEIGHTS = {
+    "skills": 0.35,
+    "availability": 0.30,
+    "city": 0.20,
+    "history": 0.15,  # projets sur lesquels le bénévole a déjà été accepté
+}
+RECO_LIMIT = 20
+NEUTRAL = 0.5  # critère sans objet pour la mission (pas de compétence requise, pas de date, pas de ville)
+
+
+def recommendation_scope(volunteer_id):
+    """Espace de version (core/cache.py) des recommandations d'un bénévole."""
+    return f"reco:{volunteer_id}"
+
+
+def recommend(volunteer, missions, limit=RECO_LIMIT):
+    """
+    [(mission_id, score), …] : les `limit` meilleures missions d'un QuerySet pour
+    `volunteer`, en cinq requêtes quelle que soit la taille du catalogue.
+    """
+    from core.models import Event
+
+    rows = list(missions.order_by().values_list("id", "city_id", "start_date", "end_date", "event_id", "effective_date"))
+    if not rows:
+        return []
+    mission_ids = [r[0] for r in rows]
+    event_ids = {r[4] for r in rows if r[4]}
+
+    required = {}
+    for mid, skill_id in (Mission.required_skills.through.objects
+                          .filter(mission_id__in=mission_ids)
+                          .values_list("mission_id", "skill_id")):
+        required.setdefault(mid, []).append(skill_id)
+    event_projects = {}
+    for eid, pid in (Event.projects.through.objects
+                     .filter(event_id__in=event_ids)
+                     .values_list("event_id", "project_id")):
+        event_projects.setdefault(eid, set()).add(pid)
+
+    levels = dict(VolunteerSkill.objects.filter(volunteer=volunteer).values_list("skill_id", "level"))
+    past_projects = set(Event.projects.through.objects
+                        .filter(event__missions__signups__volunteer=volunteer,
+                                event__missions__signups__status=Status.ACCEPTED)
+                        .values_list("project_id", flat=True))
+
+    mask = volunteer.availability_mask
+    ranked = []
+    for mid, city_id, start, end, event_id, effective_date in rows:
+        skills = required.get(mid)
+        when = slot_for(effective_date, start, end)
+        components = {
+            "skills": sum(levels.get(s, 0) for s in skills) / (MAX_LEVEL * len(skills)) if skills else NEUTRAL,
+            "availability": _availability(mask, *when) if when else NEUTRAL,
+            "city": (1.0 if city_id == volunteer.city_id else 0.0) if city_id else NEUTRAL,
+            "history": 1.0 if event_projects.get(event_id, set()) & past_projects else 0.0,
+        }
+        score = 100 * sum(RECO_WEIGHTS[k] * v for k, v in components.items())
+        ranked.append((mid, round(score, 1)))
+
+    ranked.sort(key=lambda r: (-r[1], r[0]))
+    return ranked[:limit]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_volunteer_availability_mask'),
+        ('staff', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='required_skills',
+            field=models.ManyToManyField(blank=True, related_name='missions', to='accounts.skill'),
+        ),
+    ]
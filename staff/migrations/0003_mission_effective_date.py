@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:27
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def backfill_effective_date(apps, schema_editor):
+    Event = apps.get_model("core", "Event")
+    Mission = apps.get_model("staff", "Mission")
+    event_date = Event.objects.filter(pk=OuterRef("event_id")).values("date")[:1]
+    Mission.objects.update(effective_date=Coalesce(Subquery(event_date), TruncDate("start_date")))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_volunteer_availability_mask'),
+        ('core', '0004_daily_rollups'),
+        ('staff', '0002_mission_required_skills'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='effective_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_effective_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['status', 'effective_date'], name='mission_status_effdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['effective_date', 'id'], name='mission_effdate_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.4 on 2026-10-18 05:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_volunteer_stats'),
+        ('staff', '0003_mission_effective_date'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='missionsignup',
+            index=models.Index(fields=['created_at'], name='signup_created_idx'),
+        ),
+    ]
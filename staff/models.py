@@ -6,10 +6,18 @@ from django.db import models
 from django.utils import timezone
 from core.models import Event  # ton modèle d’événement public
 from django.urls import reverse
-from django.db.models import Q
+from django.db.models import Q, OuterRef, Subquery
+from django.db.models.functions import Coalesce, TruncDate
 from core.models import City
+from core.tracking import TrackedFieldsMixin
 
-class Mission(models.Model):
+def effective_date_expression():
+    """COALESCE(date de l'événement, start_date::date locale), utilisable dans un UPDATE (pas de jointure)."""
+    event_date = Event.objects.filter(pk=OuterRef("event_id")).values("date")[:1]
+    return Coalesce(Subquery(event_date), TruncDate("start_date"))
+
+
+class Mission(TrackedFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     location = models.CharField(max_length=255, blank=True)
@@ -23,8 +31,12 @@ class Mission(models.Model):
 
     start_date = models.DateTimeField(null=True, blank=True)
     end_date   = models.DateTimeField(null=True, blank=True)
+    # date de l'événement, sinon jour local de start_date : dénormalisée pour filtrer/trier sans jointure
+    effective_date = models.DateField(null=True, blank=True, editable=False)
 
     capacity = models.PositiveIntegerField(null=True, blank=True)
+    # compétences recherchées : utilisées pour classer les candidats (cf. staff/matching.py)
+    required_skills = models.ManyToManyField("accounts.Skill", blank=True, related_name="missions")
     status = models.CharField(
         max_length=20,
         choices=[("draft","Brouillon"),("published","Publié"),("archived","Archivé")],
@@ -35,12 +47,36 @@ class Mission(models.Model):
 
     class Meta:
         ordering = ["start_date", "id"]
+        indexes = [
+            models.Index(fields=["status", "effective_date"], name="mission_status_effdate_idx"),
+            models.Index(fields=["effective_date", "id"], name="mission_effdate_idx"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def compute_effective_date(self):
+        if self.event_id and self.event and self.event.date:
+            return self.event.date
+        if self.start_date:
+            return timezone.localdate(self.start_date) if timezone.is_aware(self.start_date) else self.start_date.date()
+        return None
+
+    def save(self, *args, **kwargs):
+        self.effective_date = self.compute_effective_date()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"event", "start_date"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "effective_date"}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_effective_dates(cls, queryset=None):
+        """Recalcule effective_date en un UPDATE (ex: après modification de Event.date)."""
+        qs = cls.objects.all() if queryset is None else queryset
+        return qs.update(effective_date=effective_date_expression())
+
 
-class MissionSignup(models.Model):
+class MissionSignup(TrackedFieldsMixin, models.Model):
     class Status(models.TextChoices):
         INVITED   = "invited",  "Invité"
         PENDING   = "pending",  "En attente"
@@ -63,6 +99,7 @@ class MissionSignup(models.Model):
         indexes = [
             models.Index(fields=["volunteer", "status"]),
             models.Index(fields=["mission", "status"]),
+            models.Index(fields=["created_at"], name="signup_created_idx"),  # agrégats journaliers (core/rollups.py)
         ]
     def __str__(self):
         return f"{self.volunteer} → {self.mission} [{self.get_status_display()}]"
@@ -91,7 +128,7 @@ class ApplicationStatus(models.TextChoices):
 def application_upload_to(instance, filename):
     return f"applications/{timezone.now():%Y/%m}/user_{instance.application.user_id}/{instance.doc_type}_{filename}"
 
-class VolunteerApplication(models.Model):
+class VolunteerApplication(TrackedFieldsMixin, models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="volunteer_applications")
 
     # Identité & contact
@@ -4,7 +4,7 @@ from django.contrib import messages
 from django.utils import timezone
 from .models import AuthorizationKey
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
+from core.mail import enqueue_mail
 from django.template.loader import render_to_string
 
 User = get_user_model()
@@ -48,8 +48,10 @@ def create_auth_key(request):
         )
         if recipients:
             try:
-                send_mail(
-                    subject, body_txt + f"\n\nToken: {token}", from_email, recipients, html_message=html
+                # contenu sensible (token) : effacé de la file dès l'envoi
+                enqueue_mail(
+                    subject, body_txt + f"\n\nToken: {token}", from_email, recipients, html_message=html,
+                    sensitive=True,
                 )
                 messages.success(
                     request, f"Cle envoyee a {len(recipients)} destinataire(s)."
@@ -201,12 +203,13 @@ def key_created(request, key_id):
         )
         if recipients:
             try:
-                send_mail(
+                enqueue_mail(
                     subject,
                     body_txt + f"\n\nToken: {token}",
                     from_email,
                     recipients,
                     html_message=html,
+                    sensitive=True,
                 )
                 messages.success(
                     request, f"Cle envoyee a {len(recipients)} destinataire(s)."
@@ -0,0 +1,154 @@
+# staff/services.py
+"""
+Statistiques d'inscriptions aux missions, en une requête.
+
+    signup_counts(mission.signups.all())
+    # {"total": 12, "invited": 3, "pending": 2, "accepted": 6, "declined": 1, "cancelled": 0}
+
+    Mission.objects.annotate(**signup_count_annotations("accepted"))  # -> m.accepted_count
+
+Invitations en masse : invite_volunteers(mission, ids, invited_by=request.user).
+"""
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import MissionSignup
+
+Status = MissionSignup.Status
+
+# Ordre et libellés des groupes affichés sur la fiche mission
+STATUS_GROUPS = [
+    (Status.PENDING, "En attente"),
+    (Status.INVITED, "Invités"),
+    (Status.ACCEPTED, "Acceptés"),
+    (Status.DECLINED, "Refusés"),
+    (Status.CANCELLED, "Annulés"),
+]
+
+
+def signup_counts(qs):
+    """Compteurs total + par statut d'un QuerySet de MissionSignup (une agrégation conditionnelle)."""
+    aggs = {"total": Count("id")}
+    for status in Status.values:
+        aggs[status] = Count("id", filter=Q(status=status))
+    return qs.order_by().aggregate(**aggs)
+
+
+def signup_count_annotations(*statuses, prefix="signups"):
+    """
+    Annotations à poser sur un QuerySet de Mission : `<statut>_count` pour
+    chaque statut demandé (ex: accepted_count pour le taux de remplissage).
+    """
+    return {
+        f"{status}_count": Count(prefix, filter=Q(**{f"{prefix}__status": status}))
+        for status in statuses
+    }
+
+
+def group_by_status(signups, map_item=lambda s: s):
+    """Répartit les inscriptions par statut en un seul passage (ordre de STATUS_GROUPS)."""
+    buckets = {status: [] for status, _ in STATUS_GROUPS}
+    for s in signups:
+        if s.status in buckets:
+            buckets[s.status].append(map_item(s))
+    return [{"key": status.value, "label": label, "items": buckets[status]} for status, label in STATUS_GROUPS]
+
+
+def fill_rate(accepted, capacity):
+    """Pourcentage de remplissage (None si pas de capacité)."""
+    return int(round((accepted / capacity) * 100)) if capacity else None
+
+
+# ────────────────────────────────
+# Invitations en masse
+# ────────────────────────────────
+REACTIVABLE = {Status.DECLINED, Status.CANCELLED}
+
+
+def invite_volunteers(mission, volunteer_ids, *, invited_by=None, note=""):
+    """
+    Invite une sélection de bénévoles en quelques requêtes ensemblistes :
+    lecture des inscriptions existantes (1 requête), bulk_create des nouvelles,
+    UPDATE des refusées/annulées réactivées, puis une seule diffusion de
+    notifications. Retourne (créées, réactivées, ignorées).
+    """
+    from accounts import stats as volunteer_stats
+    from accounts.models import Volunteer
+    from core import cache as content_cache, rollups
+    from core.models import SiteStats
+    from core.signals import suspend_signals
+    from notifications.fanout import Recipient
+    from notifications.models import Notification
+    from notifications.utils import send_notification
+    from .matching import recommendation_scope
+
+    ids = set(volunteer_ids)
+    if not ids:
+        return 0, 0, 0
+    note = (note or "")[:255]
+
+    with transaction.atomic():
+        existing = {
+            vid: (pk, status, created_at)
+            for vid, pk, status, created_at in (
+                MissionSignup.objects.select_for_update()
+                .filter(mission=mission, volunteer_id__in=ids)
+                .values_list("volunteer_id", "pk", "status", "created_at")
+            )
+        }
+        new_ids = sorted(ids - existing.keys())
+        reactivate = {vid: row for vid, row in existing.items() if row[1] in REACTIVABLE}
+        skipped = len(existing) - len(reactivate)
+
+        # signaux coupés : compteurs, agrégats et notifications sont faits une fois pour le lot
+        with suspend_signals():
+            started = timezone.now()
+            MissionSignup.objects.bulk_create([
+                MissionSignup(mission=mission, volunteer_id=vid, status=Status.INVITED,
+                              invited_by=invited_by, note=note)
+                for vid in new_ids
+            ], ignore_conflicts=True)  # course avec une candidature simultanée : ignorée
+            if new_ids:
+                # ignore_conflicts ne dit pas quelles lignes ont été insérées : on relit les nôtres
+                inserted = set(MissionSignup.objects
+                               .filter(mission=mission, volunteer_id__in=new_ids, status=Status.INVITED,
+                                       invited_by=invited_by, created_at__gte=started)
+                               .values_list("volunteer_id", flat=True))
+                skipped += len(new_ids) - len(inserted)
+                new_ids = [vid for vid in new_ids if vid in inserted]
+            if reactivate:
+                fields = {"status": Status.INVITED, "invited_by": invited_by, "responded_at": None}
+                if note:
+                    fields["note"] = note
+                MissionSignup.objects.filter(pk__in=[pk for pk, _, _ in reactivate.values()]).update(**fields)
+
+        if new_ids:
+            SiteStats.apply_delta(total_signups=len(new_ids))
+        days = {rollups.local_date(created_at) for _, _, created_at in reactivate.values()}
+        if new_ids:
+            days.add(timezone.localdate())
+        transaction.on_commit(lambda: rollups.refresh_signups(days))
+
+        invited = new_ids + list(reactivate)
+        recipients = [
+            Recipient(user_id, is_staff)
+            for user_id, is_staff in Volunteer.objects.filter(id__in=invited, user__isnull=False)
+                                                      .values_list("user_id", "user__is_staff")
+        ]
+        # mêmes invalidations que les receivers d'une inscription (coupés ici) : tâches,
+        # contexte utilisateur et recommandations des bénévoles invités
+        transaction.on_commit(lambda: content_cache.bump_volunteer(*invited))
+        transaction.on_commit(lambda: content_cache.bump_user(*(r.pk for r in recipients)))
+        transaction.on_commit(lambda: content_cache.bump(*(recommendation_scope(vid) for vid in invited)))
+        transaction.on_commit(lambda: volunteer_stats.refresh(invited))
+        send_notification(
+            recipients=recipients,
+            actor=invited_by,
+            verb=Notification.Verb.CREATED,
+            target=mission,
+            title=f"Invitation à la mission: {mission.title or 'Mission'}",
+            message="",
+        )
+
+    return len(new_ids), len(reactivate), skipped
@@ -12,6 +12,7 @@ urlpatterns = [
 
     # Dashboard
     path("", views.staff_dashboard, name="dashboard"),
+    path("dashboard/refresh/", views.staff_dashboard_refresh, name="dashboard_refresh"),
     path("profile/", views.profil_staff, name="profil_staff"),
     path("users/<int:pk>/json/", views.staff_user_json, name="user_json"),
     
@@ -65,6 +66,7 @@ urlpatterns = [
     path("signups/<int:signup_id>/accept/", views.staff_signup_accept, name="staff_signup_accept"),
     path("signups/<int:signup_id>/decline/", views.staff_signup_decline, name="staff_signup_decline"),
     path("missions/<int:mission_id>/invite/", views.mission_invite, name="mission_invite"),
+    path("missions/<int:mission_id>/candidates.json", views.mission_candidates_json, name="mission_candidates_json"),
 
     # Missions en attente      
     path("missions/pending/<int:mission_id>/", views.mission_detail_alias,name="mission_detail_pending"),
@@ -87,6 +89,7 @@ urlpatterns = [
 
     # Heures déclarées
     path("hours/", views.hours_list, name="hours_list"),
+    path("hours/import/", views.hours_import_view, name="hours_import"),
 
     # Événements (staff)
     path("events/", views.events_list, name="events_list"),
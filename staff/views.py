@@ -5,7 +5,7 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.admin.views.decorators import staff_member_required
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from django.db.models import Q, Sum,Count
+from django.db.models import Q, Sum,Count, F, Exists, OuterRef, Prefetch
 from core.models import Event, Project, TeamMember, Partenaire,TeamMemberInvite
 from core.models import News, Testimonial, EducationStory, EducationStoryImage
 from .models import Mission, MissionSignup
@@ -13,7 +13,7 @@ from datetime import datetime, timedelta, date as ddate
 from django.core.paginator import Paginator
 from django.shortcuts import get_object_or_404, redirect,render
 from accounts.models import Availability
-from .forms import InviteFilterForm, BulkInviteForm, EventForm, MissionForm, ProjectForm
+from .forms import InviteFilterForm, BulkInviteForm, EventForm, MissionForm, ProjectForm, HoursImportForm
 from .forms import NewsForm, TestimonialForm, EducationStoryForm
 from django.db import transaction, IntegrityError
 from django.shortcuts import resolve_url
@@ -22,7 +22,14 @@ from .forms import TeamMemberForm, PartenaireForm
 from django.http import JsonResponse
 from django.contrib.auth import get_user_model
 from django.conf import settings
-from django.core.mail import send_mail
+from core.mail import enqueue_mail
+from core.pagination import paginate_keyset
+from notifications import inbox as notif_inbox
+from . import dashboard
+from .services import signup_counts, group_by_status, invite_volunteers
+from .matching import ranked_page
+from . import hours_import
+from accounts.availability import filter_available, heatmap_counts, pairs_from_mask, staffing_heatmap, SLOTS as AVAILABILITY_SLOTS
 from .models import VolunteerApplication, VolunteerApplicationDocument
 from .forms import VolunteerApplicationForm, DocumentFormSet
 from django.db.models import Count
@@ -46,7 +53,6 @@ from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.shortcuts import get_object_or_404, redirect
 from django.template.loader import render_to_string
-from django.core.mail import send_mail
 from django.urls import reverse
 
 from django.conf import settings
@@ -100,7 +106,7 @@ def staff_team_send_invite(request, slug):
     body_html = render_to_string("emails/team_member_invite.html", context)
 
     from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None) or "ne_pas_repondre@bamuwellbeing.org"
-    send_mail(subject, body_txt, from_email, [member.user.email], html_message=body_html)
+    enqueue_mail(subject, body_txt, from_email, [member.user.email], html_message=body_html)
 
     messages.success(request, f"Invitation envoyée à {member.user.email} ✅")
     return redirect("staff:team_detail", slug=slug)
@@ -117,17 +123,26 @@ def _parse_date(s: str):
         except Exception:
             return None
 
-def _mission_date(m: Mission):
-    # priorité à l'event.date, sinon start_date
-    return (getattr(getattr(m, "event", None), "date", None)
-            or getattr(m, "start_date", None))
-
 def _paginate(request, items, per_page=12):
     paginator = Paginator(items, per_page)
     page_obj = paginator.get_page(request.GET.get("page"))
     return page_obj
 
 
+def _paginate_rows(request, qs, build_row, per_page=12):
+    """Pagine le QuerySet (LIMIT/OFFSET) puis construit les lignes de la page courante uniquement."""
+    page_obj = _paginate(request, qs, per_page=per_page)
+    page_obj.object_list = [build_row(obj) for obj in page_obj.object_list]
+    return page_obj
+
+
+def _keyset_rows(request, qs, ordering, build_row, per_page=20):
+    """Variante par curseur (tables volumineuses) : pas d'OFFSET, total approximatif."""
+    page_obj = paginate_keyset(request, qs, ordering, per_page=per_page, count="approx")
+    page_obj.object_list = [build_row(obj) for obj in page_obj.object_list]
+    return page_obj
+
+
 def _safe_redirect(request):
     return (
         request.POST.get("next")
@@ -287,22 +302,7 @@ ACTIVE_STATUSES = {
     MissionSignup.Status.PENDING,
     MissionSignup.Status.ACCEPTED,
 }
-from datetime import date as _date, datetime
-
 
-def _as_local_date(v):
-    """Normalise un champ date/datetime en date locale (ou None)."""
-    if v is None:
-        return None
-    if isinstance(v, datetime):
-        try:
-            v = timezone.localtime(v)
-        except Exception:
-            # si v est naïf, on le garde tel quel mais on extrait la date
-            pass
-        return v.date()
-    # déjà une date
-    return v
 
 @staff_member_required
 def missions_list(request):
@@ -311,7 +311,10 @@ def missions_list(request):
     dfrom = _parse_date(request.GET.get("from"))  # -> date ou None
     dto   = _parse_date(request.GET.get("to"))    # -> date ou None
 
-    qs = Mission.objects.select_related("event").all()
+    # Filtres, tri et pagination en base : seules les 12 lignes de la page sont lues
+    qs = (Mission.objects
+          .annotate(date=F("effective_date"), event_title=F("event__title"))
+          .values("id", "title", "event_title", "date", "capacity", "status"))
     if status:
         qs = qs.filter(status=status)
     if q:
@@ -321,31 +324,15 @@ def missions_list(request):
             Q(location__icontains=q) |
             Q(event__title__icontains=q)
         )
+    # les missions sans date restent visibles quel que soit l'intervalle
+    if dfrom:
+        qs = qs.filter(Q(date__gte=dfrom) | Q(date__isnull=True))
+    if dto:
+        qs = qs.filter(Q(date__lte=dto) | Q(date__isnull=True))
 
-    rows = []
-    for m in qs:
-        d_raw = _mission_date(m)           # peut être date OU datetime selon ton modèle
-        d = _as_local_date(d_raw)          # <- on normalise en date
-
-        # Filtres : tout en date
-        if dfrom and d and d < dfrom:
-            continue
-        if dto and d and d > dto:
-            continue
-
-        rows.append({
-            "id": m.id,
-            "title": m.title,
-            "event_title": getattr(m.event, "title", None),
-            "date": d,                     # on stocke la date normalisée
-            "capacity": m.capacity,
-            "status": m.status,
-        })
-
-    # Tri : tout en date (évite le mix date/datetime)
-    rows.sort(key=lambda r: (r["date"] or _date.max, r["id"]))
+    qs = qs.order_by(F("date").asc(nulls_last=True), "id")
 
-    page_obj = _paginate(request, rows, per_page=12)
+    page_obj = _paginate(request, qs, per_page=12)
     return render(request, "staff/missions_list.html", {"page_obj": page_obj})
 
 @staff_member_required
@@ -399,28 +386,18 @@ def mission_detail_alias(request, mission_id):
 def mission_detail(request, pk):
     mission = get_object_or_404(Mission.objects.select_related("event"), pk=pk)
 
-    # Stats d'inscriptions
+    # Stats d'inscriptions : une agrégation + un seul parcours des lignes
     qs = (MissionSignup.objects
           .filter(mission=mission)
           .select_related("volunteer__user")
           .order_by("-id"))
-    counts = {
-        "total": qs.count(),
-        "accepted": qs.filter(status=MissionSignup.Status.ACCEPTED).count(),
-        "pending": qs.filter(status=MissionSignup.Status.PENDING).count(),
-    }
+    counts = signup_counts(qs)
 
     # Groupes par statut pour l'UI
     def map_item(s):
         return {"id": s.id, "volunteer_name": s.volunteer.display_name, "created_at": s.created_at}
 
-    signups_by_status = [
-        {"key": "pending", "label": "En attente", "items": [map_item(s) for s in qs if s.status == MissionSignup.Status.PENDING]},
-        {"key": "invited", "label": "Invités",     "items": [map_item(s) for s in qs if s.status == MissionSignup.Status.INVITED]},
-        {"key": "accepted","label": "Acceptés",    "items": [map_item(s) for s in qs if s.status == MissionSignup.Status.ACCEPTED]},
-        {"key": "declined","label": "Refusés",     "items": [map_item(s) for s in qs if s.status == MissionSignup.Status.DECLINED]},
-        {"key": "cancelled","label": "Annulés",    "items": [map_item(s) for s in qs if s.status == MissionSignup.Status.CANCELLED]},
-    ]
+    signups_by_status = group_by_status(qs, map_item)
 
     return render(request, "staff/mission_detail.html", {
         "mission": mission,
@@ -449,34 +426,20 @@ def mission_invite_view(request, mission_id):
     volunteers = qs.select_related("user", "city").order_by("name", "user__username")
 
     if request.method == "POST":
-        selected_ids = request.POST.getlist("volunteer_ids")
-        created = 0
-        for vid in selected_ids:
-            obj, is_new = MissionSignup.objects.get_or_create(
-                mission=mission, volunteer_id=vid, defaults={"status": MissionSignup.Status.INVITED}
-            )
-            if is_new:
-                created += 1
+        selected_ids = [int(x) for x in request.POST.getlist("volunteer_ids") if x.isdigit()]
+        # seulement les bénévoles proposés (même ville, pas encore inscrits)
+        selected_ids = list(qs.filter(id__in=selected_ids).values_list("id", flat=True))
+        created, _, _ = invite_volunteers(mission, selected_ids, invited_by=request.user)
         messages.success(request, f"{created} invitation(s) envoyée(s).")
-        return redirect("staff:mission_detail", mission_id=mission.id)
+        return redirect("staff:mission_detail", pk=mission.id)
 
     return render(request, "staff/mission_invite.html", {"mission": mission, "volunteers": volunteers, "q": q})
 
 
-@staff_member_required
-@require_auth_key(
-    action="mission.invite",
-    level=AuthorizationKey.Level.LOW,
-    superuser_bypass=True,
-    return_403=True,
-    methods=("POST",),
-)
-def mission_invite(request, mission_id):
-    mission = get_object_or_404(Mission.objects.select_related("event"), pk=mission_id)
-
-    # ---------- Filtres ----------
+def _invite_candidates(request, mission):
+    """Filtres de la page d'invitation -> (form, QuerySet de Volunteer, only_available)."""
     f = InviteFilterForm(request.GET or None)
-    qs = Volunteer.objects.select_related("user").all()
+    qs = Volunteer.objects.all()
 
     if f.is_valid():
         q     = f.cleaned_data.get("q") or ""
@@ -496,58 +459,86 @@ def mission_invite(request, mission_id):
             )
 
         if skill:
-            vs = VolunteerSkill.objects.select_related("skill")\
-                                       .filter(skill__name__icontains=skill)
-            qs = qs.filter(id__in=vs.values_list("volunteer_id", flat=True))
-
-        if day:
-            qs = qs.filter(
-                id__in=Availability.objects.filter(day=day)
-                                           .values_list("volunteer_id", flat=True)
-            )
-        if slot:
-            qs = qs.filter(
-                id__in=Availability.objects.filter(slot=slot)
-                                           .values_list("volunteer_id", flat=True)
-            )
+            qs = qs.filter(Exists(VolunteerSkill.objects.filter(
+                volunteer_id=OuterRef("pk"), skill__name__icontains=skill,
+            )))
+
+        # jour / créneau : ET bit à bit sur le masque dénormalisé (pas de sous-requête Availability)
+        qs = filter_available(qs, day=day, slot=slot)
+
+        # Masquer déjà invités/en cours/acceptés si demandé
+        if only_available:
+            qs = qs.filter(~Exists(MissionSignup.objects.filter(
+                mission_id=mission.id, volunteer_id=OuterRef("pk"), status__in=ACTIVE_STATUSES,
+            )))
     else:
         # défaut raisonnable si filtre invalide
         only_available = True
 
-    # ---------- Statuts existants pour CETTE mission ----------
-    vol_ids = list(qs.values_list("id", flat=True))
-    status_map = {
-        v_id: status
-        for (v_id, status) in MissionSignup.objects.filter(
-            mission_id=mission.id, volunteer_id__in=vol_ids
-        ).values_list("volunteer_id", "status")
-    }
+    return f, qs, only_available
 
-    ACTIVE_STATUSES = {
-        MissionSignup.Status.INVITED,
-        MissionSignup.Status.PENDING,
-        MissionSignup.Status.ACCEPTED,
-    }
 
-    # Masquer déjà invités/en cours/acceptés si demandé
-    if f.is_valid() and only_available:
-        masked_ids = [vid for vid, st in status_map.items() if st in ACTIVE_STATUSES]
-        if masked_ids:
-            qs = qs.exclude(id__in=masked_ids)
+@staff_member_required
+def mission_candidates_json(request, mission_id):
+    """Classement des candidats (mêmes filtres que la page d'invitation), paginé, en JSON."""
+    mission = get_object_or_404(Mission.objects.select_related("event"), pk=mission_id)
+    _, qs, _ = _invite_candidates(request, mission)
+    try:
+        per_page = min(max(int(request.GET.get("per_page", 20)), 1), 100)
+    except ValueError:
+        per_page = 20
+    page_obj = ranked_page(mission, qs, request.GET.get("page"), per_page=per_page)
+    return JsonResponse({
+        "mission": mission.id,
+        "page": page_obj.number,
+        "num_pages": page_obj.paginator.num_pages,
+        "count": page_obj.paginator.count,
+        "results": [{
+            "id": v.id,
+            "name": v.display_name,
+            "score": v.match.score,
+            "components": v.match.components,
+        } for v in page_obj.object_list],
+    })
+
+
+@staff_member_required
+@require_auth_key(
+    action="mission.invite",
+    level=AuthorizationKey.Level.LOW,
+    superuser_bypass=True,
+    return_403=True,
+    methods=("POST",),
+)
+def mission_invite(request, mission_id):
+    mission = get_object_or_404(Mission.objects.select_related("event"), pk=mission_id)
+
+    f, qs, only_available = _invite_candidates(request, mission)
 
-    # ---------- Prefetch compétences / dispos ----------
+    # ---------- Classement + pagination (cf. staff/matching.py) ----------
+    page_obj = ranked_page(mission, qs, request.GET.get("page"), per_page=20)
+    page_ids = [v.id for v in page_obj.object_list]
+
+    # ---------- Statuts existants pour CETTE mission (page courante) ----------
+    status_map = dict(
+        MissionSignup.objects.filter(mission_id=mission.id, volunteer_id__in=page_ids)
+        .values_list("volunteer_id", "status")
+    )
+
+    # ---------- Compétences / dispos (page courante) ----------
     skills_by_vol = {}
     for vs in (VolunteerSkill.objects.select_related("skill")
-               .filter(volunteer_id__in=qs.values_list("id", flat=True))):
+               .filter(volunteer_id__in=page_ids)):
         skills_by_vol.setdefault(vs.volunteer_id, []).append(vs.skill.name)
 
-    avail_by_vol = {}
-    for av in Availability.objects.filter(volunteer_id__in=qs.values_list("id", flat=True)):
-        avail_by_vol.setdefault(av.volunteer_id, []).append(f"{av.day} {av.slot}".strip())
-
-    # ---------- Pagination ----------
-    paginator = Paginator(qs.order_by("name", "user__username"), 20)
-    page_obj = paginator.get_page(request.GET.get("page"))
+    # Disponibilités décodées du masque (page courante) + carte des effectifs libres (sélection filtrée)
+    day_labels, slot_labels = dict(Availability.Day.choices), dict(Availability.Slot.choices)
+    avail_by_vol = {
+        v.id: ", ".join(f"{day_labels[d]} {slot_labels[sl].lower()}" for d, sl in pairs_from_mask(v.availability_mask))
+        for v in page_obj.object_list
+    }
+    heatmap = staffing_heatmap(heatmap_counts(qs))
+    heatmap_slots = [slot_labels[sl] for sl in AVAILABILITY_SLOTS]
 
     # ---------- POST (envoi d'invitations) ----------
     if request.method == "POST":
@@ -560,45 +551,15 @@ def mission_invite(request, mission_id):
             return redirect(f"{request.path}?{request.GET.urlencode()}")
 
         # sécuriser : restreindre aux bénévoles visibles sur la page courante
-        page_ids = list(page_obj.object_list.values_list("id", flat=True))
         target_ids = [int(x) for x in post_ids if x.isdigit() and int(x) in page_ids]
 
         if not target_ids:
             messages.warning(request, "La sélection ne correspond pas à la page affichée.")
             return redirect(f"{request.path}?{request.GET.urlencode()}")
 
-        created, updated, skipped = 0, 0, 0
-        now = timezone.now()
-
-        for vid in target_ids:
-            # On récupère une éventuelle inscription existante (évite les doublons)
-            signup = MissionSignup.objects.filter(
-                mission=mission, volunteer_id=vid
-            ).order_by('-id').first()
-
-            if signup is None:
-                # Créer une nouvelle invitation
-                signup = MissionSignup(
-                    mission=mission,
-                    volunteer_id=vid,
-                    status=MissionSignup.Status.INVITED,
-                    invited_by=request.user,
-                    note=note[:255] if note else "",
-                )
-                signup.save()
-                created += 1
-            else:
-                # Déjà présent : réactiver si annulé/refusé, sinon ignorer
-                if signup.status in {MissionSignup.Status.DECLINED, MissionSignup.Status.CANCELLED}:
-                    signup.status = MissionSignup.Status.INVITED
-                    signup.invited_by = request.user
-                    if note:
-                        signup.note = note[:255]
-                    signup.responded_at = None
-                    signup.save(update_fields=["status", "invited_by", "note", "responded_at"])
-                    updated += 1
-                else:
-                    skipped += 1
+        created, updated, skipped = invite_volunteers(
+            mission, target_ids, invited_by=request.user, note=note,
+        )
 
         parts = []
         if created: parts.append(f"{created} invitation(s) envoyée(s)")
@@ -624,6 +585,8 @@ def mission_invite(request, mission_id):
         "status_map": status_map,
         "skills_by_vol": skills_by_vol,
         "avail_by_vol": avail_by_vol,
+        "heatmap": heatmap,
+        "heatmap_slots": heatmap_slots,
         "only_available": only_available,  # pour le checked fiable dans le template
     })
 
@@ -844,204 +807,35 @@ except Exception:
 
 @staff_member_required
 def staff_dashboard(request):
-    """Super dashboard staff : KPIs + listes + raccourcis, basé sur tes modèles/URLs existants."""
-    today = timezone.localdate()
-    start_month = today.replace(day=1)
-    start_30 = today - timedelta(days=29)
-    seven_days_ago = today - timedelta(days=7)
-
-    # -------- KPIs (solides + quelques ajouts) --------
-    events_upcoming = Event.objects.filter(date__gte=today).count()
-    projects_total = Project.objects.count()
-    volunteers_total = Volunteer.objects.count()
-
-    hours_7d_sum = (HoursEntry.objects
-                    .filter(date__gte=seven_days_ago)
-                    .aggregate(total=Sum("hours"))["total"] or 0)
-
-    docs_total = UserDocument.objects.count()
-    docs_pending_review = (
-        UserDocument.objects.filter(status__in=["submitted", "under_review"]).count()
-        if hasattr(UserDocument, "status") else 0
-    )
-
-    applications_pending = 0
-    try:
-        from staff.models import VolunteerApplication, ApplicationStatus
-        applications_pending = VolunteerApplication.objects.filter(status=ApplicationStatus.PENDING).count()
-    except Exception:
-        pass
-
-    payments_7d_count = payments_7d_amount = 0
-    if Payment:
-        payments_7d_count = Payment.objects.filter(created_at__date__gte=seven_days_ago).count()
-        payments_7d_amount = (Payment.objects
-                              .filter(created_at__date__gte=seven_days_ago, status=Payment.Status.ACCEPTED)
-                              .aggregate(total=Sum("amount"))["total"] or 0)
-
-    stats = {
-        "missions": Mission.objects.count(),
-        "missions_published": Mission.objects.filter(status="published").count(),
-        "signups": MissionSignup.objects.count(),
-        "signups_pending": MissionSignup.objects.filter(status=MissionSignup.Status.PENDING).count(),
-        "events_upcoming": events_upcoming,
-        "projects": projects_total,
-        "volunteers": volunteers_total,
-        "docs_total": docs_total,
-        "docs_submitted": docs_pending_review,
-        "applications_pending": applications_pending,
-        "hours_entries_7d": HoursEntry.objects.filter(date__gte=seven_days_ago).count(),
-        "hours_7d": hours_7d_sum,
-        "payments_7d_count": payments_7d_count,
-        "payments_7d_amount": payments_7d_amount,
-    }
-
-    # -------- Missions à venir/en cours (dates Mission) + taux de remplissage --------
-    missions_qs = (
-        Mission.objects.filter(status="published")
-        .filter(Q(end_date__date__gte=today) | Q(start_date__date__gte=today))
-        .annotate(accepted_count=Count("signups", filter=Q(signups__status=MissionSignup.Status.ACCEPTED)))
-        .select_related("event")
-        .order_by("start_date", "end_date")[:8]
-    )
-
-    def _date_range_display(sd, ed):
-        sd_d = sd.date() if hasattr(sd, "date") else sd
-        ed_d = ed.date() if hasattr(ed, "date") else ed
-        if sd_d and ed_d and sd_d != ed_d:
-            return f"{sd_d:%d/%m/%Y} → {ed_d:%d/%m/%Y}"
-        if sd_d:
-            return f"{sd_d:%d/%m/%Y}"
-        return "Dates à confirmer"
-
-    upcoming = []
-    for m in missions_qs:
-        cap = m.capacity or 0
-        acc = getattr(m, "accepted_count", 0) or 0
-        pct = int(round((acc / cap) * 100)) if cap else None
-        upcoming.append({
-            "mission_id": m.id,
-            "title": m.title,
-            "date": _date_range_display(m.start_date, m.end_date),
-            "location": m.location or (getattr(m.event, "location", "") or ""),
-            "accepted": acc,
-            "capacity": cap,
-            "fill_pct": pct,  # None si pas de capacité
-        })
-
-    # -------- Inscriptions en attente (les plus anciennes d'abord) --------
-    pending_qs = (
-        MissionSignup.objects
-        .select_related("mission", "volunteer__user")
-        .filter(status=MissionSignup.Status.PENDING)
-        .order_by("created_at")[:10]
-    )
-    pending = [{
-        "signup_id": s.id,
-        "volunteer_name": s.volunteer.display_name,
-        "mission_title": s.mission.title,
-        "created_at": s.created_at,
-    } for s in pending_qs]
-
-    # -------- Documents à vérifier (soumis/en vérif) --------
-    documents_review = []
-    if hasattr(UserDocument, "status"):
-        docs_qs = (UserDocument.objects
-                   .select_related("user")
-                   .filter(status__in=["submitted", "under_review"])
-                   .order_by("-uploaded_at")[:8])
-        for d in docs_qs:
-            documents_review.append({
-                "id": d.id,
-                "name": d.name or (getattr(d.file, "name", "") or "Document"),
-                "user": getattr(d.user, "get_full_name", lambda: d.user.username)(),
-                "status": d.status,
-                "uploaded_at": d.uploaded_at,
-            })
-
-    # -------- Top bénévoles du mois (par heures) --------
-    top_volunteers = []
-    top_qs = (HoursEntry.objects
-              .filter(date__gte=start_month)
-              .values("volunteer", "volunteer__name",
-                      "volunteer__user__first_name", "volunteer__user__last_name")
-              .annotate(total=Sum("hours"))
-              .order_by("-total")[:5])
-    for r in top_qs:
-        label = r.get("volunteer__name") or f"{r.get('volunteer__user__first_name','')} {r.get('volunteer__user__last_name','')}".strip()
-        top_volunteers.append({"volunteer_id": r["volunteer"], "name": label or "Bénévole", "hours": r["total"] or 0})
-
-    # -------- Tendances d’heures (30 jours) --------
-    raw = (HoursEntry.objects.filter(date__range=[start_30, today])
-           .values("date").order_by("date").annotate(total=Sum("hours")))
-    by_date = {row["date"]: float(row["total"] or 0.0) for row in raw}
-    max_val = max([0.0] + list(by_date.values()))
-    hours_series = []
-    for i in range(30):
-        d = start_30 + timedelta(days=i)
-        v = float(by_date.get(d, 0.0))
-        pct = 0 if max_val == 0 else int(round((v / max_val) * 100))
-        hours_series.append({"date": d, "value": v, "height": pct})
-
-    # -------- Projets “actifs” (avec missions à venir via Event) --------
-    projects_active = (Project.objects
-                       .annotate(
-                           upcoming_missions=Count(
-                               "events__missions",
-                               filter=Q(events__missions__status="published") &
-                                      (Q(events__missions__end_date__date__gte=today) |
-                                       Q(events__missions__start_date__date__gte=today)),
-                               distinct=True
-                           ),
-                           events_count=Count("events", distinct=True),
-                       )
-                       .order_by("-upcoming_missions", "title")[:5])
-
-    projects_rows = [{
-        "id": p.id,
-        "title": getattr(p, "title", str(p)),
-        "events_count": getattr(p, "events_count", 0),
-        "upcoming_missions": getattr(p, "upcoming_missions", 0),
-        "slug": getattr(p, "slug", None),
-    } for p in projects_active]
-
-    # -------- Notifications récentes --------
-    notifications = []
-    unread_count = 0
-    if Notification:
-        n_qs = Notification.objects.filter(recipient=request.user).order_by("-created_at")[:6]
-        notifications = [{
-            "id": n.id,
-            "title": n.title or str(n),
-            "message": n.message,
-            "url": n.url or "",
-            "is_read": n.is_read,
-            "created_at": n.created_at,
-        } for n in n_qs]
-        unread_count = Notification.objects.filter(recipient=request.user, is_read=False).count()
-
-    # -------- Paiements récents (si module présent) --------
-    payments = []
-    if Payment:
-        pay_qs = (Payment.objects
-                  .order_by("-created_at")
-                  .values("id", "amount", "currency", "status", "provider", "created_at")[:5])
-        payments = list(pay_qs)
+    """Super dashboard staff : KPIs (instantané en cache, cf. staff/dashboard.py) + parties personnelles en direct."""
+    snapshot = dashboard.get_snapshot()
+
+    # -------- Notifications récentes (par utilisateur : jamais en cache) --------
+    notifications = [{
+        "id": n.id,
+        "title": n.title or str(n),
+        "message": n.message,
+        "url": n.get_open_url(),
+        "is_read": n.is_read,
+        "created_at": n.created_at,
+    } for n in notif_inbox.items(request.user, limit=6)]
 
     context = {
-        "stats": stats,
-        "upcoming": upcoming,
-        "pending": pending,
-        "documents_review": documents_review,
-        "top_volunteers": top_volunteers,
-        "hours": hours_series,
-        "projects_rows": projects_rows,
+        **snapshot["data"],
+        "snapshot_generated_at": snapshot["generated_at"],
         "notifications": notifications,
-        "unread_count": unread_count,
-        "payments": payments,
+        "unread_count": notif_inbox.unread_count(request.user),
     }
     return render(request, "staff/dashboard.html", context)
 
+
+@staff_member_required
+@require_POST
+def staff_dashboard_refresh(request):
+    dashboard.refresh()
+    messages.success(request, "Indicateurs recalculés.")
+    return redirect("staff:dashboard")
+
 # --------- ÉVÉNEMENTS (staff) ---------
 
 @staff_member_required
@@ -1162,15 +956,13 @@ def signups_list(request):
     if dto:
         qs = qs.filter(created_at__date__lte=dto)
 
-    rows = [{
+    page_obj = _keyset_rows(request, qs, ["-id"], lambda s: {
         "id": s.id,
         "volunteer_name": s.volunteer.display_name,
         "mission_title": s.mission.title,
         "status": s.status,
         "created_at": s.created_at,
-    } for s in qs.order_by("-id")]
-
-    page_obj = _paginate(request, rows, per_page=20)
+    }, per_page=20)
     return render(request, "staff/signups_list.html", {"page_obj": page_obj})
 
 
@@ -1192,31 +984,25 @@ def volunteers_list(request):
             Q(user__last_name__icontains=q)
         )
 
-    # Préfetch pour compétences
-    skills_map = {}
+    # Compétences : vraie restriction du QuerySet, puis préchargement limité à la page
+    skills_qs = VolunteerSkill.objects.select_related("skill").only("volunteer_id", "skill__name")
     if skill:
-        # filtrage par compétence demandée
-        vs_qs = (VolunteerSkill.objects
-                 .select_related("skill", "volunteer")
-                 .filter(skill__name__icontains=skill))
-    else:
-        vs_qs = VolunteerSkill.objects.select_related("skill", "volunteer")
-
-    for vs in vs_qs:
-        skills_map.setdefault(vs.volunteer_id, []).append(vs.skill.name)
+        matching = VolunteerSkill.objects.filter(skill__name__icontains=skill)
+        qs = qs.filter(Exists(matching.filter(volunteer=OuterRef("pk"))))
+        skills_qs = skills_qs.filter(skill__name__icontains=skill)
+    qs = qs.prefetch_related(Prefetch("volunteer_skills", queryset=skills_qs, to_attr="skill_list"))
 
-    rows = []
-    for v in qs.order_by("name", "user__username"):
-        rows.append({
+    def _row(v):
+        return {
             "id": v.id,
             "name": v.display_name,
             "username": v.user.username,
             "email": v.email or v.user.email,
             "phone": v.phone,
-            "skills": ", ".join(sorted(skills_map.get(v.id, []))) or None,
-        })
+            "skills": ", ".join(sorted(vs.skill.name for vs in v.skill_list)) or None,
+        }
 
-    page_obj = _paginate(request, rows, per_page=20)
+    page_obj = _paginate_rows(request, qs.order_by("name", "user__username", "id"), _row, per_page=20)
     return render(request, "staff/volunteers_list.html", {"page_obj": page_obj})
 
 
@@ -1245,11 +1031,7 @@ def volunteer_detail(request, pk):
         .select_related("mission", "event")
         .order_by("-date", "-id")
     )
-    stats = {
-        "hours": hours_qs.aggregate(total=Sum("hours"))["total"] or 0,
-        "missions": hours_qs.exclude(mission__isnull=True).values_list("mission", flat=True).distinct().count(),
-        "events": hours_qs.exclude(event__isnull=True).values_list("event", flat=True).distinct().count(),
-    }
+    stats = v.get_stats()  # ligne VolunteerStats (cf. accounts/stats.py)
 
     # Inscriptions missions
     signups_qs = (
@@ -1384,7 +1166,7 @@ def staff_volunteer_send_team_invite(request, volunteer_id: int):
 
     from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None) or "ne_pas_repondre@bamuwellbeing.org"
     try:
-        send_mail(subject, body_txt, from_email, [target_email], html_message=body_html)
+        enqueue_mail(subject, body_txt, from_email, [target_email], html_message=body_html)
         messages.success(request, f"Invitation envoyée à {target_email} ✅")
     except Exception as e:
         messages.error(request, f"Erreur d’envoi de l’invitation : {e}")
@@ -1423,7 +1205,7 @@ def documents_review(request):
     if status and hasattr(UserDocument, "status"):
         qs = qs.filter(status=status)
 
-    rows = [{
+    page_obj = _paginate_rows(request, qs, lambda d: {
         "id": d.id,
         "name": d.name or getattr(d.file, "name", ""),
         "file_url": getattr(d.file, "url", ""),
@@ -1431,9 +1213,7 @@ def documents_review(request):
         "mime": d.mime,
         "size": d.size,
         "status": getattr(d, "status", ""),
-    } for d in qs]
-
-    page_obj = _paginate(request, rows, per_page=20)
+    }, per_page=20)
     return render(request, "staff/documents_review.html", {"page_obj": page_obj})
 
 
@@ -1462,37 +1242,57 @@ def hours_list(request):
     if dto:
         qs = qs.filter(date__lte=dto)
 
-    # pièces jointes
-    proofs_qs = HoursEntryProof.objects.filter(hours_entry__in=qs)
-    proofs_map = {}
-    for p in proofs_qs:
-        proofs_map.setdefault(p.hours_entry_id, []).append({
-            "url": getattr(p.file, "url", ""),
-            "name": p.original_name or getattr(p.file, "name", ""),
-            "size": p.size,
-        })
-
-    rows = []
-    for e in qs.order_by("-date", "-id"):
-        proofs = proofs_map.get(e.id, [])
-        if has_proofs == "yes" and not proofs:
-            continue
-        if has_proofs == "no" and proofs:
-            continue
-        rows.append({
+    # pièces jointes : filtre en sous-requête, chargement limité aux entrées de la page
+    if has_proofs in ("yes", "no"):
+        with_proofs = Exists(HoursEntryProof.objects.filter(hours_entry=OuterRef("pk")))
+        qs = qs.filter(with_proofs if has_proofs == "yes" else ~with_proofs)
+    qs = qs.prefetch_related(Prefetch(
+        "proofs",
+        queryset=HoursEntryProof.objects.only("id", "hours_entry_id", "file", "original_name", "size").order_by("id"),
+        to_attr="proof_list",
+    ))
+
+    def _row(e):
+        return {
             "date": e.date,
             "volunteer_name": e.volunteer.display_name,
             "mission_title": getattr(e.mission, "title", None),
             "event_title": getattr(e.event, "title", None),
             "hours": e.hours,
             "note": e.note,
-            "proofs": proofs,
-        })
+            "proofs": [{
+                "url": getattr(p.file, "url", ""),
+                "name": p.original_name or getattr(p.file, "name", ""),
+                "size": p.size,
+            } for p in e.proof_list],
+        }
 
-    page_obj = _paginate(request, rows, per_page=20)
+    page_obj = _keyset_rows(request, qs, ["-date", "-id"], _row, per_page=20)
     return render(request, "staff/hours_list.html", {"page_obj": page_obj})
 
 
+@staff_member_required
+def hours_import_view(request):
+    """Import d'heures en masse (CSV / grille) avec rapport ligne à ligne et mode simulation."""
+    report = None
+    if request.method == "POST":
+        form = HoursImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                raw_rows = hours_import.parse_csv(form.cleaned_data["text"])
+            except ValueError as e:
+                form.add_error(None, str(e))
+            else:
+                report = hours_import.import_hours(raw_rows, dry_run=form.cleaned_data["dry_run"])
+                if report.created:
+                    messages.success(request, f"{report.created} déclaration(s) d’heures importée(s).")
+                    return redirect("staff:hours_list")
+    else:
+        form = HoursImportForm()
+
+    return render(request, "staff/hours_import.html", {"form": form, "report": report})
+
+
 # Accepter une candidature (par le staff)
 @staff_member_required
 @require_POST
@@ -2101,7 +1901,7 @@ def team_invite_picker(request):
             to_email = v.email or v.user.email
             if to_email:
                 try:
-                    send_mail(subject, body_txt, from_email, [to_email], html_message=body_html)
+                    enqueue_mail(subject, body_txt, from_email, [to_email], html_message=body_html)
                     sent += 1
                 except Exception:
                     pass
@@ -2188,7 +1988,7 @@ def team_invite_resend(request, invite_id: int):
     to_email = member.email or (getattr(member.user, "email", None) if member.user else None)
     if to_email:
         try:
-            send_mail(subject, body_txt, from_email, [to_email], html_message=body_html)
+            enqueue_mail(subject, body_txt, from_email, [to_email], html_message=body_html)
             messages.success(request, "Invitation renvoyée.")
         except Exception:
             messages.warning(request, "Invitation recréée mais l’envoi d’email a échoué.")